@@ -1,6 +1,9 @@
 -- Enable the pgvector extension
 CREATE EXTENSION IF NOT EXISTS vector;
 
+-- Enable trigram matching for fuzzy history search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Languages table
 CREATE TABLE IF NOT EXISTS languages (
     id SERIAL PRIMARY KEY,
@@ -41,9 +44,42 @@ CREATE TABLE IF NOT EXISTS model_languages (
     PRIMARY KEY (model_id, language_id)
 );
 
+-- tts_requests and system_stats are partitioned by time (months and days).
+-- In databases created before partitioning the plain table is renamed to
+-- <table>_legacy here and attached at the end of this file as the partition
+-- holding all existing rows, so no data is copied.
+DO $$
+DECLARE
+    t TEXT;
+    idx TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['tts_requests', 'system_stats'] LOOP
+        IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass(t) AND relkind = 'r') THEN
+            IF t = 'tts_requests' THEN
+                ALTER TABLE tts_requests ADD COLUMN IF NOT EXISTS text_search TSVECTOR
+                    GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED;
+                -- Superseded by the composite indexes below
+                DROP INDEX IF EXISTS idx_tts_requests_language;
+                DROP INDEX IF EXISTS idx_tts_requests_created_at;
+            END IF;
+
+            -- Free the index names for the partitioned table
+            FOR idx IN SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = t::regclass LOOP
+                EXECUTE format('ALTER INDEX %I RENAME TO %I', idx, idx || '_legacy');
+            END LOOP;
+
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', t, t || '_legacy');
+            -- The id sequence is shared with the new partitions and must outlive the legacy one
+            EXECUTE format('ALTER SEQUENCE %I OWNED BY NONE', t || '_id_seq');
+        END IF;
+    END LOOP;
+END;
+$$;
+
 -- TTS request logs
+CREATE SEQUENCE IF NOT EXISTS tts_requests_id_seq;
 CREATE TABLE IF NOT EXISTS tts_requests (
-    id SERIAL PRIMARY KEY,
+    id INTEGER NOT NULL DEFAULT nextval('tts_requests_id_seq'),
     text TEXT NOT NULL,
     language_code VARCHAR(10) NOT NULL,
     avatar_id INTEGER REFERENCES avatars(id) ON DELETE SET NULL,
@@ -51,8 +87,11 @@ CREATE TABLE IF NOT EXISTS tts_requests (
     file_path VARCHAR(255),
     duration_seconds FLOAT,
     processing_time FLOAT,
-    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
-);
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    -- Words of the text for history search ('simple' config: no stemming, works for every language)
+    text_search TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
 
 -- Batch jobs table
 CREATE TABLE IF NOT EXISTS batch_jobs (
@@ -61,27 +100,50 @@ CREATE TABLE IF NOT EXISTS batch_jobs (
     total_items INTEGER NOT NULL,
     completed_items INTEGER NOT NULL DEFAULT 0,
     failed_items INTEGER NOT NULL DEFAULT 0,
+    deduplicated_items INTEGER NOT NULL DEFAULT 0,
+    priority VARCHAR(20) NOT NULL DEFAULT 'batch',
+    weight FLOAT NOT NULL DEFAULT 1.0,
+    -- Incremented by every write of item results; items carry the version that last changed them
+    version BIGINT NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
 );
 
+-- Upgrade existing databases
+ALTER TABLE batch_jobs ADD COLUMN IF NOT EXISTS deduplicated_items INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE batch_jobs ADD COLUMN IF NOT EXISTS priority VARCHAR(20) NOT NULL DEFAULT 'batch';
+ALTER TABLE batch_jobs ADD COLUMN IF NOT EXISTS weight FLOAT NOT NULL DEFAULT 1.0;
+ALTER TABLE batch_jobs ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
 -- Batch job items
 CREATE TABLE IF NOT EXISTS batch_job_items (
     id VARCHAR(100) NOT NULL,
     job_id VARCHAR(100) NOT NULL REFERENCES batch_jobs(id) ON DELETE CASCADE,
     text TEXT NOT NULL,
+    -- MD5 of the normalized text; outputs are reused between items with the same hash
+    text_hash VARCHAR(32),
     language_code VARCHAR(10) NOT NULL,
     avatar_id INTEGER REFERENCES avatars(id) ON DELETE SET NULL,
     status VARCHAR(20) NOT NULL,
     file_url VARCHAR(255),
     error TEXT,
+    -- Model that produced the output; outputs are only reused for the same model
+    model_id INTEGER REFERENCES tts_models(id) ON DELETE SET NULL,
+    version BIGINT NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    completed_at TIMESTAMP WITH TIME ZONE,
     PRIMARY KEY (job_id, id)
 );
 
+ALTER TABLE batch_job_items ADD COLUMN IF NOT EXISTS model_id INTEGER REFERENCES tts_models(id) ON DELETE SET NULL;
+ALTER TABLE batch_job_items ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE batch_job_items ADD COLUMN IF NOT EXISTS text_hash VARCHAR(32);
+ALTER TABLE batch_job_items ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP WITH TIME ZONE;
+
 -- System stats table for monitoring
+CREATE SEQUENCE IF NOT EXISTS system_stats_id_seq;
 CREATE TABLE IF NOT EXISTS system_stats (
-    id SERIAL PRIMARY KEY,
+    id INTEGER NOT NULL DEFAULT nextval('system_stats_id_seq'),
     total_nodes INTEGER NOT NULL,
     active_nodes INTEGER NOT NULL,
     total_workers INTEGER NOT NULL,
@@ -93,7 +155,38 @@ CREATE TABLE IF NOT EXISTS system_stats (
     disk_percent FLOAT NOT NULL,
     gpu_percent FLOAT,
     gpu_memory_percent FLOAT,
-    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Reference data version, bumped on every change to languages, dialects, avatars or models
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO catalog_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- Audio files protected from recompression and deletion by the audio lifecycle manager
+CREATE TABLE IF NOT EXISTS audio_pins (
+    filename VARCHAR(255) PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Scan positions of the audio lifecycle manager (stage and table -> last row processed)
+CREATE TABLE IF NOT EXISTS audio_lifecycle_cursors (
+    name VARCHAR(100) PRIMARY KEY,
+    position JSONB NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Files a lifecycle stage had to skip (protected or failed), retried on every run
+CREATE TABLE IF NOT EXISTS audio_lifecycle_deferred (
+    stage VARCHAR(20) NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    file_path VARCHAR(255),
+    deferred_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (stage, filename)
 );
 
 -- Insert default languages
@@ -138,10 +231,23 @@ INSERT INTO tts_models (model_id, name, description, quantized) VALUES
 ON CONFLICT (model_id) DO NOTHING;
 
 -- Create indexes for performance
-CREATE INDEX IF NOT EXISTS idx_tts_requests_language ON tts_requests(language_code);
-CREATE INDEX IF NOT EXISTS idx_tts_requests_created_at ON tts_requests(created_at);
+-- History pages are read newest first by keyset on (created_at, id), optionally filtered by language or model
+CREATE INDEX IF NOT EXISTS idx_tts_requests_created_at_id ON tts_requests(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tts_requests_language_created_at ON tts_requests(language_code, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tts_requests_model_created_at ON tts_requests(model_id, created_at DESC, id DESC);
+-- History search: full-text matches and fuzzy (trigram) matches of the text
+CREATE INDEX IF NOT EXISTS idx_tts_requests_text_search ON tts_requests USING gin (text_search);
+CREATE INDEX IF NOT EXISTS idx_tts_requests_text_trgm ON tts_requests USING gin (text gin_trgm_ops);
+-- The audio lifecycle manager rewrites or clears every reference to a file it recompresses or deletes
+CREATE INDEX IF NOT EXISTS idx_tts_requests_file_path ON tts_requests(file_path);
+CREATE INDEX IF NOT EXISTS idx_batch_job_items_file_url ON batch_job_items(file_url);
+CREATE INDEX IF NOT EXISTS idx_batch_job_items_created_at ON batch_job_items(created_at, job_id, id);
 CREATE INDEX IF NOT EXISTS idx_batch_jobs_status ON batch_jobs(status);
 CREATE INDEX IF NOT EXISTS idx_batch_job_items_status ON batch_job_items(status);
+-- Batch status pages and deltas read a job's items in (version, id) order
+CREATE INDEX IF NOT EXISTS idx_batch_job_items_job_version ON batch_job_items(job_id, version, id);
+DROP INDEX IF EXISTS idx_batch_job_items_text_md5;
+CREATE INDEX IF NOT EXISTS idx_batch_job_items_text_hash ON batch_job_items(text_hash, completed_at) WHERE status = 'completed';
 CREATE INDEX IF NOT EXISTS idx_system_stats_timestamp ON system_stats(timestamp);
 
 -- Create vector index for model embeddings
@@ -170,4 +276,116 @@ BEGIN
         p_cpu_percent, p_memory_percent, p_disk_percent, p_gpu_percent, p_gpu_memory_percent
     );
 END;
-$$ LANGUAGE plpgsql; 
\ No newline at end of file
+$$ LANGUAGE plpgsql; 
+
+-- Bump the catalog version so API processes reload their reference data catalog
+CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['languages', 'language_dialects', 'avatars', 'tts_models', 'model_languages'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_catalog_version ON %I', t, t);
+        EXECUTE format(
+            'CREATE TRIGGER %I_catalog_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()', t, t
+        );
+    END LOOP;
+END;
+$$;
+
+-- Create the partitions of a time-partitioned table for the current and the next p_ahead periods
+-- (p_unit is 'month' or 'day'); returns the number of partitions created
+CREATE OR REPLACE FUNCTION create_time_partitions(p_parent TEXT, p_unit TEXT, p_ahead INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    period_start TIMESTAMPTZ := date_trunc(p_unit, NOW());
+    period_end TIMESTAMPTZ;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..p_ahead LOOP
+        period_end := period_start + ('1 ' || p_unit)::INTERVAL;
+        partition_name := p_parent || '_p' || to_char(period_start, CASE p_unit WHEN 'month' THEN 'YYYY_MM' ELSE 'YYYY_MM_DD' END);
+
+        IF to_regclass(partition_name) IS NULL THEN
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, p_parent, period_start, period_end
+                );
+                created := created + 1;
+            EXCEPTION WHEN invalid_object_definition THEN
+                -- The period is still covered by the legacy partition
+                NULL;
+            END;
+        END IF;
+
+        period_start := period_end;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop the partitions of a time-partitioned table whose rows are all older than p_retention;
+-- returns the number of partitions dropped
+CREATE OR REPLACE FUNCTION drop_expired_partitions(p_parent TEXT, p_retention INTERVAL)
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    upper_bound TIMESTAMPTZ;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = p_parent::regclass
+    LOOP
+        upper_bound := substring(part.bound FROM 'TO \(''([^'']+)''\)')::TIMESTAMPTZ;
+
+        IF upper_bound IS NOT NULL AND upper_bound <= NOW() - p_retention THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Attach the rows of databases created before partitioning (see the top of this file)
+DO $$
+DECLARE
+    rec RECORD;
+    legacy TEXT;
+    upper_bound TIMESTAMPTZ;
+BEGIN
+    FOR rec IN SELECT * FROM (VALUES ('tts_requests', 'created_at', 'month'), ('system_stats', 'timestamp', 'day')) AS v(parent, col, unit) LOOP
+        legacy := rec.parent || '_legacy';
+
+        IF to_regclass(legacy) IS NOT NULL AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(legacy)) THEN
+            -- The legacy partition ends at the first period boundary after its newest row
+            EXECUTE format(
+                'SELECT GREATEST(date_trunc(%L, NOW()), date_trunc(%L, MAX(%I))) + %L::INTERVAL FROM %I',
+                rec.unit, rec.unit, rec.col, '1 ' || rec.unit, legacy
+            ) INTO upper_bound;
+
+            -- A matching check constraint spares the validation scan of ATTACH PARTITION
+            EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (%I < %L)', legacy, legacy || '_bound', rec.col, upper_bound);
+            EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (MINVALUE) TO (%L)', rec.parent, legacy, upper_bound);
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', legacy, legacy || '_bound');
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Initial partitions; the API's partition maintenance keeps creating them ahead of time
+SELECT create_time_partitions('tts_requests', 'month', 2);
+SELECT create_time_partitions('system_stats', 'day', 7);
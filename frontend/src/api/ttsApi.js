@@ -27,6 +27,20 @@ export const generateSpeech = async (text, language, avatar = null) => {
   }
 };
 
+// History API functions
+// Pass the next_cursor of the previous page to read the next one; offset is
+// only used to jump to pages no cursor is known for
+export const getTTSHistory = async (limit = 50, offset = 0, cursor = null) => {
+  try {
+    const params = cursor ? { limit, cursor } : { limit, offset };
+    const response = await api.get('/tts/history', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error getting TTS history:', error);
+    throw error;
+  }
+};
+
 // Batch processing API functions
 export const submitBatchJob = async (items) => {
   try {
@@ -40,9 +54,12 @@ export const submitBatchJob = async (items) => {
   }
 };
 
-export const getBatchJobStatus = async (jobId) => {
+// Pass { summary: true } for the counters only, { since } with the
+// delta_cursor of an earlier status for the items that changed since then,
+// and { cursor } with next_cursor for the following page of items
+export const getBatchJobStatus = async (jobId, params = {}) => {
   try {
-    const response = await api.get(`/batch-tts/${jobId}/status`);
+    const response = await api.get(`/batch-tts/${jobId}/status`, { params });
     return response.data;
   } catch (error) {
     console.error('Error getting batch job status:', error);
@@ -137,6 +154,7 @@ export const deleteModel = async (modelId) => {
 
 export default {
   generateSpeech,
+  getTTSHistory,
   submitBatchJob,
   getBatchJobStatus,
   getAvailableModels,
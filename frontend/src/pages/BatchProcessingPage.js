@@ -104,11 +104,18 @@ const BatchProcessingPage = () => {
     
     try {
       const result = await submitBatchJob(inputs);
+      const job = {
+        id: result.job_id,
+        status: 'submitted',
+        completed: 0,
+        total: inputs.length,
+        created_at: new Date().toISOString()
+      };
       
-      setJobStatus(result);
+      setJobStatus(job);
       
       // Add job to the list
-      setJobs([result, ...jobs]);
+      setJobs([job, ...jobs]);
       
       // Reset form
       setInputs([{ text: '', language: 'en', avatar: null }]);
@@ -131,8 +138,14 @@ const BatchProcessingPage = () => {
         
         for (let i = 0; i < updatedJobs.length; i++) {
           if (updatedJobs[i].status !== 'completed' && updatedJobs[i].status !== 'failed') {
-            const result = await getBatchJobStatus(updatedJobs[i].id);
-            updatedJobs[i] = result;
+            // The table only shows progress, so skip the items of large jobs
+            const result = await getBatchJobStatus(updatedJobs[i].id, { summary: true });
+            updatedJobs[i] = {
+              ...updatedJobs[i],
+              status: result.status,
+              completed: result.completed_items + result.failed_items,
+              total: result.total_items
+            };
             hasUpdates = true;
           }
         }
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { getTTSHistory } from '../api/ttsApi';
 import Box from '@mui/material/Box';
 import Typography from '@mui/material/Typography';
@@ -20,6 +20,8 @@ const HistoryPage = () => {
   const [page, setPage] = useState(1);
   const [pageSize, setPageSize] = useState(10);
   const [totalItems, setTotalItems] = useState(0);
+  // Cursor of each page reached so far (page number -> cursor), so paging forward uses keyset pagination
+  const cursors = useRef({});
   
   // Calculate total pages
   const totalPages = Math.ceil(totalItems / pageSize);
@@ -30,10 +32,13 @@ const HistoryPage = () => {
       try {
         setLoading(true);
         const offset = (page - 1) * pageSize;
-        const result = await getTTSHistory(pageSize, offset);
+        const result = await getTTSHistory(pageSize, offset, cursors.current[page]);
         
         setHistoryItems(result.items);
         setTotalItems(result.total);
+        if (result.next_cursor) {
+          cursors.current[page + 1] = result.next_cursor;
+        }
         setError(null);
       } catch (err) {
         console.error('Error fetching TTS history:', err);
@@ -54,6 +59,7 @@ const HistoryPage = () => {
   // Handle items per page change
   const handlePageSizeChange = (event) => {
     setPageSize(event.target.value);
+    cursors.current = {}; // Cursors depend on the page size
     setPage(1); // Reset to first page when changing page size
   };
   
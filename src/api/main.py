@@ -1,30 +1,40 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Depends, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Depends, BackgroundTasks, Request
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 from typing import List, Optional, Dict, Union, Any
 import os
+import sys
+import logging
 import uuid
 import mimetypes
 import ray
 import json
 import time
+import hashlib
 from datetime import datetime
-from fastapi.staticfiles import StaticFiles
+from urllib.parse import quote
 
 # Import core TTS functionality (to be implemented)
 from src.core.tts_service import TextToSpeechService
-from src.core.models import TTSRequest, TTSResponse, TTSResult, Avatar, BatchTTSRequest, BatchTTSItem, BatchTTSItemStatus, BatchTTSJobStatus, ModelInfo, LanguageInfo, AvatarInfo, SystemStats, TTSHistoryResponse
+from src.core.admission import AdmissionRejected, retry_after_header
+from src.core.models import TTSRequest, TTSResponse, TTSResult, Avatar, BatchTTSRequest, BatchTTSItem, BatchTTSItemStatus, BatchTTSJobStatus, ModelInfo, LanguageInfo, AvatarInfo, SystemStats, TTSHistoryResponse, TTSHistorySearchResponse, ModelQueueStatus
 
 # Import database dependencies
-from src.core.db_models import get_db
+from src.core.db_models import get_db, get_async_db
 from sqlalchemy.orm import Session
-from src.core.db import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.db_service import db_service
+from src.core.async_db_service import async_db_service, decode_batch_item_cursor
+from src.core.catalog import catalog
 
 # Import centralized configuration
 from src.config import (
     API_HOST, API_PORT, DEBUG_MODE, CORS_ORIGINS, 
-    AUDIO_OUTPUT_DIR, LOG_LEVEL, LOG_FORMAT
+    AUDIO_OUTPUT_DIR, LOG_LEVEL, LOG_FORMAT,
+    AUDIO_DELIVERY_MODE, AUDIO_ACCEL_REDIRECT_PREFIX, AUDIO_CACHE_MAX_AGE,
+    CATALOG_CACHE_MAX_AGE, CATALOG_CHECK_SECONDS, LEADERBOARD_CACHE_SECONDS,
+    BATCH_STATUS_PAGE_SIZE, BATCH_STATUS_MAX_PAGE_SIZE
 )
 
 # Set up logging
@@ -63,8 +73,50 @@ tts_service = TextToSpeechService()
 OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "audio-output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Mount the output directory as a static files directory
-app.mount("/audio-output", StaticFiles(directory=OUTPUT_DIR), name="audio-output")
+@app.on_event("startup")
+async def resume_batch_jobs():
+    """Resume batch jobs interrupted by a restart or failure, now and periodically"""
+    tts_service.batch_engine.start()
+
+@app.on_event("startup")
+async def start_cost_model():
+    """Refit the processing time estimates in the background"""
+    tts_service.cost_model.start()
+
+@app.on_event("startup")
+async def start_partition_maintenance():
+    """Create upcoming partitions and drop expired ones in the background"""
+    tts_service.partition_maintenance.start()
+
+@app.on_event("startup")
+async def start_audio_lifecycle():
+    """Recompress and expire old audio files in the background"""
+    tts_service.audio_lifecycle.start()
+
+@app.on_event("shutdown")
+async def flush_request_log():
+    """Write the buffered request log before exiting"""
+    await tts_service.request_log.stop()
+
+@app.on_event("shutdown")
+async def stop_resuming_batch_jobs():
+    """Stop resuming batch jobs"""
+    await tts_service.batch_engine.stop()
+
+@app.on_event("shutdown")
+async def stop_cost_model():
+    """Stop refitting the processing time estimates"""
+    await tts_service.cost_model.stop()
+
+@app.on_event("shutdown")
+async def stop_partition_maintenance():
+    """Stop the partition maintenance"""
+    await tts_service.partition_maintenance.stop()
+
+@app.on_event("shutdown")
+async def stop_audio_lifecycle():
+    """Stop the audio lifecycle"""
+    await tts_service.audio_lifecycle.stop()
 
 @app.get("/")
 async def root():
@@ -76,11 +128,12 @@ async def root():
     }
 
 @app.post("/tts", response_model=TTSResponse)
-async def generate_speech(request: TTSRequest, db: Session = Depends(get_db)):
+async def generate_speech(request: TTSRequest, db: AsyncSession = Depends(get_async_db)):
     """Generate speech from text"""
-    # Validate language
-    supported_languages = tts_service.get_supported_languages(db)
-    if request.language not in [lang.code for lang in supported_languages]:
+    # Validate language against the reference catalog (the built-in list until it is loaded)
+    await catalog.ensure_fresh_async(db)
+    supported_languages = catalog.language_codes() or {lang.code for lang in tts_service.get_supported_languages()}
+    if request.language not in supported_languages:
         raise HTTPException(status_code=400, detail=f"Language {request.language} not supported")
     
     # Generate unique filename
@@ -95,7 +148,8 @@ async def generate_speech(request: TTSRequest, db: Session = Depends(get_db)):
             language=request.language,
             avatar=request.avatar,
             output_path=output_path,
-            db=db
+            db=db,
+            model=request.model
         )
         
         # Create response
@@ -103,7 +157,8 @@ async def generate_speech(request: TTSRequest, db: Session = Depends(get_db)):
             text=request.text,
             language=request.language,
             avatar=request.avatar.dict() if request.avatar else None,
-            audio_url=f"/audio-output/{filename}",
+            # Identical concurrent requests share one output file
+            audio_url=f"/audio-output/{os.path.basename(result.file_path)}",
             duration_seconds=result.duration_seconds,
             model_used=result.model_used,
             message="Speech generation successful"
@@ -111,30 +166,65 @@ async def generate_speech(request: TTSRequest, db: Session = Depends(get_db)):
         
         return response
     
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e.retry_after))
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/batch-tts", response_model=Dict[str, str])
-def submit_batch_job(request: BatchTTSRequest, db: Session = Depends(get_db)):
+async def submit_batch_job(request: BatchTTSRequest, db: AsyncSession = Depends(get_async_db)):
     """Submit a batch TTS job"""
     try:
         # Call TTS service
-        job_id = tts_service.submit_batch_job(request, db=db)
+        job_id = await tts_service.submit_batch_job(request, db=db)
         
         # Return job ID
         return {"job_id": job_id}
     
+    except AdmissionRejected as e:
+        # Jobs over the per-job limit will never be admitted; ask the client to split them
+        if e.retry_after is None:
+            raise HTTPException(status_code=413, detail=str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e.retry_after))
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/batch-tts/{job_id}/status", response_model=BatchTTSJobStatus)
-def get_batch_job_status(job_id: str, db: Session = Depends(get_db)):
-    """Get the status of a batch TTS job"""
+async def get_batch_job_status(
+    job_id: str,
+    limit: int = Query(BATCH_STATUS_PAGE_SIZE, ge=1, le=BATCH_STATUS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    since: Optional[str] = Query(None, description="delta_cursor of an earlier status; only items changed since then"),
+    summary: bool = Query(False, description="Only the job counters, without items"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the status of a batch TTS job with a page of its items"""
+    # A page cursor continues a delta as well, so it takes precedence
+    after = cursor or since
+    if after:
+        try:
+            decode_batch_item_cursor(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        # Call TTS service
-        job_status = tts_service.get_batch_job_status(job_id, db=db)
+        job_status = await tts_service.get_batch_job_status(
+            job_id, db=db, after=after, limit=limit, summary=summary
+        )
         
-        return job_status
+        # Large pages skip response model validation and are encoded with orjson
+        return ORJSONResponse(job_status.dict())
     
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -143,11 +233,15 @@ def get_batch_job_status(job_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/languages", response_model=List[LanguageInfo])
-def get_supported_languages(db: Session = Depends(get_db)):
+async def get_supported_languages(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get supported languages"""
+    await _ensure_catalog_loaded(db)
     try:
-        languages = db_service.get_languages(db)
-        return [
+        if _etag_matches(request.headers.get("if-none-match"), catalog.etag):
+            return _not_modified(catalog.etag, CATALOG_CACHE_MAX_AGE)
+        
+        languages = catalog.get_languages()
+        return _cacheable_json([
             LanguageInfo(
                 code=lang["code"],
                 name=lang["name"],
@@ -157,47 +251,69 @@ def get_supported_languages(db: Session = Depends(get_db)):
                 ] if lang.get("dialects") else None
             )
             for lang in languages
-        ]
+        ], CATALOG_CACHE_MAX_AGE, etag=catalog.etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get languages: {str(e)}")
 
 @app.get("/avatars", response_model=List[AvatarInfo])
-def get_available_avatars(db: Session = Depends(get_db)):
+async def get_available_avatars(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get available avatars"""
+    await _ensure_catalog_loaded(db)
     try:
-        avatars = db_service.get_avatars(db)
-        return [
+        if _etag_matches(request.headers.get("if-none-match"), catalog.etag):
+            return _not_modified(catalog.etag, CATALOG_CACHE_MAX_AGE)
+        
+        avatars = catalog.get_avatars()
+        return _cacheable_json([
             AvatarInfo(
                 gender=avatar["gender"],
                 dialect=avatar.get("dialect"),
                 description=avatar["description"]
             )
             for avatar in avatars
-        ]
+        ], CATALOG_CACHE_MAX_AGE, etag=catalog.etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get avatars: {str(e)}")
 
 @app.get("/models", response_model=List[ModelInfo])
-def list_available_models(db: Session = Depends(get_db)):
+def list_available_models(request: Request, db: Session = Depends(get_db)):
     """List available TTS models"""
-    return tts_service.list_available_models(db)
+    etag, models = tts_service.get_model_registry(db)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag, CATALOG_CACHE_MAX_AGE)
+    
+    return _cacheable_json(models, CATALOG_CACHE_MAX_AGE, etag=etag)
 
 @app.get("/system-stats", response_model=SystemStats)
 def get_system_stats(db: Session = Depends(get_db)):
     """Get system statistics"""
     return tts_service.get_system_stats(db)
 
+@app.get("/queue-status", response_model=List[ModelQueueStatus])
+def get_queue_status():
+    """Get the queued work and estimated wait of every model"""
+    return tts_service.get_queue_status()
+
 @app.get("/tts/history", response_model=TTSHistoryResponse)
-def get_tts_history(
+async def get_tts_history(
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    language: Optional[str] = Query(None, description="Only requests in this language"),
+    model: Optional[str] = Query(None, description="Only requests served by this model"),
+    since: Optional[datetime] = Query(None, description="Only requests created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only requests created before this time"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get TTS conversion history"""
     try:
+        filters = {"language": language, "model": model, "since": since, "until": until}
+        
         # Get history items
-        history_items = db_service.get_tts_history(db, limit=limit, offset=offset)
-        total_count = db_service.get_tts_history_count(db)
+        history_items, next_cursor = await async_db_service.get_tts_history(
+            db, limit=limit, offset=offset, cursor=cursor, **filters
+        )
+        total_count = await async_db_service.get_tts_history_count(db, **filters)
         
         # Process items to add file URLs
         for item in history_items:
@@ -206,31 +322,185 @@ def get_tts_history(
         
         return TTSHistoryResponse(
             total=total_count,
-            items=history_items
+            items=history_items,
+            next_cursor=next_cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get TTS history: {str(e)}")
 
+@app.get("/tts/history/search", response_model=TTSHistorySearchResponse)
+async def search_tts_history(
+    q: str = Query(..., min_length=2, max_length=500, description="Words or fragment of the text to find"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    language: Optional[str] = Query(None, description="Only requests in this language"),
+    model: Optional[str] = Query(None, description="Only requests served by this model"),
+    since: Optional[datetime] = Query(None, description="Only requests created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only requests created before this time"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search TTS conversion history by text"""
+    try:
+        items, next_cursor = await async_db_service.search_tts_history(
+            db, q, limit=limit, cursor=cursor, language=language, model=model, since=since, until=until
+        )
+        
+        # Process items to add file URLs
+        for item in items:
+            if item.get("file_path"):
+                item["file_url"] = item["file_path"].replace(OUTPUT_DIR, "/audio-output")
+        
+        return TTSHistorySearchResponse(query=q, items=items, next_cursor=next_cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search TTS history: {str(e)}")
+
+def _audio_etag(stat_result: os.stat_result) -> str:
+    """Build an ETag in the same format nginx uses for static files"""
+    return f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match or not etag:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _not_modified(etag: str, max_age: int) -> Response:
+    """Answer a conditional request whose cached copy is still current"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": f"public, max-age={max_age}"})
+
+async def _ensure_catalog_loaded(db: AsyncSession) -> None:
+    """Refresh the reference catalog, answering 503 until it has been loaded once
+    
+    Before the first load the catalog is empty, and an empty list must not be
+    served as a cacheable response.
+    """
+    await catalog.ensure_fresh_async(db)
+    if catalog.etag is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Reference catalog is not loaded yet",
+            headers=retry_after_header(CATALOG_CHECK_SECONDS)
+        )
+
+def _cacheable_json(content: Any, max_age: int, etag: Optional[str] = None) -> Response:
+    """JSON response that clients and nginx may cache and revalidate
+    
+    Without an ETag one is derived from the content.
+    """
+    content = jsonable_encoder(content)
+    if etag is None:
+        etag = f'"{hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()[:32]}"'
+    
+    return JSONResponse(content=content, headers={"ETag": etag, "Cache-Control": f"public, max-age={max_age}"})
+
+def _parse_byte_range(range_header: Optional[str], file_size: int):
+    """Parse a single-range "bytes=start-end" header into an inclusive (start, end) pair"""
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    
+    start_str, _, end_str = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            start = max(file_size - length, 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+    
+    end = min(end, file_size - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    
+    return start, end
+
 @app.get("/audio-output/{filename}")
-def get_audio_file(filename: str):
+def get_audio_file(filename: str, request: Request):
     """Get generated audio file"""
+    # Only plain file names inside the output directory are served
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    
     file_path = os.path.join(OUTPUT_DIR, filename)
     
-    if not os.path.exists(file_path):
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Audio file not found")
     
+    etag = _audio_etag(stat_result)
+    media_type = mimetypes.guess_type(filename)[0] or "audio/mpeg"
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"public, max-age={AUDIO_CACHE_MAX_AGE}"
+    }
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    if AUDIO_DELIVERY_MODE == "accel":
+        # nginx serves the bytes (sendfile, Range, If-None-Match) from its internal location
+        headers["X-Accel-Redirect"] = f"{AUDIO_ACCEL_REDIRECT_PREFIX}{quote(filename)}"
+        return Response(media_type=media_type, headers=headers)
+    
+    byte_range = _parse_byte_range(request.headers.get("range"), stat_result.st_size)
+    if byte_range:
+        start, end = byte_range
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            content = f.read(end - start + 1)
+        
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        return Response(content=content, status_code=206, media_type=media_type, headers=headers)
+    
     return FileResponse(
         file_path,
-        media_type="audio/mpeg",
-        filename=filename
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+        stat_result=stat_result
     )
 
+@app.put("/audio-output/{filename}/pin", response_model=Dict)
+def pin_audio_file(filename: str, db: Session = Depends(get_db)):
+    """Keep an audio file from being recompressed or deleted"""
+    if os.path.basename(filename) != filename or filename.startswith(".") \
+            or not os.path.isfile(os.path.join(OUTPUT_DIR, filename)):
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    
+    db_service.pin_audio_file(db, filename)
+    return {"filename": filename, "pinned": True}
+
+@app.delete("/audio-output/{filename}/pin", response_model=Dict)
+def unpin_audio_file(filename: str, db: Session = Depends(get_db)):
+    """Let an audio file be recompressed and deleted again"""
+    if not db_service.unpin_audio_file(db, filename):
+        raise HTTPException(status_code=404, detail="Audio file is not pinned")
+    
+    return {"filename": filename, "pinned": False}
+
 @app.get("/models/huggingface-leaderboard", response_model=List[Dict])
-async def get_huggingface_leaderboard(limit: int = 10, db: Session = Depends(get_db)):
+async def get_huggingface_leaderboard(request: Request, limit: int = 10, db: Session = Depends(get_db)):
     """Get the top TTS models from Hugging Face leaderboard"""
     try:
         models = await tts_service.get_huggingface_leaderboard(limit=limit, db=db)
-        return models
+        response = _cacheable_json(models, LEADERBOARD_CACHE_SECONDS)
+        if _etag_matches(request.headers.get("if-none-match"), response.headers["etag"]):
+            return _not_modified(response.headers["etag"], LEADERBOARD_CACHE_SECONDS)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get Hugging Face leaderboard: {str(e)}")
 
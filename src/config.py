@@ -22,6 +22,10 @@ SQLITE_URL = f"sqlite:///{DB_PATH}"
 
 # Model Configuration
 MODEL_DIR = os.environ.get("MODEL_DIR", str(BASE_DIR / "models/tts"))
+# Reference recordings of the avatars' voices, named <gender>_<dialect>.wav
+AVATAR_VOICE_DIR = os.environ.get("AVATAR_VOICE_DIR", str(BASE_DIR / "models/voices"))
+# Seconds before the speaker embedding of a recording that failed is computed again
+SPEAKER_EMBEDDING_RETRY_SECONDS = int(os.environ.get("SPEAKER_EMBEDDING_RETRY_SECONDS", 300))
 DEFAULT_MODELS = [
     "coqui/XTTS-v2",
     "suno/bark",
@@ -30,12 +34,131 @@ DEFAULT_MODELS = [
     "facebook/mms-tts"
 ]
 
+# Quality tier per model (1 = best), used by the model router unless
+# the model's model_info.json sets "quality_tier"
+MODEL_QUALITY_TIERS = {
+    "coqui/XTTS-v2": 1,
+    "suno/bark": 2,
+    "microsoft/speecht5_tts": 2,
+    "espnet/kan-bayashi_ljspeech_vits": 3,
+    "facebook/mms-tts": 3
+}
+
 # Output Configuration
 AUDIO_OUTPUT_DIR = os.environ.get("AUDIO_OUTPUT_DIR", str(BASE_DIR / "audio-output"))
 
+# Audio delivery: "direct" streams files from the API process, "accel" only
+# authorizes the request and hands the transfer to nginx via X-Accel-Redirect
+AUDIO_DELIVERY_MODE = os.environ.get("AUDIO_DELIVERY_MODE", "direct").lower()
+AUDIO_ACCEL_REDIRECT_PREFIX = os.environ.get("AUDIO_ACCEL_REDIRECT_PREFIX", "/protected-audio/")
+AUDIO_CACHE_MAX_AGE = int(os.environ.get("AUDIO_CACHE_MAX_AGE", 7 * 24 * 3600))
+
+# Audio lifecycle: files older than AUDIO_COLD_AFTER_DAYS are recompressed to
+# low-bitrate Opus, files older than AUDIO_TTL_DAYS are deleted (0 disables either)
+AUDIO_COLD_AFTER_DAYS = int(os.environ.get("AUDIO_COLD_AFTER_DAYS", 7))
+AUDIO_COLD_BITRATE = os.environ.get("AUDIO_COLD_BITRATE", "24k")
+AUDIO_TTL_DAYS = int(os.environ.get("AUDIO_TTL_DAYS", 90))
+# How often the lifecycle manager runs (seconds) and how many rows it reads per query
+AUDIO_LIFECYCLE_INTERVAL_SECONDS = float(os.environ.get("AUDIO_LIFECYCLE_INTERVAL_SECONDS", 600))
+AUDIO_LIFECYCLE_BATCH_SIZE = int(os.environ.get("AUDIO_LIFECYCLE_BATCH_SIZE", 500))
+
 # Ray Configuration
 RAY_ADDRESS = os.environ.get("RAY_ADDRESS", "auto")
 RAY_NAMESPACE = os.environ.get("RAY_NAMESPACE", "texttospeech_playground")
+# Number of TTSWorker actors (one GPU each) started per model
+TTS_WORKER_REPLICAS = int(os.environ.get("TTS_WORKER_REPLICAS", 1))
+# Coalesce identical concurrent /tts requests across API processes (in-process coalescing is always on)
+TTS_SINGLE_FLIGHT_SHARED = os.environ.get("TTS_SINGLE_FLIGHT_SHARED", "True").lower() in ("true", "1", "t")
+# Time limit for a /tts synthesis, including failover and hedged calls
+TTS_REQUEST_TIMEOUT_SECONDS = float(os.environ.get("TTS_REQUEST_TIMEOUT_SECONDS", 120))
+# Send a duplicate call to another replica when a call is slower than the model's p95 latency
+TTS_HEDGE_ENABLED = os.environ.get("TTS_HEDGE_ENABLED", "False").lower() in ("true", "1", "t")
+# Latency percentile after which a call is hedged
+TTS_HEDGE_PERCENTILE = float(os.environ.get("TTS_HEDGE_PERCENTILE", 95))
+# Lower bound of the hedging delay, also used until a model has enough latency samples
+TTS_HEDGE_MIN_DELAY_SECONDS = float(os.environ.get("TTS_HEDGE_MIN_DELAY_SECONDS", 2.0))
+# Number of recent calls per model the latency percentiles are computed from
+LATENCY_WINDOW_SIZE = int(os.environ.get("LATENCY_WINDOW_SIZE", 200))
+# Sentences whose token ids each TTSWorker keeps cached
+TEXT_FRONTEND_CACHE_SIZE = int(os.environ.get("TEXT_FRONTEND_CACHE_SIZE", 10000))
+# How often the language -> model routing table is rebuilt from the database and model directory
+ROUTER_REFRESH_SECONDS = float(os.environ.get("ROUTER_REFRESH_SECONDS", 300))
+# Relative latency penalty per quality tier below the best (0 ranks by latency only)
+ROUTER_TIER_PENALTY = float(os.environ.get("ROUTER_TIER_PENALTY", 0.5))
+
+# Request Log Configuration
+# Buffered /tts request rows are inserted at least this often (milliseconds)
+REQUEST_LOG_FLUSH_INTERVAL_MS = int(os.environ.get("REQUEST_LOG_FLUSH_INTERVAL_MS", 200))
+# ... or as soon as this many rows are buffered
+REQUEST_LOG_BATCH_SIZE = int(os.environ.get("REQUEST_LOG_BATCH_SIZE", 500))
+# Append-only file holding rows that could not be written while the database was unavailable
+REQUEST_LOG_SPILL_PATH = os.environ.get("REQUEST_LOG_SPILL_PATH", str(DATA_DIR / "request_log_spill.jsonl"))
+
+# Reference Catalog Configuration
+# How often the cached languages, avatars and models are checked against the database version (seconds)
+CATALOG_CHECK_SECONDS = float(os.environ.get("CATALOG_CHECK_SECONDS", 5))
+# How long clients and nginx may reuse /languages, /avatars and /models without revalidating (seconds)
+CATALOG_CACHE_MAX_AGE = int(os.environ.get("CATALOG_CACHE_MAX_AGE", 60))
+# How long the Hugging Face leaderboard is cached before it is fetched again (seconds)
+LEADERBOARD_CACHE_SECONDS = int(os.environ.get("LEADERBOARD_CACHE_SECONDS", 3600))
+
+# History Configuration
+# How long history totals are reused before they are counted again (seconds)
+HISTORY_COUNT_CACHE_SECONDS = float(os.environ.get("HISTORY_COUNT_CACHE_SECONDS", 30))
+# Without filters, histories larger than this are estimated from the table statistics instead of counted
+HISTORY_EXACT_COUNT_LIMIT = int(os.environ.get("HISTORY_EXACT_COUNT_LIMIT", 100000))
+
+# Retention Configuration
+# tts_requests (monthly partitions) and system_stats (daily partitions) drop whole
+# partitions once all their rows are older than the retention; 0 keeps them forever
+TTS_REQUESTS_RETENTION_DAYS = int(os.environ.get("TTS_REQUESTS_RETENTION_DAYS", 365))
+SYSTEM_STATS_RETENTION_DAYS = int(os.environ.get("SYSTEM_STATS_RETENTION_DAYS", 30))
+# How often partitions are created ahead and expired ones dropped (seconds)
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = float(os.environ.get("PARTITION_MAINTENANCE_INTERVAL_SECONDS", 3600))
+
+# Batch Job Configuration
+# A processing job whose heartbeat is older than BATCH_JOB_STALE_SECONDS is
+# considered orphaned and is resumed by the next API process that starts
+BATCH_JOB_HEARTBEAT_SECONDS = float(os.environ.get("BATCH_JOB_HEARTBEAT_SECONDS", 30))
+BATCH_JOB_STALE_SECONDS = float(os.environ.get("BATCH_JOB_STALE_SECONDS", 120))
+# How often every API process looks for such jobs (seconds)
+BATCH_JOB_RESUME_INTERVAL_SECONDS = float(os.environ.get("BATCH_JOB_RESUME_INTERVAL_SECONDS", 60))
+# Maximum time between progress updates while a batch job is running
+BATCH_PROGRESS_INTERVAL_SECONDS = float(os.environ.get("BATCH_PROGRESS_INTERVAL_SECONDS", 1.0))
+# Number of batch calls (micro-batches) outstanding on a single TTS worker
+BATCH_MAX_IN_FLIGHT_PER_WORKER = int(os.environ.get("BATCH_MAX_IN_FLIGHT_PER_WORKER", 4))
+# Maximum number of items sent to a worker in one call; items in a
+# micro-batch share model, language and avatar
+BATCH_MICRO_BATCH_SIZE = int(os.environ.get("BATCH_MICRO_BATCH_SIZE", 8))
+# Outputs of identical items finished within this window are reused (0 disables)
+BATCH_DEDUP_WINDOW_SECONDS = float(os.environ.get("BATCH_DEDUP_WINDOW_SECONDS", 24 * 3600))
+# Times a micro-batch is requeued after the worker running it died
+BATCH_MAX_ACTOR_RETRIES = int(os.environ.get("BATCH_MAX_ACTOR_RETRIES", 2))
+# Share of every replica's call slots held back for interactive /tts requests
+INTERACTIVE_RESERVED_SHARE = float(os.environ.get("INTERACTIVE_RESERVED_SHARE", 0.25))
+# Items returned per page of a batch job status, by default and at most
+BATCH_STATUS_PAGE_SIZE = int(os.environ.get("BATCH_STATUS_PAGE_SIZE", 1000))
+BATCH_STATUS_MAX_PAGE_SIZE = int(os.environ.get("BATCH_STATUS_MAX_PAGE_SIZE", 10000))
+
+# Admission Control Configuration
+# Interactive requests queued per model before new ones are rejected with 429
+ADMISSION_MAX_QUEUE_DEPTH = int(os.environ.get("ADMISSION_MAX_QUEUE_DEPTH", 64))
+# Estimated wait (seconds) above which interactive requests are rejected
+ADMISSION_MAX_INTERACTIVE_WAIT_SECONDS = float(os.environ.get("ADMISSION_MAX_INTERACTIVE_WAIT_SECONDS", 30))
+# Audio-seconds of batch work that may be queued per model
+ADMISSION_MAX_QUEUED_AUDIO_SECONDS = float(os.environ.get("ADMISSION_MAX_QUEUED_AUDIO_SECONDS", 36000))
+# Audio-seconds a single batch job may request
+BATCH_MAX_AUDIO_SECONDS_PER_JOB = float(os.environ.get("BATCH_MAX_AUDIO_SECONDS_PER_JOB", 18000))
+# Processing seconds per audio second assumed until a model has been observed
+ADMISSION_DEFAULT_REAL_TIME_FACTOR = float(os.environ.get("ADMISSION_DEFAULT_REAL_TIME_FACTOR", 0.5))
+
+# Cost Model Configuration
+# How often the per-model processing time fit is refreshed from tts_requests
+COST_MODEL_REFRESH_SECONDS = float(os.environ.get("COST_MODEL_REFRESH_SECONDS", 300))
+# Only requests newer than this (seconds) are used for the fit
+COST_MODEL_WINDOW_SECONDS = float(os.environ.get("COST_MODEL_WINDOW_SECONDS", 604800))
+# Requests a (model, language) needs before its own fit is used
+COST_MODEL_MIN_SAMPLES = int(os.environ.get("COST_MODEL_MIN_SAMPLES", 20))
 
 # API Keys
 HUGGINGFACE_TOKEN = os.environ.get("HUGGINGFACE_TOKEN") or os.environ.get("HF_TOKEN")
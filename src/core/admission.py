@@ -0,0 +1,186 @@
+import math
+import threading
+from typing import Dict, List, Optional
+
+# Import centralized configuration
+from src.config import (
+    ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_MAX_INTERACTIVE_WAIT_SECONDS,
+    ADMISSION_MAX_QUEUED_AUDIO_SECONDS, BATCH_MAX_AUDIO_SECONDS_PER_JOB,
+    ADMISSION_DEFAULT_REAL_TIME_FACTOR
+)
+
+# Rough speaking rate used to size requests before synthesis (~200 words/minute)
+SECONDS_PER_WORD = 0.3
+
+def estimate_audio_seconds(text: str) -> float:
+    """Estimate the duration of the audio generated for a text"""
+    return max(len(text.split()), 1) * SECONDS_PER_WORD
+
+class AdmissionRejected(Exception):
+    """Raised when a request is refused to protect queued work
+
+    ``retry_after`` is the number of seconds after which the request is
+    expected to be admitted, or None if retrying will not help.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounds the work queued per model and estimates waiting times
+
+    Queued work is tracked in audio-seconds per model, separately for
+    interactive and batch traffic. Each model's observed real-time factor
+    (processing seconds per audio second) turns that into an estimated wait,
+    which drives both the admission decisions and the Retry-After returned to
+    clients. Interactive requests only wait for other interactive requests
+    since they overtake batch work in the workers.
+    """
+
+    def __init__(self):
+        """Initialize empty queues"""
+        self._lock = threading.Lock()
+
+        # Per-model queue state (model_id -> {class -> {"requests", "audio_seconds"}})
+        self.queues: Dict[str, Dict[str, float]] = {}
+
+        # Exponentially weighted real-time factor per model
+        self.real_time_factors: Dict[str, float] = {}
+
+        # Number of replicas serving each model
+        self.replicas: Dict[str, int] = {}
+
+    def _queue(self, model_id: str, interactive: bool) -> Dict[str, float]:
+        """Get the queue state of a model's traffic class (the caller holds the lock)"""
+        queues = self.queues.setdefault(model_id, {
+            "interactive": {"requests": 0, "audio_seconds": 0.0},
+            "batch": {"requests": 0, "audio_seconds": 0.0}
+        })
+        return queues["interactive" if interactive else "batch"]
+
+    def set_replicas(self, model_id: str, replicas: int) -> None:
+        """Record how many replicas serve a model"""
+        with self._lock:
+            self.replicas[model_id] = max(replicas, 1)
+
+    def estimated_wait(self, model_id: str, interactive: bool = False) -> float:
+        """Estimated seconds until work queued now for a model would finish"""
+        with self._lock:
+            return self._estimated_wait(model_id, interactive)
+
+    def _estimated_wait(self, model_id: str, interactive: bool) -> float:
+        """Estimated wait for a model (the caller holds the lock)"""
+        audio_seconds = self._queue(model_id, True)["audio_seconds"]
+        if not interactive:
+            audio_seconds += self._queue(model_id, False)["audio_seconds"]
+
+        return self._drain_time(model_id, audio_seconds)
+
+    def _drain_time(self, model_id: str, audio_seconds: float) -> float:
+        """Seconds a model needs to synthesize the given amount of audio (the caller holds the lock)"""
+        rtf = self.real_time_factors.get(model_id, ADMISSION_DEFAULT_REAL_TIME_FACTOR)
+        return audio_seconds * rtf / self.replicas.get(model_id, 1)
+
+    def admit_interactive(self, model_id: str, text: str) -> float:
+        """Admit an interactive request or raise AdmissionRejected
+
+        Returns the audio-seconds reserved for the request, to be passed to release().
+        """
+        audio_seconds = estimate_audio_seconds(text)
+
+        with self._lock:
+            queue = self._queue(model_id, True)
+            wait = self._estimated_wait(model_id, True)
+
+            if queue["requests"] >= ADMISSION_MAX_QUEUE_DEPTH or wait > ADMISSION_MAX_INTERACTIVE_WAIT_SECONDS:
+                raise AdmissionRejected(
+                    f"Model {model_id} is overloaded ({int(queue['requests'])} queued requests, "
+                    f"~{wait:.0f}s estimated wait)",
+                    retry_after=max(wait - ADMISSION_MAX_INTERACTIVE_WAIT_SECONDS, 1.0)
+                )
+
+            queue["requests"] += 1
+            queue["audio_seconds"] += audio_seconds
+
+        return audio_seconds
+
+    def admit_batch(self, audio_seconds_per_model: Dict[str, float]) -> None:
+        """Admit a batch job and reserve its audio-seconds, or raise AdmissionRejected
+
+        Checking and reserving happen under one lock, so concurrent submits
+        cannot both pass the limit. The batch engine releases the reservation
+        once the job's micro-batches are queued (and reserved) on their own.
+        """
+        total = sum(audio_seconds_per_model.values())
+        if total > BATCH_MAX_AUDIO_SECONDS_PER_JOB:
+            raise AdmissionRejected(
+                f"Batch job would generate ~{total:.0f}s of audio, "
+                f"the limit is {BATCH_MAX_AUDIO_SECONDS_PER_JOB:.0f}s per job"
+            )
+
+        with self._lock:
+            for model_id, audio_seconds in audio_seconds_per_model.items():
+                queue = self._queue(model_id, False)
+                excess = queue["audio_seconds"] + audio_seconds - ADMISSION_MAX_QUEUED_AUDIO_SECONDS
+
+                if excess > 0:
+                    # Wait until enough of the queue has drained for the job to fit
+                    raise AdmissionRejected(
+                        f"Model {model_id} has ~{queue['audio_seconds']:.0f}s of audio queued",
+                        retry_after=max(self._drain_time(model_id, excess), 1.0)
+                    )
+
+            for model_id, audio_seconds in audio_seconds_per_model.items():
+                self._queue(model_id, False)["audio_seconds"] += audio_seconds
+
+    def reserve(self, model_id: str, audio_seconds: float, requests: int = 1,
+                interactive: bool = False) -> None:
+        """Account for work queued for a model"""
+        with self._lock:
+            queue = self._queue(model_id, interactive)
+            queue["requests"] += requests
+            queue["audio_seconds"] += audio_seconds
+
+    def release(self, model_id: str, audio_seconds: float, requests: int = 1,
+                interactive: bool = False) -> None:
+        """Account for work that finished (or was dropped) for a model"""
+        with self._lock:
+            queue = self._queue(model_id, interactive)
+            queue["requests"] = max(queue["requests"] - requests, 0)
+            queue["audio_seconds"] = max(queue["audio_seconds"] - audio_seconds, 0.0)
+
+    def observe(self, model_id: str, processing_time: float, duration_seconds: float) -> None:
+        """Update a model's real-time factor from a finished request"""
+        if not duration_seconds or duration_seconds <= 0:
+            return
+
+        with self._lock:
+            rtf = processing_time / duration_seconds
+            previous = self.real_time_factors.get(model_id)
+            self.real_time_factors[model_id] = rtf if previous is None else 0.9 * previous + 0.1 * rtf
+
+    def get_status(self) -> List[Dict]:
+        """Get the queue state of every model"""
+        with self._lock:
+            return [
+                {
+                    "model_id": model_id,
+                    "interactive_requests": int(queues["interactive"]["requests"]),
+                    "batch_requests": int(queues["batch"]["requests"]),
+                    "queued_audio_seconds": round(
+                        queues["interactive"]["audio_seconds"] + queues["batch"]["audio_seconds"], 2
+                    ),
+                    "interactive_wait_seconds": round(self._estimated_wait(model_id, True), 2),
+                    "estimated_wait_seconds": round(self._estimated_wait(model_id, False), 2),
+                    "replicas": self.replicas.get(model_id, 1),
+                    "real_time_factor": round(
+                        self.real_time_factors.get(model_id, ADMISSION_DEFAULT_REAL_TIME_FACTOR), 3
+                    )
+                }
+                for model_id, queues in self.queues.items()
+            ]
+
+def retry_after_header(retry_after: Optional[float]) -> Dict[str, str]:
+    """Build the Retry-After header for a rejection"""
+    return {"Retry-After": str(math.ceil(retry_after))} if retry_after else {}
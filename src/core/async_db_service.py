@@ -0,0 +1,369 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, insert, func, or_, and_, tuple_, text, cast, literal, Float
+from typing import List, Dict, Optional, Tuple
+import datetime
+import base64
+import time
+import uuid
+
+from src.core.db_models import Avatar, TTSModel, TTSRequest, BatchJob, BatchJobItem
+from src.core.catalog import catalog
+from src.core.text_frontend import normalized_text_hash
+from src.core.models import (
+    BatchTTSRequest, BatchTTSItemStatus, BatchTTSJobStatus
+)
+
+# Import centralized configuration
+from src.config import HISTORY_COUNT_CACHE_SECONDS, HISTORY_EXACT_COUNT_LIMIT
+
+def encode_history_cursor(created_at: datetime.datetime, request_id: int) -> str:
+    """Opaque cursor pointing after a history row"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{request_id}".encode("utf-8")).decode("ascii")
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """Decode a history cursor into (created_at, id); raises ValueError if it is malformed"""
+    try:
+        created_at, _, request_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").partition("|")
+        return datetime.datetime.fromisoformat(created_at), int(request_id)
+    except Exception:
+        raise ValueError("Invalid history cursor")
+
+def encode_search_cursor(score: float, request_id: int) -> str:
+    """Opaque cursor pointing after a search result"""
+    return base64.urlsafe_b64encode(f"{score!r}|{request_id}".encode("utf-8")).decode("ascii")
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a search cursor into (score, id); raises ValueError if it is malformed"""
+    try:
+        score, _, request_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").partition("|")
+        return float(score), int(request_id)
+    except Exception:
+        raise ValueError("Invalid search cursor")
+
+def encode_batch_item_cursor(version: int, item_id: Optional[str] = None) -> str:
+    """Opaque cursor pointing after a batch item, or after every item of a job version"""
+    return base64.urlsafe_b64encode(f"{version}|{item_id or ''}".encode("utf-8")).decode("ascii")
+
+def decode_batch_item_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+    """Decode a batch item cursor into (version, item id or None); raises ValueError if it is malformed"""
+    try:
+        version, _, item_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").partition("|")
+        return int(version), item_id or None
+    except Exception:
+        raise ValueError("Invalid batch status cursor")
+
+class AsyncDatabaseService:
+    """Async (asyncpg) counterparts of the DatabaseService queries on the API request path
+    
+    Relationships can't be lazy loaded on an AsyncSession, so every query
+    loads what its result needs up front.
+    """
+    
+    def __init__(self):
+        """Initialize the history count cache"""
+        # History totals by filter ((language, model, since, until) -> (counted at, total))
+        self._history_counts: Dict[tuple, tuple] = {}
+    
+    async def create_batch_job(self, db: AsyncSession, batch_request: BatchTTSRequest) -> str:
+        """Create a new batch job with all its items in one transaction"""
+        job_id = f"batch_{uuid.uuid4().hex}"
+        
+        db.add(BatchJob(
+            id=job_id,
+            status="submitted",
+            total_items=len(batch_request.items),
+            completed_items=0,
+            failed_items=0,
+            priority=batch_request.priority.value,
+            weight=batch_request.weight
+        ))
+        
+        # Resolve avatars from the reference catalog instead of one query per item
+        await catalog.ensure_fresh_async(db)
+        
+        # Flush the job first so the items' foreign key is satisfied
+        await db.flush()
+        await db.execute(insert(BatchJobItem), [
+            {
+                "id": item.id,
+                "job_id": job_id,
+                "text": item.text,
+                "text_hash": normalized_text_hash(item.text, item.language),
+                "language_code": item.language,
+                "avatar_id": catalog.avatar_id(
+                    item.avatar.gender, item.avatar.dialect, item.language
+                ) if item.avatar else None,
+                "status": "pending",
+                "file_url": None,
+                "error": None
+            }
+            for item in batch_request.items
+        ])
+        
+        await db.commit()
+        
+        return job_id
+    
+    async def claim_batch_job(self, db: AsyncSession, job_id: str, stale_after_seconds: float) -> bool:
+        """Atomically take ownership of a batch job that is new or whose owner stopped heartbeating"""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=stale_after_seconds)
+        
+        result = await db.execute(
+            update(BatchJob).where(
+                BatchJob.id == job_id,
+                or_(
+                    BatchJob.status == "submitted",
+                    and_(BatchJob.status == "processing", BatchJob.updated_at < cutoff)
+                )
+            ).values(status="processing", updated_at=func.now())
+        )
+        await db.commit()
+        
+        return result.rowcount == 1
+    
+    async def get_batch_job_status(
+        self, 
+        db: AsyncSession, 
+        job_id: str, 
+        after: Optional[str] = None, 
+        limit: Optional[int] = None, 
+        summary: bool = False
+    ) -> Optional[BatchTTSJobStatus]:
+        """Get the status of a batch job with a page of its items
+        
+        Items are read in (version, id) order, so an item that changes while a
+        client pages through the job moves behind the pages still to come.
+        ``after`` is the next_cursor of the previous page or the delta_cursor
+        of an earlier status; a summary has no items. The delta_cursor is only
+        set on the last page.
+        """
+        job = (await db.execute(select(BatchJob).where(BatchJob.id == job_id))).scalar_one_or_none()
+        
+        if not job:
+            return None
+        
+        items = []
+        next_cursor = None
+        
+        if not summary:
+            query = select(
+                BatchJobItem.id, BatchJobItem.status, BatchJobItem.file_url, BatchJobItem.error, BatchJobItem.version
+            ).where(BatchJobItem.job_id == job_id)
+            
+            if after:
+                version, item_id = decode_batch_item_cursor(after)
+                if item_id is None:
+                    query = query.where(BatchJobItem.version > version)
+                else:
+                    query = query.where(tuple_(BatchJobItem.version, BatchJobItem.id) > (version, item_id))
+            
+            query = query.order_by(BatchJobItem.version, BatchJobItem.id)
+            if limit:
+                query = query.limit(limit + 1)
+            
+            rows = (await db.execute(query)).all()
+            if limit and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_batch_item_cursor(rows[-1].version, rows[-1].id)
+            
+            items = [
+                BatchTTSItemStatus(id=row.id, status=row.status, file_url=row.file_url, error=row.error)
+                for row in rows
+            ]
+        
+        return BatchTTSJobStatus(
+            job_id=job.id,
+            status=job.status,
+            total_items=job.total_items,
+            completed_items=job.completed_items,
+            failed_items=job.failed_items,
+            deduplicated_items=job.deduplicated_items,
+            priority=job.priority,
+            weight=job.weight,
+            items=items,
+            next_cursor=next_cursor,
+            delta_cursor=None if next_cursor else encode_batch_item_cursor(job.version)
+        )
+    
+    def _history_filters(
+        self, 
+        language: Optional[str], 
+        model: Optional[str], 
+        since: Optional[datetime.datetime], 
+        until: Optional[datetime.datetime]
+    ) -> Optional[list]:
+        """Conditions selecting the filtered history, or None if nothing can match"""
+        conditions = []
+        
+        if language:
+            conditions.append(TTSRequest.language_code == language)
+        if model:
+            # Filter on the indexed id instead of joining tts_models
+            model_id = catalog.model_id(model)
+            if model_id is None:
+                return None
+            conditions.append(TTSRequest.model_id == model_id)
+        if since:
+            conditions.append(TTSRequest.created_at >= since)
+        if until:
+            conditions.append(TTSRequest.created_at < until)
+        
+        return conditions
+    
+    async def get_tts_history(
+        self, 
+        db: AsyncSession, 
+        limit: int = 100, 
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get a page of TTS conversion history, newest first
+        
+        Pages are addressed by keyset on (created_at, id): pass the returned
+        cursor to get the next page. Returns the items and the next cursor
+        (None on the last page).
+        """
+        await catalog.ensure_fresh_async(db)
+        conditions = self._history_filters(language, model, since, until)
+        if conditions is None:
+            return [], None
+        
+        if cursor:
+            created_at, request_id = decode_history_cursor(cursor)
+            conditions.append(tuple_(TTSRequest.created_at, TTSRequest.id) < (created_at, request_id))
+        
+        # One extra row tells whether there is a next page
+        result = await db.execute(
+            select(TTSRequest)
+            .options(
+                selectinload(TTSRequest.avatar).selectinload(Avatar.dialect),
+                selectinload(TTSRequest.model)
+            )
+            .where(*conditions)
+            .order_by(TTSRequest.created_at.desc(), TTSRequest.id.desc())
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        requests = result.scalars().all()
+        
+        next_cursor = None
+        if len(requests) > limit:
+            requests = requests[:limit]
+            next_cursor = encode_history_cursor(requests[-1].created_at, requests[-1].id)
+        
+        return [req.to_dict() for req in requests], next_cursor
+    
+    async def search_tts_history(
+        self, 
+        db: AsyncSession, 
+        query: str,
+        limit: int = 50, 
+        cursor: Optional[str] = None,
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Search the TTS history by text, most relevant first
+        
+        A request matches if its text contains the words of the query
+        (full-text, web search syntax) or something close to the query
+        (pg_trgm word similarity), so typos and partial words still match.
+        Both are served by GIN indexes. The score adds the full-text rank and
+        the word similarity; pages are addressed by keyset on (score, id).
+        Returns the items (with their score) and the next cursor.
+        """
+        await catalog.ensure_fresh_async(db)
+        conditions = self._history_filters(language, model, since, until)
+        if conditions is None:
+            return [], None
+        
+        tsquery = func.websearch_to_tsquery('simple', query)
+        conditions.append(or_(
+            TTSRequest.text_search.op('@@')(tsquery),
+            literal(query).op('<%')(TTSRequest.text)
+        ))
+        
+        # Double precision, so the score in a cursor compares exactly
+        score = cast(
+            func.ts_rank_cd(TTSRequest.text_search, tsquery) + func.word_similarity(query, TTSRequest.text),
+            Float
+        )
+        if cursor:
+            after_score, after_id = decode_search_cursor(cursor)
+            conditions.append(tuple_(score, TTSRequest.id) < (after_score, after_id))
+        
+        # One extra row tells whether there is a next page
+        result = await db.execute(
+            select(TTSRequest, score.label("score"))
+            .options(
+                selectinload(TTSRequest.avatar).selectinload(Avatar.dialect),
+                selectinload(TTSRequest.model)
+            )
+            .where(*conditions)
+            .order_by(score.desc(), TTSRequest.id.desc())
+            .limit(limit + 1)
+        )
+        matches = result.all()
+        
+        next_cursor = None
+        if len(matches) > limit:
+            matches = matches[:limit]
+            next_cursor = encode_search_cursor(matches[-1].score, matches[-1].TTSRequest.id)
+        
+        return [dict(match.TTSRequest.to_dict(), score=round(match.score, 4)) for match in matches], next_cursor
+    
+    async def get_tts_history_count(
+        self, 
+        db: AsyncSession, 
+        language: Optional[str] = None,
+        model: Optional[str] = None,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None
+    ) -> int:
+        """Get the (approximate) number of TTS history records
+        
+        Totals are cached for HISTORY_COUNT_CACHE_SECONDS. Without filters a
+        history larger than HISTORY_EXACT_COUNT_LIMIT is estimated from the
+        planner statistics instead of counted.
+        """
+        key = (language, model, since, until)
+        cached = self._history_counts.get(key)
+        if cached and time.time() - cached[0] < HISTORY_COUNT_CACHE_SECONDS:
+            return cached[1]
+        
+        await catalog.ensure_fresh_async(db)
+        conditions = self._history_filters(language, model, since, until)
+        
+        if conditions is None:
+            total = 0
+        else:
+            total = None
+            if not conditions:
+                # Sum over the partitions; the partitioned parent itself holds no rows
+                estimate = (await db.execute(text(
+                    "SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)::bigint FROM pg_class "
+                    "WHERE oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'tts_requests'::regclass) "
+                    "OR oid = 'tts_requests'::regclass"
+                ))).scalar()
+                if estimate is not None and estimate >= HISTORY_EXACT_COUNT_LIMIT:
+                    total = estimate
+            
+            if total is None:
+                result = await db.execute(select(func.count()).select_from(TTSRequest).where(*conditions))
+                total = result.scalar_one()
+        
+        # Filters come from clients; don't let the cache grow without bound
+        if len(self._history_counts) >= 1000:
+            self._history_counts.clear()
+        self._history_counts[key] = (time.time(), total)
+        
+        return total
+
+# Create a singleton instance
+async_db_service = AsyncDatabaseService()
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import os
+import shutil
+import subprocess
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+# Database imports
+from src.core.db_models import SessionLocal
+from src.core.db_service import db_service
+from sqlalchemy import text
+
+# Import centralized configuration
+from src.config import (
+    AUDIO_OUTPUT_DIR, AUDIO_COLD_AFTER_DAYS, AUDIO_COLD_BITRATE, AUDIO_TTL_DAYS,
+    AUDIO_LIFECYCLE_INTERVAL_SECONDS, AUDIO_LIFECYCLE_BATCH_SIZE
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Tables referencing audio files, scanned in creation order
+AUDIO_SOURCES = ("tts_requests", "batch_job_items")
+
+# Extension of recompressed (cold) files
+COLD_EXTENSION = ".ogg"
+
+# Outcomes after which a file is retried on the next runs
+DEFERRED_OUTCOMES = ("protected", "failed")
+
+# Advisory lock taken by the process running the lifecycle
+LIFECYCLE_LOCK_KEY = 472002
+
+class AudioLifecycleManager:
+    """Recompresses old audio files to Opus and deletes expired ones
+
+    Files are found through the rows referencing them rather than by walking
+    the output directory: every stage reads tts_requests and batch_job_items
+    in creation order from a cursor persisted in audio_lifecycle_cursors, so
+    each run only looks at rows that crossed the stage's age since the last
+    run. Files older than AUDIO_TTL_DAYS are deleted, files older than
+    AUDIO_COLD_AFTER_DAYS are transcoded to AUDIO_COLD_BITRATE Opus; either
+    way the references are rewritten in the same transaction that advances
+    the cursor, and the old file is only removed once that has committed.
+    Pinned files, outputs of running batch jobs and files referenced by
+    newer rows are left alone, and retried on every run (from
+    audio_lifecycle_deferred) until they can be processed.
+    """
+
+    def __init__(self, output_dir: str = AUDIO_OUTPUT_DIR):
+        """Initialize the lifecycle state"""
+        self.output_dir = output_dir
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the periodic lifecycle on the running event loop"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic lifecycle"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        """Run the lifecycle every AUDIO_LIFECYCLE_INTERVAL_SECONDS"""
+        while True:
+            await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(AUDIO_LIFECYCLE_INTERVAL_SECONDS)
+
+    def run_once(self) -> Dict[str, int]:
+        """Expire and recompress the files that aged since the last run
+
+        Only one API process runs the lifecycle at a time; the others return
+        an empty result. Returns the number of files per outcome.
+        """
+        db = SessionLocal()
+        counts = {}
+
+        try:
+            # Session lock: the stages commit as they go
+            if not db.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": LIFECYCLE_LOCK_KEY}).scalar():
+                return counts
+
+            try:
+                now = datetime.now(timezone.utc)
+                if AUDIO_TTL_DAYS > 0:
+                    self._run_stage(db, "expire", now - timedelta(days=AUDIO_TTL_DAYS), counts)
+
+                if AUDIO_COLD_AFTER_DAYS > 0:
+                    if shutil.which("ffmpeg"):
+                        self._run_stage(db, "recompress", now - timedelta(days=AUDIO_COLD_AFTER_DAYS), counts)
+                    else:
+                        logger.warning("ffmpeg not found, audio files are not recompressed")
+
+            finally:
+                db.rollback()
+                db.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LIFECYCLE_LOCK_KEY})
+                db.commit()
+
+            if counts:
+                logger.info(f"Audio lifecycle: {counts}")
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Audio lifecycle failed: {str(e)}")
+
+        finally:
+            db.close()
+
+        return counts
+
+    def _run_stage(self, db, stage: str, cutoff: datetime, counts: Dict[str, int]) -> None:
+        """Apply a stage to the files of the rows created between its cursor and the cutoff
+
+        The files the stage had to skip before are retried first. Files it
+        has to skip now are recorded for the next runs, so the cursor can
+        move on without losing them.
+        """
+        self._retry_deferred(db, stage, cutoff, counts)
+
+        for source in AUDIO_SOURCES:
+            name = f"{stage}:{source}"
+            position = db_service.get_audio_lifecycle_cursor(db, name)
+
+            while True:
+                rows = db_service.get_audio_references(db, source, position, cutoff, AUDIO_LIFECYCLE_BATCH_SIZE)
+                if not rows:
+                    break
+
+                obsolete = []
+                handled = set()
+                for row in rows:
+                    if row["filename"] and row["filename"] not in handled:
+                        handled.add(row["filename"])
+                        outcome = self._apply(db, stage, row, cutoff, obsolete)
+                        if outcome in DEFERRED_OUTCOMES:
+                            db_service.defer_audio_file(db, stage, row["filename"], row["file_path"])
+                        if outcome:
+                            counts[outcome] = counts.get(outcome, 0) + 1
+
+                position = rows[-1]["position"]
+                db_service.set_audio_lifecycle_cursor(db, name, position)
+                db.commit()
+                self._remove(obsolete)
+
+                if len(rows) < AUDIO_LIFECYCLE_BATCH_SIZE:
+                    break
+
+    def _retry_deferred(self, db, stage: str, cutoff: datetime, counts: Dict[str, int]) -> None:
+        """Apply a stage again to the files it skipped, forgetting those it gets through"""
+        obsolete = []
+        for row in db_service.get_deferred_audio_files(db, stage):
+            outcome = self._apply(db, stage, row, cutoff, obsolete)
+            if outcome not in DEFERRED_OUTCOMES:
+                db_service.clear_deferred_audio_file(db, stage, row["filename"])
+                if outcome:
+                    counts[outcome] = counts.get(outcome, 0) + 1
+
+        db.commit()
+        self._remove(obsolete)
+
+    def _remove(self, paths: List[str]) -> None:
+        """Remove files whose references are gone"""
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _apply(self, db, stage: str, row: Dict, cutoff: datetime, obsolete: List[str]) -> Optional[str]:
+        """Expire or recompress the file of a row, returns the outcome"""
+        filename = row["filename"]
+        path = os.path.join(self.output_dir, filename)
+
+        if stage == "recompress" and filename.endswith(COLD_EXTENSION):
+            return None
+
+        if not os.path.exists(path):
+            if filename.endswith(COLD_EXTENSION) or not os.path.exists(self._cold_path(path)):
+                db_service.replace_audio_file_references(db, filename, row["file_path"], None)
+                return "missing"
+
+            # Recompressed by an earlier run whose commit did not go through
+            db_service.replace_audio_file_references(
+                db, filename, row["file_path"], os.path.basename(self._cold_path(path))
+            )
+            return "recompressed"
+
+        if db_service.is_audio_file_protected(db, filename, row["file_path"], cutoff):
+            return "protected"
+
+        if stage == "expire":
+            db_service.replace_audio_file_references(db, filename, row["file_path"], None)
+            obsolete.append(path)
+            return "deleted"
+
+        cold_path = self._cold_path(path)
+        if not self._transcode(path, cold_path):
+            return "failed"
+
+        db_service.replace_audio_file_references(db, filename, row["file_path"], os.path.basename(cold_path))
+        obsolete.append(path)
+        return "recompressed"
+
+    def _cold_path(self, path: str) -> str:
+        """Path of the recompressed version of a file"""
+        return os.path.splitext(path)[0] + COLD_EXTENSION
+
+    def _transcode(self, path: str, cold_path: str) -> bool:
+        """Transcode a file to Opus, written next to it under a temporary name first"""
+        temp_path = cold_path + ".tmp"
+
+        try:
+            result = subprocess.run(
+                [
+                    "ffmpeg", "-y", "-loglevel", "error", "-i", path,
+                    "-c:a", "libopus", "-b:a", AUDIO_COLD_BITRATE, "-f", "ogg", temp_path
+                ],
+                capture_output=True,
+                timeout=300
+            )
+            if result.returncode != 0:
+                logger.warning(f"Could not recompress {path}: {result.stderr.decode(errors='replace').strip()}")
+                return False
+
+            os.replace(temp_path, cold_path)
+            return True
+
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Could not recompress {path}: {str(e)}")
+            return False
+
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
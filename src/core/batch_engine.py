@@ -0,0 +1,706 @@
+import os
+import ray
+import asyncio
+import logging
+import itertools
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Local imports
+from src.core.models import BatchTTSRequest, BatchTTSJobStatus, Priority
+from src.core.scheduler import batch_slots_per_replica
+from src.core.admission import AdmissionRejected, estimate_audio_seconds
+from src.core.text_frontend import normalize_text, normalized_text_hash
+from src.ray.work_queue import WorkQueue
+
+# Database imports
+from src.core.db_models import SessionLocal
+from src.core.db_service import db_service
+from src.core.async_db_service import async_db_service
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Import centralized configuration
+from src.config import (
+    AUDIO_OUTPUT_DIR, BATCH_JOB_HEARTBEAT_SECONDS, BATCH_JOB_STALE_SECONDS, BATCH_JOB_RESUME_INTERVAL_SECONDS,
+    BATCH_PROGRESS_INTERVAL_SECONDS, BATCH_MAX_IN_FLIGHT_PER_WORKER, BATCH_MICRO_BATCH_SIZE,
+    BATCH_DEDUP_WINDOW_SECONDS, BATCH_MAX_ACTOR_RETRIES, INTERACTIVE_RESERVED_SHARE
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class BatchJobEngine:
+    """Durable batch job execution backed by the batch_jobs/batch_job_items tables
+
+    Jobs and items are persisted before any work starts and item results are
+    written through as they complete, so job state survives restarts and is
+    visible from every API process; jobs whose owner stopped heartbeating are
+    resumed from their pending items. Jobs owned by this process also keep
+    live state in memory, indexed by job ID.
+    """
+
+    def __init__(self, tts_service):
+        """Initialize the batch engine on top of the TTS service's workers"""
+        self.tts_service = tts_service
+        self.output_dir = AUDIO_OUTPUT_DIR
+
+        # Jobs owned by this process (job_id -> asyncio task)
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+        # Live state of the jobs owned by this process (job_id -> state)
+        self.jobs: Dict[str, Dict] = {}
+
+        # Audio-seconds reserved at admission of jobs not queued yet (job_id -> model_id -> seconds)
+        self.admitted: Dict[str, Dict[str, float]] = {}
+
+        # Work queue actor per model and the feeder task per replica
+        self.queues: Dict[str, object] = {}
+        self.feeders: Dict[tuple, asyncio.Task] = {}
+
+        # Per-feeder signal that new micro-batches were queued for its model
+        self.work_available: Dict[tuple, asyncio.Event] = {}
+
+        # Micro-batch IDs, unique within this process
+        self._batch_ids = itertools.count()
+
+        # Outstanding batch calls per replica ((model_id, index) -> count)
+        self.replica_calls: Dict[tuple, int] = {}
+
+        # Replica slots batch and background work may use; the rest is reserved for
+        # interactive traffic (INTERACTIVE_RESERVED_SHARE), whose calls also overtake
+        # batch work inside the worker at micro-batch boundaries
+        self.batch_slots = batch_slots_per_replica(BATCH_MAX_IN_FLIGHT_PER_WORKER, INTERACTIVE_RESERVED_SHARE)
+
+        # Periodic scan for jobs to resume
+        self.resume_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start resuming orphaned jobs periodically on the running event loop"""
+        if self.resume_task is None or self.resume_task.done():
+            self.resume_task = asyncio.get_running_loop().create_task(self._resume_periodically())
+
+    async def stop(self) -> None:
+        """Stop resuming orphaned jobs"""
+        if self.resume_task is not None:
+            self.resume_task.cancel()
+            await asyncio.gather(self.resume_task, return_exceptions=True)
+
+    async def _resume_periodically(self) -> None:
+        """Resume orphaned jobs every BATCH_JOB_RESUME_INTERVAL_SECONDS"""
+        while True:
+            resumed = await self.resume_unfinished_jobs()
+            if resumed:
+                logger.info(f"Resumed {resumed} interrupted batch jobs")
+            await asyncio.sleep(BATCH_JOB_RESUME_INTERVAL_SECONDS)
+
+    async def submit(self, request: BatchTTSRequest, db: AsyncSession) -> str:
+        """Persist a batch job and start processing it
+
+        Jobs are admitted against the per-job and per-model audio-seconds
+        limits of the service's AdmissionController, or AdmissionRejected is
+        raised. The reservation is held until the job's micro-batches are
+        reserved on their own, as they are queued.
+        """
+        if request.priority == Priority.INTERACTIVE:
+            raise ValueError("Batch jobs must use the 'batch' or 'background' priority class")
+
+        # Reject jobs that are too large or would overflow a model's queue
+        audio_seconds_per_language: Dict[str, float] = {}
+        for item in request.items:
+            audio_seconds_per_language[item.language] = (
+                audio_seconds_per_language.get(item.language, 0.0) + estimate_audio_seconds(item.text)
+            )
+
+        audio_seconds: Dict[str, float] = {}
+        for language, seconds in audio_seconds_per_language.items():
+            model_id = await self.tts_service.router.route_async(db, language)
+            audio_seconds[model_id] = audio_seconds.get(model_id, 0.0) + seconds
+
+        self.tts_service.admission.admit_batch(audio_seconds)
+
+        try:
+            job_id = await async_db_service.create_batch_job(db, request)
+        except Exception:
+            self._release_admission(audio_seconds)
+            raise
+
+        if await async_db_service.claim_batch_job(db, job_id, BATCH_JOB_STALE_SECONDS):
+            # The admission reservation is held until the job's micro-batches are reserved
+            self.admitted[job_id] = audio_seconds
+            self._start(job_id)
+        else:
+            self._release_admission(audio_seconds)
+
+        return job_id
+
+    def _release_admission(self, audio_seconds: Dict[str, float]) -> None:
+        """Release the audio-seconds reserved when a job was admitted"""
+        for model_id, seconds in audio_seconds.items():
+            self.tts_service.admission.release(model_id, seconds, requests=0)
+
+    async def resume_unfinished_jobs(self) -> int:
+        """Resume batch jobs that were interrupted, e.g. by an API restart or a failure
+
+        Resumed jobs are admitted like submitted ones, for the audio-seconds of
+        their pending items. A job that doesn't fit is left unclaimed and
+        picked up by a later scan.
+        """
+        db = SessionLocal()
+        resumed = 0
+
+        try:
+            job_ids = await asyncio.to_thread(
+                db_service.get_resumable_batch_jobs, db, BATCH_JOB_STALE_SECONDS
+            )
+
+            for job_id in job_ids:
+                if job_id in self.tasks:
+                    continue
+
+                audio_seconds = await asyncio.to_thread(self._pending_audio_seconds, db, job_id)
+                try:
+                    self.tts_service.admission.admit_batch(audio_seconds)
+                except AdmissionRejected as e:
+                    logger.info(f"Not resuming batch job {job_id} yet: {str(e)}")
+                    continue
+
+                claimed = await asyncio.to_thread(
+                    db_service.claim_batch_job, db, job_id, BATCH_JOB_STALE_SECONDS
+                )
+                if claimed:
+                    logger.info(f"Resuming batch job {job_id}")
+                    self.admitted[job_id] = audio_seconds
+                    self._start(job_id)
+                    resumed += 1
+                else:
+                    self._release_admission(audio_seconds)
+
+        except Exception as e:
+            logger.error(f"Error resuming batch jobs: {str(e)}")
+
+        finally:
+            db.close()
+
+        return resumed
+
+    def _pending_audio_seconds(self, db: Session, job_id: str) -> Dict[str, float]:
+        """Estimate the audio-seconds of a job's pending items per model they route to"""
+        audio_seconds: Dict[str, float] = {}
+        for item in db_service.get_pending_batch_job_items(db, job_id):
+            model_id = self.tts_service.router.route(db, item["language"])
+            audio_seconds[model_id] = audio_seconds.get(model_id, 0.0) + estimate_audio_seconds(item["text"])
+
+        return audio_seconds
+
+    async def get_status(
+        self,
+        job_id: str,
+        db: AsyncSession,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        summary: bool = False
+    ) -> BatchTTSJobStatus:
+        """Get the status of a batch job with a page of its items
+
+        Results are written through to the database before the live state
+        is updated, so the status is always read from the database; a job
+        this process is running adds its estimated remaining time.
+        """
+        job_status = await async_db_service.get_batch_job_status(
+            db, job_id, after=after, limit=limit, summary=summary
+        )
+
+        if job_status is None:
+            raise ValueError(f"Batch job {job_id} not found")
+
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job_status.estimated_seconds_remaining = self._estimate_remaining(job)
+
+        return job_status
+
+    def _load_job_state(self, db: Session, job_id: str) -> Dict:
+        """Build the in-memory state of a job from its persisted status"""
+        job_status = db_service.get_batch_job_status(db, job_id, include_items=False)
+
+        return {
+            "job_id": job_id,
+            "status": "processing",
+            "total_items": job_status.total_items,
+            "completed_items": job_status.completed_items,
+            "failed_items": job_status.failed_items,
+            "deduplicated_items": job_status.deduplicated_items,
+            "priority": job_status.priority.value,
+            "weight": job_status.weight
+        }
+
+    def _estimate_remaining(self, job: Dict) -> Optional[float]:
+        """Predicted seconds until a job's outstanding micro-batches are done
+
+        Used as the ETA in the job status.
+        """
+        if "costs" not in job:
+            return None
+
+        costs: Dict[str, float] = {}
+        for model_id, cost in job["costs"].values():
+            costs[model_id] = costs.get(model_id, 0.0) + cost
+
+        # The models run in parallel, each spreading its work over its replicas
+        return round(max(
+            (cost / max(len(self.tts_service.workers.get(model_id, [])), 1) for model_id, cost in costs.items()),
+            default=0.0
+        ), 1)
+
+    def _record_result(self, job: Dict, result: Dict) -> None:
+        """Apply a finished item to the live job state"""
+        if result["status"] == "completed":
+            job["completed_items"] += 1
+        else:
+            job["failed_items"] += 1
+
+        if result.get("deduplicated"):
+            job["deduplicated_items"] += 1
+
+        if job["completed_items"] + job["failed_items"] == job["total_items"]:
+            job["status"] = "failed" if job["failed_items"] == job["total_items"] else "completed"
+
+    def _start(self, job_id: str) -> None:
+        """Start processing a claimed job in the background"""
+        self.tasks[job_id] = asyncio.get_running_loop().create_task(self._run_job(job_id))
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Periodically mark a job as alive so other processes don't resume it"""
+        db = SessionLocal()
+
+        try:
+            while True:
+                await asyncio.sleep(BATCH_JOB_HEARTBEAT_SECONDS)
+                await asyncio.to_thread(db_service.touch_batch_job, db, job_id)
+
+        except asyncio.CancelledError:
+            pass
+
+        except Exception as e:
+            logger.warning(f"Heartbeat for batch job {job_id} failed: {str(e)}")
+
+        finally:
+            db.close()
+
+    async def _run_job(self, job_id: str) -> None:
+        """Process the pending items of a job and write results through to the database
+
+        Every queued micro-batch carries the processing time predicted by the
+        service's CostModel, which the work queue and the worker use to run
+        cheaper micro-batches first, and is accounted in the AdmissionController
+        until its results arrive.
+        """
+        db = SessionLocal()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+
+        try:
+            job = await asyncio.to_thread(self._load_job_state, db, job_id)
+            self.jobs[job_id] = job
+
+            items = await asyncio.to_thread(db_service.get_pending_batch_job_items, db, job_id)
+            await asyncio.to_thread(self._route_items, db, items)
+
+            # Reuse outputs of identical items from recently finished jobs
+            reused = await asyncio.to_thread(self._find_reusable_outputs, db, items)
+            if reused:
+                await asyncio.to_thread(self._write_results, db, job, reused)
+                reused_ids = {result["id"] for result in reused}
+                items = [item for item in items if item["id"] not in reused_ids]
+
+            backlogs, duplicates = await asyncio.to_thread(self._plan_micro_batches, items)
+
+            # Micro-batches of this job that are queued or running (batch_id -> micro-batch)
+            job["batches"] = {}
+            job["results"] = asyncio.Queue()
+
+            # Admission accounting of those micro-batches (batch_id -> (model_id, audio-seconds))
+            job["reserved"] = {}
+
+            # Predicted processing time of those micro-batches (batch_id -> (model_id, seconds))
+            job["costs"] = {}
+
+            for model_id, batches in backlogs.items():
+                queued = []
+                for batch in batches:
+                    batch_id = next(self._batch_ids)
+                    job["batches"][batch_id] = batch
+
+                    audio_seconds = sum(estimate_audio_seconds(item["text"]) for item, _ in batch)
+                    job["reserved"][batch_id] = (model_id, audio_seconds)
+                    self.tts_service.admission.reserve(model_id, audio_seconds, len(batch))
+
+                    cost = sum(
+                        self.tts_service.cost_model.predict(model_id, item["language"], item["text"])
+                        for item, _ in batch
+                    )
+                    job["costs"][batch_id] = (model_id, cost)
+
+                    queued.append({
+                        "job_id": job_id,
+                        "batch_id": batch_id,
+                        "priority": job["priority"],
+                        "cost": cost,
+                        "requests": [request for _, request in batch]
+                    })
+
+                await asyncio.to_thread(
+                    ray.get,
+                    self._get_queue(model_id).put.remote(
+                        job_id, queued, priority=job["priority"], weight=job["weight"]
+                    )
+                )
+                self._ensure_feeders(model_id)
+
+            # The micro-batches now hold their own reservations
+            self._release_admission(self.admitted.pop(job_id, {}))
+
+            # Collect results as the feeders deliver them
+            while job["batches"]:
+                batch_id, outputs = await job["results"].get()
+                delivered = [(batch_id, outputs)]
+                while not job["results"].empty():
+                    delivered.append(job["results"].get_nowait())
+
+                results = []
+                for batch_id, outputs in delivered:
+                    self._release(job, batch_id, outputs)
+                    for result in self._collect_results(job["batches"].pop(batch_id), outputs):
+                        results.append(result)
+                        results.extend(
+                            dict(result, id=duplicate["id"], deduplicated=True)
+                            for duplicate in duplicates.get(result["id"], [])
+                        )
+
+                await asyncio.to_thread(self._write_results, db, job, results)
+
+            logger.info(
+                f"Batch job {job_id} {job['status']}: "
+                f"{job['completed_items']} completed, {job['failed_items']} failed"
+            )
+
+        except Exception as e:
+            # Leave the job in "processing"; the periodic scan resumes it once its heartbeat goes stale
+            logger.error(f"Error processing batch job {job_id}: {str(e)}")
+            for queue in self.queues.values():
+                queue.cancel_job.remote(job_id)
+
+        finally:
+            heartbeat.cancel()
+            db.close()
+            self._release_admission(self.admitted.pop(job_id, {}))
+
+            # Stop accounting for micro-batches that will not be collected
+            job = self.jobs.pop(job_id, None)
+            for batch_id in list((job or {}).get("reserved", {})):
+                self._release(job, batch_id)
+
+            self.tasks.pop(job_id, None)
+
+    def _release(self, job: Dict, batch_id: int, outputs: Optional[List[Dict]] = None) -> None:
+        """Release a micro-batch's admission reservation and learn from its outputs"""
+        job["costs"].pop(batch_id, None)
+        model_id, audio_seconds = job["reserved"].pop(batch_id)
+        admission = self.tts_service.admission
+        admission.release(model_id, audio_seconds, len(job["batches"][batch_id]))
+
+        for output in outputs or []:
+            if output["status"] == "completed":
+                admission.observe(model_id, output["processing_time"], output["duration_seconds"])
+
+    def _find_reusable_outputs(self, db: Session, items: List[Dict]) -> List[Dict]:
+        """Build completed results for items whose output already exists from an identical item
+
+        Outputs of items with the same normalized text, language, avatar and
+        model that completed within BATCH_DEDUP_WINDOW_SECONDS are reused
+        without any synthesis.
+        """
+        if BATCH_DEDUP_WINDOW_SECONDS <= 0 or not items:
+            return []
+
+        outputs = db_service.find_recent_batch_outputs(db, items, BATCH_DEDUP_WINDOW_SECONDS)
+
+        results = []
+        for item in items:
+            key = (normalized_text_hash(item["text"], item["language"]), item["language"], item["avatar_id"], item["model"])
+            file_url = outputs.get(key)
+
+            # Only reuse outputs that are still on disk
+            if file_url and os.path.exists(os.path.join(self.output_dir, os.path.basename(file_url))):
+                results.append({
+                    "id": item["id"],
+                    "status": "completed",
+                    "file_url": file_url,
+                    "error": None,
+                    "model": item["model"],
+                    "deduplicated": True
+                })
+
+        return results
+
+    def _route_items(self, db: Session, items: List[Dict]) -> None:
+        """Set the model serving each item ("model"), routing every language once
+
+        Items are routed individually, so mixed-language jobs run on all their
+        models at once.
+        """
+        model_for_language: Dict[str, str] = {}
+
+        for item in items:
+            language = item["language"]
+            if language not in model_for_language:
+                model_id = self.tts_service._select_model_for_language(db, language)
+                model_id, _ = self.tts_service._get_replicas(model_id)
+                model_for_language[language] = model_id
+
+            item["model"] = model_for_language[language]
+
+    def _plan_micro_batches(self, items: List[Dict]):
+        """Group routed items by (model, language, avatar) and cut the groups into micro-batches
+
+        Items are sorted by length within a group, so every micro-batch holds
+        texts of similar length and costs are comparable between micro-batches.
+
+        Items identical to an earlier item (same normalized text in the same
+        group) are not scheduled; they are returned as duplicates of that item
+        instead.
+
+        Returns the micro-batches of each model and the duplicates (item ID ->
+        identical items). A micro-batch is a list of (item, worker request) pairs.
+        """
+        groups: Dict[tuple, List[Dict]] = {}
+        unique_items: Dict[tuple, Dict] = {}
+        duplicates: Dict[str, List[Dict]] = {}
+
+        for item in items:
+            language = item["language"]
+            avatar = item["avatar"] or {}
+            key = (item["model"], language, avatar.get("gender"), avatar.get("dialect"))
+
+            original = unique_items.setdefault(key + (normalize_text(item["text"], language),), item)
+            if original is not item:
+                duplicates.setdefault(original["id"], []).append(item)
+                continue
+
+            groups.setdefault(key, []).append(item)
+
+        backlogs: Dict[str, List] = {}
+        for (model_id, _, _, _), group in groups.items():
+            group.sort(key=lambda item: len(item["text"]))
+            for start in range(0, len(group), BATCH_MICRO_BATCH_SIZE):
+                backlogs.setdefault(model_id, []).append([
+                    (item, {
+                        "text": item["text"],
+                        "language": item["language"],
+                        "avatar": item["avatar"],
+                        "output_path": os.path.join(self.output_dir, self._output_filename(item))
+                    })
+                    for item in group[start:start + BATCH_MICRO_BATCH_SIZE]
+                ])
+
+        return backlogs, duplicates
+
+    def replica_load(self, model_id: str, index: int) -> int:
+        """Number of batch calls outstanding on a replica"""
+        return self.replica_calls.get((model_id, index), 0)
+
+    def _get_queue(self, model_id: str):
+        """Get (or create) the work queue actor of a model"""
+        if model_id not in self.queues:
+            self.queues[model_id] = WorkQueue.remote(model_id)
+
+        return self.queues[model_id]
+
+    def _ensure_feeders(self, model_id: str) -> None:
+        """Start a feeder for every replica of a model and wake them all up"""
+        for index in range(len(self.tts_service.workers.get(model_id, []))):
+            feeder = self.feeders.get((model_id, index))
+            if feeder is None or feeder.done():
+                self.work_available[(model_id, index)] = asyncio.Event()
+                self.feeders[(model_id, index)] = asyncio.create_task(self._feed_replica(model_id, index))
+
+            self.work_available[(model_id, index)].set()
+
+    async def _feed_replica(self, model_id: str, index: int) -> None:
+        """Pull micro-batches for one replica whenever it has free capacity
+
+        A replica takes at most batch_slots micro-batches at once, so job size
+        does not drive Ray scheduler load and fast replicas take over work that
+        slow ones have not started. The work queue serves batch before
+        background jobs and shares capacity between the jobs of a class by weight.
+        """
+        queue = self.queues[model_id]
+        work_available = self.work_available[(model_id, index)]
+
+        # Outstanding calls on this replica (object ref -> (micro-batch, worker))
+        in_flight: Dict = {}
+
+        # Micro-batches pulled from the queue but not dispatched yet
+        pulled: List[Dict] = []
+
+        try:
+            while True:
+                replicas = self.tts_service.workers.get(model_id)
+                if not replicas or index >= len(replicas):
+                    # The model (or this replica) was removed
+                    abandoned = [batch for batch, _ in in_flight.values()]
+                    in_flight.clear()
+                    await self._abandon_replica(model_id, abandoned)
+                    break
+
+                # Pull only as much work as the replica can start right away,
+                # leaving the reserved slots to interactive calls
+                if len(in_flight) < self.batch_slots:
+                    work_available.clear()
+                    pulled = await asyncio.to_thread(
+                        ray.get, queue.pull.remote(self.batch_slots - len(in_flight))
+                    )
+
+                    while pulled:
+                        batch = pulled[0]
+                        ref = replicas[index].generate_speech_batch.remote(
+                            batch["requests"], priority=batch["priority"], cost=batch["cost"]
+                        )
+                        in_flight[ref] = (batch, replicas[index])
+                        pulled.pop(0)
+
+                self.replica_calls[(model_id, index)] = len(in_flight)
+
+                if not in_flight:
+                    # Idle until new work is queued for this model
+                    await work_available.wait()
+                    continue
+
+                ready = await asyncio.to_thread(self._wait_ready, list(in_flight))
+                for ref in ready:
+                    batch, worker = in_flight.pop(ref)
+                    try:
+                        self._deliver(model_id, index, worker, batch, ref)
+                    except Exception as e:
+                        logger.error(f"Error delivering batch {batch['batch_id']}: {str(e)}")
+                        self._fail_batch(batch, str(e))
+
+                self.replica_calls[(model_id, index)] = len(in_flight)
+
+        except Exception as e:
+            logger.error(f"Feeder for {model_id}[{index}] stopped: {str(e)}")
+
+            # Nobody else will deliver these; fail them so their jobs don't wait forever
+            for batch in pulled + [batch for batch, _ in in_flight.values()]:
+                self._fail_batch(batch, f"Feeder for {model_id}[{index}] stopped: {str(e)}")
+
+        finally:
+            self.feeders.pop((model_id, index), None)
+            self.work_available.pop((model_id, index), None)
+            self.replica_calls.pop((model_id, index), None)
+
+    async def _abandon_replica(self, model_id: str, batches: List[Dict]) -> None:
+        """Hand off the micro-batches of a replica that was removed
+
+        The model's other replicas take them over. If the whole model is gone,
+        nothing will pull its queue any more, so the micro-batches still queued
+        there are failed along with these.
+        """
+        if self.tts_service.workers.get(model_id):
+            for batch in batches:
+                job = self.jobs.get(batch["job_id"])
+                if job is not None:
+                    await self._requeue(model_id, batch, job["weight"])
+            return
+
+        queue = self.queues.pop(model_id, None)
+        if queue is not None:
+            stats = await asyncio.to_thread(ray.get, queue.get_stats.remote())
+            if stats["queued_batches"]:
+                batches.extend(await asyncio.to_thread(ray.get, queue.pull.remote(stats["queued_batches"])))
+
+        for batch in batches:
+            self._fail_batch(batch, f"Model {model_id} was removed")
+
+    def _wait_ready(self, refs: List) -> List:
+        """Wait for the first result (up to one progress interval), then take all that are ready"""
+        ready, remaining = ray.wait(refs, num_returns=1, timeout=BATCH_PROGRESS_INTERVAL_SECONDS)
+
+        if ready and remaining:
+            more, _ = ray.wait(remaining, num_returns=len(remaining), timeout=0)
+            ready.extend(more)
+
+        return ready
+
+    def _fail_batch(self, batch: Dict, error: str) -> None:
+        """Report every item of a micro-batch as failed to the job that queued it"""
+        job = self.jobs.get(batch["job_id"])
+        if job is not None and "results" in job:
+            outputs = [{"status": "failed", "error": error}] * len(batch["requests"])
+            job["results"].put_nowait((batch["batch_id"], outputs))
+
+    def _deliver(self, model_id: str, index: int, worker, batch: Dict, ref) -> None:
+        """Hand a finished micro-batch call to the job that queued it"""
+        job = self.jobs.get(batch["job_id"])
+
+        try:
+            # The ref is ready, so this does not block
+            outputs = ray.get(ref)
+
+        except ray.exceptions.RayActorError as e:
+            self.tts_service._replace_replica(model_id, index, worker)
+
+            # Requeue the micro-batch for the surviving (or replacement) replicas
+            batch["attempts"] = batch.get("attempts", 0) + 1
+            if job is not None and batch["attempts"] <= BATCH_MAX_ACTOR_RETRIES:
+                logger.warning(f"Worker {model_id}[{index}] died, requeueing batch {batch['batch_id']}: {str(e)}")
+                asyncio.get_running_loop().create_task(self._requeue(model_id, batch, job["weight"]))
+                return
+
+            logger.error(f"Error processing batch of {len(batch['requests'])} items: {str(e)}")
+            outputs = [{"status": "failed", "error": str(e)}] * len(batch["requests"])
+
+        except Exception as e:
+            # The whole call failed
+            logger.error(f"Error processing batch of {len(batch['requests'])} items: {str(e)}")
+            outputs = [{"status": "failed", "error": str(e)}] * len(batch["requests"])
+
+        if job is not None and "results" in job:
+            job["results"].put_nowait((batch["batch_id"], outputs))
+
+    async def _requeue(self, model_id: str, batch: Dict, weight: float) -> None:
+        """Put a micro-batch back on its model's work queue and wake the feeders"""
+        await asyncio.to_thread(
+            ray.get,
+            self._get_queue(model_id).put.remote(batch["job_id"], [batch], priority=batch["priority"], weight=weight)
+        )
+        self._ensure_feeders(model_id)
+
+    def _output_filename(self, item: Dict) -> str:
+        """Build the output file name for a batch item"""
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        avatar = item["avatar"]
+        gender = avatar["gender"] if avatar else "default"
+        dialect = avatar["dialect"] if avatar and avatar.get("dialect") else item["language"]
+        return f"{item['id']}_{gender}_{dialect}_{timestamp}.mp3"
+
+    def _collect_results(self, batch: List, outputs: List[Dict]) -> List[Dict]:
+        """Turn the outputs of a micro-batch call into item statuses"""
+        results = []
+        for (item, request), output in zip(batch, outputs):
+            completed = output["status"] == "completed"
+            results.append({
+                "id": item["id"],
+                "status": output["status"],
+                "file_url": f"/audio-output/{os.path.basename(request['output_path'])}" if completed else None,
+                "error": output["error"],
+                "model": item["model"]
+            })
+
+        return results
+
+    def _write_results(self, db: Session, job: Dict, results: List[Dict]) -> None:
+        """Write finished items through to the database and the live job state"""
+        db_service.update_batch_job_items(db, job["job_id"], results)
+        for result in results:
+            self._record_result(job, result)
@@ -0,0 +1,182 @@
+import time
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+# Database imports
+from src.core.db_models import Language, LanguageDialect, Avatar, TTSModel, CatalogVersion
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Import centralized configuration
+from src.config import CATALOG_CHECK_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class ReferenceCatalog:
+    """Process-local copy of the languages, dialects, avatars and models tables
+
+    The tables change rarely, so they are loaded once with eager joins and
+    served from memory with O(1) id lookups. Triggers bump
+    catalog_version.version on every change (see database/init.sql); the
+    version is compared at most every CATALOG_CHECK_SECONDS and the catalog
+    reloaded when it moved. If the database is unreachable the last loaded
+    catalog keeps being served.
+    """
+
+    def __init__(self):
+        """Initialize an empty catalog"""
+        self._lock = threading.Lock()
+
+        self.version: Optional[int] = None
+        self.checked_at = 0.0
+
+        # Strong validator of the loaded content, used as the HTTP ETag of the catalog endpoints
+        self.etag: Optional[str] = None
+
+        self.languages: List[Dict] = []
+        self.avatars: List[Dict] = []
+        self.models: List[Dict] = []
+
+        # (gender, dialect code or None) -> avatar id; None matches the gender's first avatar
+        self.avatar_ids: Dict[tuple, int] = {}
+        # (gender, language code) -> avatar id
+        self.avatar_ids_by_language: Dict[tuple, int] = {}
+        # Hugging Face model ID -> tts_models.id
+        self.model_ids: Dict[str, int] = {}
+
+    def _statements(self):
+        """Queries loading every table of the catalog with its relationships"""
+        return (
+            select(Language).options(selectinload(Language.dialects)).order_by(Language.id),
+            select(Avatar).options(selectinload(Avatar.dialect).selectinload(LanguageDialect.language)).order_by(Avatar.id),
+            select(TTSModel).options(selectinload(TTSModel.languages)).order_by(TTSModel.id)
+        )
+
+    def _version_statement(self):
+        """Query reading the current catalog version"""
+        return select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+    def _is_due(self) -> bool:
+        """Whether the version should be checked again"""
+        return time.time() - self.checked_at >= CATALOG_CHECK_SECONDS
+
+    def ensure_fresh(self, db: Session) -> None:
+        """Reload the catalog if the database version changed since it was loaded"""
+        if not self._is_due():
+            return
+
+        try:
+            try:
+                version = db.execute(self._version_statement()).scalar()
+            except Exception:
+                # Database without the catalog_version table; reload on every check
+                db.rollback()
+                version = None
+
+            if version is None or version != self.version:
+                results = [db.execute(statement).scalars().all() for statement in self._statements()]
+                self._apply(version, *results)
+
+        except Exception as e:
+            logger.warning(f"Failed to refresh reference catalog: {str(e)}")
+
+        self.checked_at = time.time()
+
+    async def ensure_fresh_async(self, db: AsyncSession) -> None:
+        """Reload the catalog on an async session if the database version changed"""
+        if not self._is_due():
+            return
+
+        try:
+            try:
+                version = (await db.execute(self._version_statement())).scalar()
+            except Exception:
+                # Database without the catalog_version table; reload on every check
+                await db.rollback()
+                version = None
+
+            if version is None or version != self.version:
+                results = [(await db.execute(statement)).scalars().all() for statement in self._statements()]
+                self._apply(version, *results)
+
+        except Exception as e:
+            logger.warning(f"Failed to refresh reference catalog: {str(e)}")
+
+        self.checked_at = time.time()
+
+    def invalidate(self) -> None:
+        """Check the version on the next access, e.g. right after changing reference data"""
+        self.checked_at = 0.0
+
+    def _apply(self, version: Optional[int], languages, avatars, models) -> None:
+        """Install freshly loaded rows"""
+        avatar_ids: Dict[tuple, int] = {}
+        avatar_ids_by_language: Dict[tuple, int] = {}
+        for avatar in avatars:
+            dialect = avatar.dialect
+            avatar_ids.setdefault((avatar.gender, dialect.code if dialect else None), avatar.id)
+            avatar_ids.setdefault((avatar.gender, None), avatar.id)
+            if dialect:
+                avatar_ids_by_language.setdefault((avatar.gender, dialect.language.code), avatar.id)
+
+        language_dicts = [language.to_dict() for language in languages]
+        avatar_dicts = [avatar.to_dict() for avatar in avatars]
+        model_dicts = [model.to_dict() for model in models]
+        digest = hashlib.sha256(
+            json.dumps([language_dicts, avatar_dicts, model_dicts], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+        with self._lock:
+            self.languages = language_dicts
+            self.avatars = avatar_dicts
+            self.models = model_dicts
+            self.avatar_ids = avatar_ids
+            self.avatar_ids_by_language = avatar_ids_by_language
+            self.model_ids = {model.model_id: model.id for model in models}
+            self.version = version
+            self.etag = f'"{digest[:32]}"'
+
+        logger.info(f"Loaded reference catalog version {version}")
+
+    def get_languages(self) -> List[Dict]:
+        """All languages with their dialects"""
+        return self.languages
+
+    def get_avatars(self) -> List[Dict]:
+        """All avatars"""
+        return self.avatars
+
+    def get_models(self) -> List[Dict]:
+        """All TTS models with their languages"""
+        return self.models
+
+    def language_codes(self) -> set:
+        """Codes of all languages"""
+        return {language["code"] for language in self.languages}
+
+    def avatar_id(self, gender: Optional[str], dialect: Optional[str] = None,
+                  language: Optional[str] = None) -> Optional[int]:
+        """Database ID of the avatar matching a gender and dialect
+
+        Without a dialect the first avatar of the gender for the language is
+        used, if a language is given, else the first avatar of the gender.
+        """
+        if not gender:
+            return None
+        if dialect:
+            return self.avatar_ids.get((gender, dialect))
+        if language:
+            return self.avatar_ids_by_language.get((gender, language))
+        return self.avatar_ids.get((gender, None))
+
+    def model_id(self, model_id: Optional[str]) -> Optional[int]:
+        """Database ID of a model given its Hugging Face ID"""
+        return self.model_ids.get(model_id) if model_id else None
+
+# Create a singleton instance
+catalog = ReferenceCatalog()
@@ -0,0 +1,96 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+
+# Local imports
+from src.core.admission import estimate_audio_seconds
+from src.core.db_models import SessionLocal
+from src.core.db_service import db_service
+from sqlalchemy.orm import Session
+
+# Import centralized configuration
+from src.config import (
+    COST_MODEL_REFRESH_SECONDS, COST_MODEL_WINDOW_SECONDS, COST_MODEL_MIN_SAMPLES,
+    ADMISSION_DEFAULT_REAL_TIME_FACTOR
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Lower bound of any estimate, so empty texts still have a cost
+MIN_COST_SECONDS = 0.05
+
+class CostModel:
+    """Estimates how long a model takes to synthesize a text
+
+    Processing time is modelled as intercept + slope * characters, fitted from
+    the recent history in tts_requests for every (model, language) with enough
+    samples, falling back to the model's fit across languages and finally to
+    the default real-time factor. The fits are refreshed by a background
+    task every COST_MODEL_REFRESH_SECONDS, so requests only call predict().
+    """
+
+    def __init__(self):
+        """Initialize an empty cost model"""
+        self._lock = threading.Lock()
+
+        # Fitted lines ((model_id, language or None) -> (intercept, slope, samples))
+        self.fits: Dict[tuple, tuple] = {}
+        self.refreshed_at = 0.0
+
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the periodic refresh on the running event loop"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic refresh"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        """Refit the model every COST_MODEL_REFRESH_SECONDS"""
+        while True:
+            await asyncio.to_thread(self.refresh)
+            await asyncio.sleep(COST_MODEL_REFRESH_SECONDS)
+
+    def refresh(self, db: Optional[Session] = None) -> int:
+        """Refit the model from the request history and return the number of fits"""
+        session = db or SessionLocal()
+
+        try:
+            fits = db_service.get_processing_time_fits(session, COST_MODEL_WINDOW_SECONDS, COST_MODEL_MIN_SAMPLES)
+
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Failed to refresh cost model: {str(e)}")
+            fits = None
+
+        finally:
+            if db is None:
+                session.close()
+
+        with self._lock:
+            # Keep the previous fits if the query failed, and retry after the next interval
+            if fits is not None:
+                # A negative slope is noise, not a real trend
+                self.fits = {key: fit for key, fit in fits.items() if fit[1] >= 0}
+            self.refreshed_at = time.time()
+            return len(self.fits)
+
+    def predict(self, model_id: str, language: Optional[str], text: str) -> float:
+        """Estimated processing seconds for a text"""
+        with self._lock:
+            fit = self.fits.get((model_id, language)) or self.fits.get((model_id, None))
+
+        if fit is None:
+            return max(estimate_audio_seconds(text) * ADMISSION_DEFAULT_REAL_TIME_FACTOR, MIN_COST_SECONDS)
+
+        intercept, slope, _ = fit
+        return max(intercept + slope * len(text), MIN_COST_SECONDS)
+
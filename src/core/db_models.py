@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Table, DateTime, Text, func, create_engine
+from sqlalchemy import Column, Integer, BigInteger, String, Float, ForeignKey, Boolean, Table, DateTime, Text, Computed, func, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, JSONB
 from sqlalchemy.sql import text
 import os
 from datetime import datetime
@@ -14,6 +15,10 @@ DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://cursor_admin:xh7Gt5p9JQk2
 # Create SQLAlchemy engine
 engine = create_engine(DATABASE_URL)
 
+# Async engine (asyncpg) for the API request path; scripts keep using the sync engine
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
+
 # Create SQLAlchemy base
 Base = declarative_base()
 
@@ -109,6 +114,7 @@ class TTSModel(Base):
 class TTSRequest(Base):
     __tablename__ = 'tts_requests'
     
+    # Partitioned by created_at in the database, where the primary key is (id, created_at)
     id = Column(Integer, primary_key=True)
     text = Column(Text, nullable=False)
     language_code = Column(String(10), nullable=False)
@@ -118,6 +124,7 @@ class TTSRequest(Base):
     duration_seconds = Column(Float)
     processing_time = Column(Float)
     created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    text_search = Column(TSVECTOR, Computed("to_tsvector('simple', text)", persisted=True))
     
     # Relationships
     avatar = relationship("Avatar", back_populates="tts_requests")
@@ -144,6 +151,11 @@ class BatchJob(Base):
     total_items = Column(Integer, nullable=False)
     completed_items = Column(Integer, default=0, nullable=False)
     failed_items = Column(Integer, default=0, nullable=False)
+    deduplicated_items = Column(Integer, default=0, nullable=False)
+    priority = Column(String(20), default="batch", nullable=False)
+    weight = Column(Float, default=1.0, nullable=False)
+    # Incremented by every write of item results; items carry the version that last changed them
+    version = Column(BigInteger, default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
     
@@ -157,6 +169,9 @@ class BatchJob(Base):
             "total_items": self.total_items,
             "completed_items": self.completed_items,
             "failed_items": self.failed_items,
+            "deduplicated_items": self.deduplicated_items,
+            "priority": self.priority,
+            "weight": self.weight,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "items": [item.to_dict() for item in self.items]
@@ -165,15 +180,21 @@ class BatchJob(Base):
 class BatchJobItem(Base):
     __tablename__ = 'batch_job_items'
     
-    id = Column(String(100), nullable=False)
+    id = Column(String(100), nullable=False, primary_key=True)
     job_id = Column(String(100), ForeignKey('batch_jobs.id'), nullable=False, primary_key=True)
     text = Column(Text, nullable=False)
+    # MD5 of the normalized text; outputs are reused between items with the same hash
+    text_hash = Column(String(32))
     language_code = Column(String(10), nullable=False)
     avatar_id = Column(Integer, ForeignKey('avatars.id'))
     status = Column(String(20), nullable=False)
     file_url = Column(String(255))
     error = Column(Text)
+    # Model that produced the output; outputs are only reused for the same model
+    model_id = Column(Integer, ForeignKey('tts_models.id'))
+    version = Column(BigInteger, default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True))
     
     # Relationships
     job = relationship("BatchJob", back_populates="items")
@@ -190,6 +211,7 @@ class BatchJobItem(Base):
 class SystemStat(Base):
     __tablename__ = 'system_stats'
     
+    # Partitioned by timestamp in the database, where the primary key is (id, timestamp)
     id = Column(Integer, primary_key=True)
     total_nodes = Column(Integer, nullable=False)
     active_nodes = Column(Integer, nullable=False)
@@ -221,6 +243,36 @@ class SystemStat(Base):
             "timestamp": self.timestamp.isoformat() if self.timestamp else None
         }
 
+class CatalogVersion(Base):
+    __tablename__ = 'catalog_version'
+    
+    # Single row, bumped by triggers whenever reference data changes
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+
+class AudioPin(Base):
+    __tablename__ = 'audio_pins'
+    
+    # Pinned files are never recompressed or deleted by the audio lifecycle manager
+    filename = Column(String(255), primary_key=True)
+    created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+
+class AudioLifecycleCursor(Base):
+    __tablename__ = 'audio_lifecycle_cursors'
+    
+    name = Column(String(100), primary_key=True)
+    position = Column(JSONB, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
+
+class AudioLifecycleDeferred(Base):
+    __tablename__ = 'audio_lifecycle_deferred'
+    
+    # Files a lifecycle stage skipped because they were protected or could not be processed
+    stage = Column(String(20), primary_key=True)
+    filename = Column(String(255), primary_key=True)
+    file_path = Column(String(255))
+    deferred_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+
 # Create session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -232,6 +284,14 @@ def get_db():
     finally:
         db.close()
 
+# Create async session (objects stay usable after commit, since lazy loads are not possible)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Helper function to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Helper function to create random vector embeddings for models
 def create_random_embedding(dimension=384):
     """Create a random vector embedding for a model."""
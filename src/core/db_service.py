@@ -1,14 +1,18 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_, and_, insert, tuple_, select, update, values, column, case, cast, String, Integer, Text, Boolean
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import List, Dict, Optional, Any
 import datetime
 import uuid
+import os
 
 from src.core.db_models import (
     Language, LanguageDialect, Avatar, TTSModel, 
     TTSRequest, BatchJob, BatchJobItem, SystemStat,
-    create_random_embedding
+    AudioPin, AudioLifecycleCursor, AudioLifecycleDeferred, create_random_embedding
 )
+from src.core.catalog import catalog
+from src.core.text_frontend import normalized_text_hash
 from src.core.models import (
     LanguageInfo, AvatarInfo, ModelInfo, 
     BatchTTSRequest, BatchTTSItemStatus, BatchTTSJobStatus,
@@ -61,6 +65,44 @@ class DatabaseService:
         
         return tts_request
     
+    def bulk_log_tts_requests(self, db: Session, rows: List[Dict], commit: bool = True) -> int:
+        """Insert many TTS request log rows in one statement
+        
+        Rows name their model by model ID and their avatar by gender and
+        dialect ({"gender", "dialect"}); both are resolved to database IDs
+        through the reference catalog. "created_at" is an ISO timestamp. With
+        commit=False the caller commits, e.g. to write several calls atomically.
+        """
+        if not rows:
+            return 0
+        
+        catalog.ensure_fresh(db)
+        
+        def avatar_id(avatar: Optional[Dict]) -> Optional[int]:
+            if not avatar or not avatar.get("gender"):
+                return None
+            # Match gender and dialect, falling back to the first avatar of the gender
+            return catalog.avatar_id(avatar["gender"], avatar.get("dialect")) or catalog.avatar_id(avatar["gender"])
+        
+        db.execute(insert(TTSRequest), [
+            {
+                "text": row["text"],
+                "language_code": row["language_code"],
+                "avatar_id": avatar_id(row.get("avatar")),
+                "model_id": catalog.model_id(row.get("model")),
+                "file_path": row.get("file_path"),
+                "duration_seconds": row.get("duration_seconds"),
+                "processing_time": row.get("processing_time"),
+                "created_at": datetime.datetime.fromisoformat(row["created_at"])
+            }
+            for row in rows
+        ])
+        
+        if commit:
+            db.commit()
+        
+        return len(rows)
+    
     def create_batch_job(self, db: Session, batch_request: BatchTTSRequest) -> str:
         """Create a new batch job"""
         job_id = f"batch_{uuid.uuid4().hex}"
@@ -70,43 +112,25 @@ class DatabaseService:
             status="submitted",
             total_items=len(batch_request.items),
             completed_items=0,
-            failed_items=0
+            failed_items=0,
+            priority=batch_request.priority.value,
+            weight=batch_request.weight
         )
         
         db.add(batch_job)
         
-        # Create items for the batch job
+        # Create items for the batch job, resolving avatars from the reference catalog
+        catalog.ensure_fresh(db)
         for item in batch_request.items:
-            # Get avatar ID if available
-            avatar_id = None
-            if item.avatar:
-                avatar_query = db.query(Avatar).join(LanguageDialect)
-                avatar_query = avatar_query.filter(
-                    Avatar.gender == item.avatar.gender
-                )
-                
-                if item.avatar.dialect:
-                    avatar_query = avatar_query.filter(
-                        LanguageDialect.code == item.avatar.dialect
-                    )
-                else:
-                    # Try to find an avatar with matching language
-                    avatar_query = avatar_query.filter(
-                        LanguageDialect.language_id == db.query(Language.id).filter(
-                            Language.code == item.language
-                        ).scalar_subquery()
-                    )
-                
-                avatar = avatar_query.first()
-                if avatar:
-                    avatar_id = avatar.id
-            
             batch_item = BatchJobItem(
                 id=item.id,
                 job_id=job_id,
                 text=item.text,
+                text_hash=normalized_text_hash(item.text, item.language),
                 language_code=item.language,
-                avatar_id=avatar_id,
+                avatar_id=catalog.avatar_id(
+                    item.avatar.gender, item.avatar.dialect, item.language
+                ) if item.avatar else None,
                 status="pending",
                 file_url=None,
                 error=None
@@ -125,46 +149,121 @@ class DatabaseService:
         item_id: str, 
         status: str, 
         file_url: Optional[str] = None,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        deduplicated: bool = False
     ) -> None:
-        """Update the status of a batch job item"""
-        # Get the item
-        item = db.query(BatchJobItem).filter(
-            BatchJobItem.job_id == job_id,
-            BatchJobItem.id == item_id
-        ).first()
-        
-        if not item:
-            return
-        
-        # Update the item
-        item.status = status
-        item.file_url = file_url
-        item.error = error
+        """Update the status of a batch job item
         
-        # Update the job status
-        job = db.query(BatchJob).filter(BatchJob.id == job_id).first()
+        ``deduplicated`` marks an item whose output was reused from an identical item.
+        """
+        self.update_batch_job_items(db, job_id, [{
+            "id": item_id,
+            "status": status,
+            "file_url": file_url,
+            "error": error,
+            "deduplicated": deduplicated
+        }])
+    
+    def update_batch_job_items(
+        self, 
+        db: Session, 
+        job_id: str, 
+        results: List[Dict], 
+        chunk_size: int = 500
+    ) -> int:
+        """Apply finished items to a batch job in bulk
         
-        if status == "completed":
-            job.completed_items += 1
-        elif status == "failed":
-            job.failed_items += 1
-        
-        # Check if all items are processed
-        if job.completed_items + job.failed_items == job.total_items:
-            if job.failed_items == job.total_items:
-                job.status = "failed"
-            else:
-                job.status = "completed"
-        else:
-            job.status = "processing"
+        Each result has the item "id", "status", "file_url", "error" and
+        optionally "deduplicated" and the "model" (model ID) that produced
+        the output. Every chunk is one UPDATE ... FROM (VALUES ...)
+        of the items plus one update of the job counters, incremented in SQL so
+        concurrent writers cannot lose counts. Items that already finished are
+        left alone. The items changed by a chunk get the job's next version,
+        which status deltas are read from. Returns the number of items updated.
+        """
+        updated = 0
+        catalog.ensure_fresh(db)
         
-        job.updated_at = datetime.datetime.now()
+        for start in range(0, len(results), chunk_size):
+            rows = values(
+                column("id", String),
+                column("status", String),
+                column("file_url", String),
+                column("error", Text),
+                column("model_id", Integer),
+                column("deduplicated", Boolean),
+                name="results"
+            ).data([
+                (
+                    result["id"],
+                    result["status"],
+                    result["file_url"],
+                    result["error"],
+                    catalog.model_id(result["model"]) if result.get("model") else None,
+                    bool(result.get("deduplicated"))
+                )
+                for result in results[start:start + chunk_size]
+            ])
+            
+            finished = db.execute(
+                update(BatchJobItem)
+                .where(
+                    BatchJobItem.job_id == job_id,
+                    BatchJobItem.id == rows.c.id,
+                    BatchJobItem.status.notin_(("completed", "failed"))
+                )
+                .values(
+                    status=rows.c.status,
+                    file_url=rows.c.file_url,
+                    error=rows.c.error,
+                    # A VALUES column that is NULL in every row is typed as text
+                    model_id=cast(rows.c.model_id, Integer),
+                    completed_at=case((rows.c.status == "completed", func.now()), else_=None),
+                    version=select(BatchJob.version + 1).where(BatchJob.id == job_id).scalar_subquery()
+                )
+                .returning(rows.c.status, rows.c.deduplicated)
+                .execution_options(synchronize_session=False)
+            ).all()
+            
+            if not finished:
+                continue
+            
+            completed = sum(1 for row in finished if row.status == "completed")
+            failed = sum(1 for row in finished if row.status == "failed")
+            deduplicated = sum(1 for row in finished if row.deduplicated)
+            
+            # The right-hand sides see the counters before this update
+            done = BatchJob.completed_items + BatchJob.failed_items + completed + failed
+            db.query(BatchJob).filter(BatchJob.id == job_id).update(
+                {
+                    BatchJob.completed_items: BatchJob.completed_items + completed,
+                    BatchJob.failed_items: BatchJob.failed_items + failed,
+                    BatchJob.deduplicated_items: BatchJob.deduplicated_items + deduplicated,
+                    BatchJob.version: BatchJob.version + 1,
+                    BatchJob.status: case(
+                        (
+                            done >= BatchJob.total_items,
+                            case((BatchJob.failed_items + failed >= BatchJob.total_items, "failed"), else_="completed")
+                        ),
+                        else_="processing"
+                    ),
+                    BatchJob.updated_at: func.now()
+                },
+                synchronize_session=False
+            )
+            db.commit()
+            
+            updated += len(finished)
         
-        db.commit()
+        return updated
     
-    def get_batch_job_status(self, db: Session, job_id: str) -> Optional[BatchTTSJobStatus]:
-        """Get the status of a batch job"""
+    def get_batch_job_status(
+        self, 
+        db: Session, 
+        job_id: str, 
+        include_items: bool = True
+    ) -> Optional[BatchTTSJobStatus]:
+        """Get the status of a batch job, without its items if include_items is False"""
         job = db.query(BatchJob).filter(BatchJob.id == job_id).first()
         
         if not job:
@@ -176,6 +275,9 @@ class DatabaseService:
             total_items=job.total_items,
             completed_items=job.completed_items,
             failed_items=job.failed_items,
+            deduplicated_items=job.deduplicated_items,
+            priority=job.priority,
+            weight=job.weight,
             items=[
                 BatchTTSItemStatus(
                     id=item.id,
@@ -183,10 +285,290 @@ class DatabaseService:
                     file_url=item.file_url,
                     error=item.error
                 )
-                for item in job.items
+                for item in (job.items if include_items else [])
             ]
         )
     
+    def claim_batch_job(self, db: Session, job_id: str, stale_after_seconds: float) -> bool:
+        """Atomically take ownership of a batch job that is new or whose owner stopped heartbeating"""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=stale_after_seconds)
+        
+        claimed = db.query(BatchJob).filter(
+            BatchJob.id == job_id,
+            or_(
+                BatchJob.status == "submitted",
+                and_(BatchJob.status == "processing", BatchJob.updated_at < cutoff)
+            )
+        ).update(
+            {BatchJob.status: "processing", BatchJob.updated_at: func.now()},
+            synchronize_session=False
+        )
+        db.commit()
+        
+        return claimed == 1
+    
+    def touch_batch_job(self, db: Session, job_id: str) -> None:
+        """Refresh the heartbeat of a batch job that is being processed"""
+        db.query(BatchJob).filter(
+            BatchJob.id == job_id,
+            BatchJob.status == "processing"
+        ).update({BatchJob.updated_at: func.now()}, synchronize_session=False)
+        db.commit()
+    
+    def get_resumable_batch_jobs(self, db: Session, stale_after_seconds: float) -> List[str]:
+        """Get IDs of unfinished batch jobs that no live process is working on"""
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=stale_after_seconds)
+        
+        jobs = db.query(BatchJob.id).filter(
+            BatchJob.status.in_(["submitted", "processing"]),
+            BatchJob.updated_at < cutoff
+        ).order_by(BatchJob.created_at).all()
+        
+        return [job.id for job in jobs]
+    
+    def get_pending_batch_job_items(self, db: Session, job_id: str) -> List[Dict]:
+        """Get the items of a batch job that still have to be processed"""
+        items = db.query(BatchJobItem).filter(
+            BatchJobItem.job_id == job_id,
+            BatchJobItem.status.in_(["pending", "processing"])
+        ).all()
+        
+        return [
+            {
+                "id": item.id,
+                "text": item.text,
+                "language": item.language_code,
+                "avatar_id": item.avatar_id,
+                "avatar": {
+                    "gender": item.avatar.gender,
+                    "dialect": item.avatar.dialect.code if item.avatar.dialect else None
+                } if item.avatar else None
+            }
+            for item in items
+        ]
+    
+    def find_recent_batch_outputs(
+        self, 
+        db: Session, 
+        items: List[Dict], 
+        max_age_seconds: float
+    ) -> Dict[tuple, str]:
+        """Find outputs of completed batch items identical to the given items
+        
+        Items are identical when their texts normalize the same. Items name the
+        model that would serve them ("model", a model ID); only outputs of that
+        same model match, and only outputs completed within the window. Returns
+        a mapping of (text hash, language_code, avatar_id, model) -> file_url,
+        newest output first.
+        """
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=max_age_seconds)
+        text_hashes = sorted({normalized_text_hash(item["text"], item["language"]) for item in items})
+        
+        # Database ID -> model ID of the models the items are routed to
+        catalog.ensure_fresh(db)
+        models = {catalog.model_id(item["model"]): item["model"] for item in items}
+        models.pop(None, None)
+        if not models:
+            return {}
+        
+        outputs = {}
+        for start in range(0, len(text_hashes), 1000):
+            rows = db.query(
+                BatchJobItem.text_hash,
+                BatchJobItem.language_code,
+                BatchJobItem.avatar_id,
+                BatchJobItem.model_id,
+                BatchJobItem.file_url
+            ).filter(
+                BatchJobItem.text_hash.in_(text_hashes[start:start + 1000]),
+                BatchJobItem.model_id.in_(list(models)),
+                BatchJobItem.status == "completed",
+                BatchJobItem.file_url.isnot(None),
+                BatchJobItem.completed_at >= cutoff
+            ).order_by(BatchJobItem.completed_at.desc()).all()
+            
+            for row in rows:
+                outputs.setdefault(
+                    (row.text_hash, row.language_code, row.avatar_id, models[row.model_id]), row.file_url
+                )
+        
+        return outputs
+    
+    def get_processing_time_fits(
+        self, 
+        db: Session, 
+        max_age_seconds: float, 
+        min_samples: int
+    ) -> Dict[tuple, tuple]:
+        """Fit processing time against text length from recent TTS requests
+        
+        The least-squares fit is computed by Postgres per (model, language) and
+        per model (language None). Returns a mapping of (model_id, language_code)
+        -> (intercept, seconds per character, sample count).
+        """
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=max_age_seconds)
+        characters = func.length(TTSRequest.text)
+        
+        fits = {}
+        for group_by in ([TTSModel.model_id, TTSRequest.language_code], [TTSModel.model_id]):
+            rows = db.query(
+                *group_by,
+                func.regr_intercept(TTSRequest.processing_time, characters).label("intercept"),
+                func.regr_slope(TTSRequest.processing_time, characters).label("slope"),
+                func.count(TTSRequest.id).label("samples")
+            ).join(
+                TTSModel, TTSRequest.model_id == TTSModel.id
+            ).filter(
+                TTSRequest.processing_time.isnot(None),
+                TTSRequest.created_at >= cutoff
+            ).group_by(*group_by).having(func.count(TTSRequest.id) >= min_samples).all()
+            
+            for row in rows:
+                if row.slope is not None and row.intercept is not None:
+                    language = row.language_code if len(group_by) > 1 else None
+                    fits[(row.model_id, language)] = (row.intercept, row.slope, row.samples)
+        
+        return fits
+    
+    def get_audio_references(
+        self, 
+        db: Session, 
+        source: str, 
+        after: Optional[Dict], 
+        created_before: datetime.datetime, 
+        limit: int
+    ) -> List[Dict]:
+        """Get the rows of a table that may reference an audio file, oldest first
+        
+        source is "tts_requests" or "batch_job_items" and after the position of
+        the last row already read. Returns dicts with the row "position", the
+        referenced "filename" (None if the row has no file) and its "file_path".
+        """
+        if source == "tts_requests":
+            key = (TTSRequest.created_at, TTSRequest.id)
+            query = db.query(*key, TTSRequest.file_path.label("reference"))
+        else:
+            key = (BatchJobItem.created_at, BatchJobItem.job_id, BatchJobItem.id)
+            query = db.query(*key, BatchJobItem.file_url.label("reference"))
+        
+        query = query.filter(key[0] < created_before)
+        if after:
+            position = (datetime.datetime.fromisoformat(after["created_at"]), *after["key"])
+            query = query.filter(tuple_(*key) > position)
+        
+        rows = query.order_by(*key).limit(limit).all()
+        
+        return [
+            {
+                "position": {"created_at": row.created_at.isoformat(), "key": list(row[1:len(key)])},
+                "filename": os.path.basename(row.reference) if row.reference else None,
+                "file_path": row.reference if source == "tts_requests" else None
+            }
+            for row in rows
+        ]
+    
+    def is_audio_file_protected(
+        self, 
+        db: Session, 
+        filename: str, 
+        file_path: Optional[str], 
+        referenced_since: datetime.datetime
+    ) -> bool:
+        """Whether an audio file must be left untouched by the lifecycle manager
+        
+        That is when it is pinned, an output of a batch job still running, or
+        referenced by a row created at or after referenced_since.
+        """
+        if db.query(AudioPin.filename).filter(AudioPin.filename == filename).first():
+            return True
+        
+        file_url = f"/audio-output/{filename}"
+        if db.query(BatchJobItem.id).join(BatchJob).filter(
+            BatchJobItem.file_url == file_url,
+            or_(
+                BatchJob.status.in_(("submitted", "processing")),
+                BatchJobItem.created_at >= referenced_since
+            )
+        ).first():
+            return True
+        
+        return file_path is not None and db.query(TTSRequest.id).filter(
+            TTSRequest.file_path == file_path,
+            TTSRequest.created_at >= referenced_since
+        ).first() is not None
+    
+    def replace_audio_file_references(
+        self, 
+        db: Session, 
+        filename: str, 
+        file_path: Optional[str], 
+        new_filename: Optional[str]
+    ) -> None:
+        """Point every reference to an audio file at its replacement
+        
+        The references are cleared if new_filename is None. The caller commits.
+        """
+        if file_path:
+            new_path = os.path.join(os.path.dirname(file_path), new_filename) if new_filename else None
+            db.query(TTSRequest).filter(TTSRequest.file_path == file_path).update(
+                {TTSRequest.file_path: new_path}, synchronize_session=False
+            )
+        
+        db.query(BatchJobItem).filter(BatchJobItem.file_url == f"/audio-output/{filename}").update(
+            {BatchJobItem.file_url: f"/audio-output/{new_filename}" if new_filename else None},
+            synchronize_session=False
+        )
+    
+    def get_audio_lifecycle_cursor(self, db: Session, name: str) -> Optional[Dict]:
+        """Get the persisted scan position of an audio lifecycle stage"""
+        cursor = db.get(AudioLifecycleCursor, name)
+        return cursor.position if cursor else None
+    
+    def set_audio_lifecycle_cursor(self, db: Session, name: str, position: Dict) -> None:
+        """Persist the scan position of an audio lifecycle stage (the caller commits)"""
+        db.execute(
+            pg_insert(AudioLifecycleCursor)
+            .values(name=name, position=position)
+            .on_conflict_do_update(
+                index_elements=[AudioLifecycleCursor.name],
+                set_={"position": position, "updated_at": func.now()}
+            )
+        )
+    
+    def defer_audio_file(self, db: Session, stage: str, filename: str, file_path: Optional[str]) -> None:
+        """Record a file an audio lifecycle stage has to retry (the caller commits)"""
+        db.execute(
+            pg_insert(AudioLifecycleDeferred)
+            .values(stage=stage, filename=filename, file_path=file_path)
+            .on_conflict_do_nothing()
+        )
+    
+    def get_deferred_audio_files(self, db: Session, stage: str) -> List[Dict]:
+        """Get the files an audio lifecycle stage has to retry, oldest first"""
+        rows = db.query(AudioLifecycleDeferred).filter(
+            AudioLifecycleDeferred.stage == stage
+        ).order_by(AudioLifecycleDeferred.deferred_at).all()
+        
+        return [{"filename": row.filename, "file_path": row.file_path} for row in rows]
+    
+    def clear_deferred_audio_file(self, db: Session, stage: str, filename: str) -> None:
+        """Forget a file an audio lifecycle stage no longer has to retry (the caller commits)"""
+        db.query(AudioLifecycleDeferred).filter(
+            AudioLifecycleDeferred.stage == stage,
+            AudioLifecycleDeferred.filename == filename
+        ).delete(synchronize_session=False)
+    
+    def pin_audio_file(self, db: Session, filename: str) -> None:
+        """Protect an audio file from recompression and deletion"""
+        db.execute(pg_insert(AudioPin).values(filename=filename).on_conflict_do_nothing())
+        db.commit()
+    
+    def unpin_audio_file(self, db: Session, filename: str) -> bool:
+        """Remove the protection of an audio file, returns False if it was not pinned"""
+        deleted = db.query(AudioPin).filter(AudioPin.filename == filename).delete(synchronize_session=False)
+        db.commit()
+        return deleted > 0
+    
     def log_system_stats(
         self, 
         db: Session, 
@@ -0,0 +1,33 @@
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+# Import centralized configuration
+from src.config import LATENCY_WINDOW_SIZE
+
+class LatencyTracker:
+    """Sliding window of recent worker call latencies per model"""
+
+    def __init__(self, window_size: int = LATENCY_WINDOW_SIZE):
+        """Initialize empty windows"""
+        self._lock = threading.Lock()
+        self.window_size = window_size
+
+        # Recent latencies in seconds (model_id -> deque)
+        self.samples: Dict[str, deque] = {}
+
+    def record(self, model_id: str, seconds: float) -> None:
+        """Record the latency of a finished call"""
+        with self._lock:
+            self.samples.setdefault(model_id, deque(maxlen=self.window_size)).append(seconds)
+
+    def percentile(self, model_id: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """Latency percentile of a model, or None without enough samples"""
+        with self._lock:
+            samples = sorted(self.samples.get(model_id, ()))
+
+        if len(samples) < max(min_samples, 1):
+            return None
+
+        index = min(int(len(samples) * percentile / 100), len(samples) - 1)
+        return samples[index]
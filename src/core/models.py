@@ -6,6 +6,12 @@ class Gender(str, Enum):
     MALE = "male"
     FEMALE = "female"
 
+class Priority(str, Enum):
+    """Scheduling class of a TTS request"""
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    BACKGROUND = "background"
+
 class Avatar(BaseModel):
     """Avatar model representing a voice type"""
     gender: Gender
@@ -24,6 +30,7 @@ class TTSRequest(BaseModel):
     text: str = Field(..., description="Text to convert to speech")
     language: str = Field(..., description="Language code (e.g., 'en', 'ar', 'es')")
     avatar: Optional[Avatar] = Field(None, description="Avatar selection for voice type")
+    model: Optional[str] = Field(None, description="Model to use instead of the automatically routed one")
     
     class Config:
         schema_extra = {
@@ -69,11 +76,19 @@ class TTSHistoryItem(BaseModel):
     duration_seconds: Optional[float] = Field(None, description="Duration of the audio in seconds")
     processing_time: Optional[float] = Field(None, description="Time taken to process the request")
     created_at: str = Field(..., description="Timestamp when the request was created")
+    score: Optional[float] = Field(None, description="Relevance of the item to a history search")
 
 class TTSHistoryResponse(BaseModel):
     """Response model for TTS history"""
-    total: int = Field(..., description="Total number of history items")
+    total: int = Field(..., description="Total number of history items (estimated for large histories)")
     items: List[TTSHistoryItem] = Field(..., description="List of TTS history items")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, None on the last page")
+
+class TTSHistorySearchResponse(BaseModel):
+    """Response model for a TTS history search"""
+    query: str = Field(..., description="Search query")
+    items: List[TTSHistoryItem] = Field(..., description="Matching TTS history items, most relevant first")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, None on the last page")
 
 class BatchTTSItem(BaseModel):
     """Individual item in a batch TTS request"""
@@ -85,6 +100,8 @@ class BatchTTSItem(BaseModel):
 class BatchTTSRequest(BaseModel):
     """Request model for batch text-to-speech generation"""
     items: List[BatchTTSItem] = Field(..., description="List of items to process")
+    priority: Priority = Field(Priority.BATCH, description="Scheduling class: 'batch' or 'background' (pre-warm)")
+    weight: float = Field(1.0, gt=0, description="Share of capacity relative to other jobs of the same class")
     
     class Config:
         schema_extra = {
@@ -120,7 +137,13 @@ class BatchTTSJobStatus(BaseModel):
     total_items: int
     completed_items: int
     failed_items: int
+    deduplicated_items: int = 0  # Items served from an identical item's output
+    priority: Priority = Priority.BATCH
+    weight: float = 1.0
+    estimated_seconds_remaining: Optional[float] = None  # Predicted time to finish, while running
     items: List[BatchTTSItemStatus]
+    next_cursor: Optional[str] = None  # Pass as cursor to get the next page of items, None on the last page
+    delta_cursor: Optional[str] = None  # Pass as since to get only the items that change after this status
 
 class ModelInfo(BaseModel):
     """Information about a TTS model"""
@@ -194,6 +217,17 @@ class GPUMetrics(BaseModel):
     temperature: Optional[float] = None
     power: Optional[float] = None
 
+class ModelQueueStatus(BaseModel):
+    """Queued work and estimated wait of a model"""
+    model_id: str
+    interactive_requests: int
+    batch_requests: int
+    queued_audio_seconds: float
+    interactive_wait_seconds: float
+    estimated_wait_seconds: float
+    replicas: int
+    real_time_factor: float
+
 class SystemStats(BaseModel):
     """Overall system statistics"""
     total_nodes: int
@@ -209,4 +243,5 @@ class SystemStats(BaseModel):
     jobs_pending: Optional[int] = 0
     jobs_running: Optional[int] = 0
     jobs_completed: Optional[int] = 0
-    jobs_failed: Optional[int] = 0 
\ No newline at end of file
+    jobs_failed: Optional[int] = 0
+    request_log: Optional[Dict[str, Any]] = None  # Write-behind request log state, incl. flush lag 
\ No newline at end of file
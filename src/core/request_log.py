@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Database imports
+from src.core.db_models import SessionLocal
+from src.core.db_service import db_service
+from sqlalchemy.exc import OperationalError, InterfaceError
+
+# Import centralized configuration
+from src.config import REQUEST_LOG_FLUSH_INTERVAL_MS, REQUEST_LOG_BATCH_SIZE, REQUEST_LOG_SPILL_PATH
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Rows replayed from the spill file per insert
+REPLAY_CHUNK_SIZE = 1000
+
+# Errors meaning the database is unavailable, as opposed to a row it will never accept
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+class RequestLogger:
+    """Write-behind logging of TTS requests with group commit
+
+    Requests are buffered in memory and inserted in bulk every
+    REQUEST_LOG_FLUSH_INTERVAL_MS, or as soon as REQUEST_LOG_BATCH_SIZE rows
+    are buffered, so /tts never waits for the database. When the database is
+    unavailable the rows are appended to REQUEST_LOG_SPILL_PATH and replayed
+    by later flushes, one committed chunk at a time. Rows the database
+    rejects (e.g. a created_at whose partition was dropped by the retention)
+    are moved to <REQUEST_LOG_SPILL_PATH>.dead instead of blocking the replay.
+
+    All methods except the flush itself run on the event loop.
+    """
+
+    def __init__(self):
+        """Initialize an empty buffer"""
+        self.buffer: List[Dict] = []
+
+        # Enqueue time (monotonic) of the oldest buffered row
+        self.oldest_buffered: Optional[float] = None
+
+        self.task: Optional[asyncio.Task] = None
+        self.batch_full: Optional[asyncio.Event] = None
+        self.stopping = False
+
+        # Track statistics
+        self.rows_written = 0
+        self.rows_spilled = 0
+        self.rows_dead_lettered = 0
+        self.last_flush_seconds = 0.0
+        self.last_error: Optional[str] = None
+
+    def log(self, text: str, language_code: str, model: Optional[str], avatar: Optional[Dict],
+            file_path: Optional[str], duration_seconds: Optional[float], processing_time: Optional[float]) -> None:
+        """Buffer a TTS request for the next flush"""
+        self._ensure_started()
+
+        if not self.buffer:
+            self.oldest_buffered = time.monotonic()
+
+        self.buffer.append({
+            "text": text,
+            "language_code": language_code,
+            "model": model,
+            "avatar": avatar,
+            "file_path": file_path,
+            "duration_seconds": duration_seconds,
+            "processing_time": processing_time,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
+
+        if len(self.buffer) >= REQUEST_LOG_BATCH_SIZE:
+            self.batch_full.set()
+
+    def _ensure_started(self) -> None:
+        """Start the flusher on the running event loop"""
+        if self.task is None or self.task.done():
+            self.batch_full = asyncio.Event()
+            self.stopping = False
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        """Flush the buffer periodically or whenever a batch is full, until stopped"""
+        try:
+            while not self.stopping:
+                try:
+                    await asyncio.wait_for(self.batch_full.wait(), REQUEST_LOG_FLUSH_INTERVAL_MS / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+                await self.flush()
+
+        except asyncio.CancelledError:
+            pass
+
+    async def flush(self) -> int:
+        """Write the buffered rows (and any spilled ones) to the database"""
+        self.batch_full.clear()
+
+        rows, self.buffer = self.buffer, []
+        self.oldest_buffered = None
+
+        if not rows and not self._spill_pending():
+            return 0
+
+        return await asyncio.to_thread(self._write, rows)
+
+    def _write(self, rows: List[Dict]) -> int:
+        """Insert rows in one transaction, spilling them to disk on failure (runs in a thread)"""
+        start_time = time.time()
+        db = SessionLocal()
+
+        try:
+            # Older spilled rows go first
+            replayed = self._replay(db)
+            if replayed:
+                logger.info(f"Replayed {replayed} spilled request log rows")
+
+            written = db_service.bulk_log_tts_requests(db, rows, commit=False)
+            db.commit()
+
+            self.rows_written += written
+            self.last_error = None
+            return written
+
+        except Exception as e:
+            db.rollback()
+            self.last_error = str(e)
+            logger.warning(f"Request log flush failed, spilling {len(rows)} rows: {str(e)}")
+            self._spill(rows)
+            return 0
+
+        finally:
+            db.close()
+            self.last_flush_seconds = time.time() - start_time
+
+    def _spill_pending(self) -> bool:
+        """Whether spilled rows are waiting to be replayed"""
+        return os.path.exists(REQUEST_LOG_SPILL_PATH) or os.path.exists(f"{REQUEST_LOG_SPILL_PATH}.replay")
+
+    def _spill(self, rows: List[Dict]) -> None:
+        """Append rows to the spill file"""
+        if not rows:
+            return
+
+        os.makedirs(os.path.dirname(REQUEST_LOG_SPILL_PATH), exist_ok=True)
+        with open(REQUEST_LOG_SPILL_PATH, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.rows_spilled += len(rows)
+
+    def _replay(self, db) -> int:
+        """Insert the spilled rows chunk by chunk and return how many were inserted
+
+        Every chunk is committed on its own and the rows left are written back
+        to the replay file, so a later replay continues where this one stopped.
+        A chunk the database rejects is retried row by row and the rejected rows
+        are dead-lettered. Raises if the database is unavailable.
+        """
+        # Rows are replayed from a file moved aside, so rows spilled meanwhile start a new file
+        replay_path = f"{REQUEST_LOG_SPILL_PATH}.replay"
+        if not os.path.exists(replay_path):
+            if not os.path.exists(REQUEST_LOG_SPILL_PATH):
+                return 0
+            os.replace(REQUEST_LOG_SPILL_PATH, replay_path)
+
+        rows = []
+        with open(replay_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as e:
+                    self._dead_letter(line.rstrip("\n"), f"Unreadable spilled row: {str(e)}")
+
+        done = 0
+        inserted = 0
+
+        try:
+            while done < len(rows):
+                chunk = rows[done:done + REPLAY_CHUNK_SIZE]
+
+                try:
+                    inserted += db_service.bulk_log_tts_requests(db, chunk, commit=False)
+                    db.commit()
+                    done += len(chunk)
+                    continue
+
+                except UNAVAILABLE_ERRORS:
+                    raise
+
+                except Exception:
+                    db.rollback()
+
+                # Some row of the chunk will never be accepted; find it
+                for row in chunk:
+                    try:
+                        inserted += db_service.bulk_log_tts_requests(db, [row], commit=False)
+                        db.commit()
+
+                    except UNAVAILABLE_ERRORS:
+                        raise
+
+                    except Exception as e:
+                        db.rollback()
+                        self._dead_letter(row, str(e))
+
+                    done += 1
+
+        finally:
+            self.rows_written += inserted
+            self._rewrite_replay(replay_path, rows[done:])
+
+        return inserted
+
+    def _rewrite_replay(self, replay_path: str, rows: List[Dict]) -> None:
+        """Replace the replay file with the rows still to be replayed"""
+        if not rows:
+            os.remove(replay_path)
+            return
+
+        tmp_path = f"{replay_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, replay_path)
+
+    def _dead_letter(self, row, error: str) -> None:
+        """Set aside a spilled row the database will not accept"""
+        logger.error(f"Dead-lettering request log row: {error}")
+
+        with open(f"{REQUEST_LOG_SPILL_PATH}.dead", "a") as f:
+            f.write(json.dumps({"row": row, "error": error}) + "\n")
+
+        self.rows_dead_lettered += 1
+
+    async def stop(self) -> None:
+        """Stop the flusher and write what is still buffered"""
+        if self.task is not None and not self.task.done():
+            # Wake the flusher and let it finish its flush; it exits afterwards
+            self.stopping = True
+            self.batch_full.set()
+            await self.task
+
+        if self.buffer:
+            await self.flush()
+
+    def get_stats(self) -> Dict:
+        """Get logging statistics, including the flush lag"""
+        return {
+            "buffered_rows": len(self.buffer),
+            "flush_lag_seconds": round(time.monotonic() - self.oldest_buffered, 3) if self.oldest_buffered else 0.0,
+            "last_flush_seconds": round(self.last_flush_seconds, 3),
+            "rows_written": self.rows_written,
+            "rows_spilled": self.rows_spilled,
+            "rows_dead_lettered": self.rows_dead_lettered,
+            "spill_pending": self._spill_pending(),
+            "last_error": self.last_error
+        }
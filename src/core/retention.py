@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+# Database imports
+from src.core.db_models import SessionLocal
+from sqlalchemy import text
+
+# Import centralized configuration
+from src.config import (
+    TTS_REQUESTS_RETENTION_DAYS, SYSTEM_STATS_RETENTION_DAYS, PARTITION_MAINTENANCE_INTERVAL_SECONDS
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Time-partitioned tables (table -> (partition unit, partitions created ahead, retention in days))
+PARTITIONED_TABLES = {
+    "tts_requests": ("month", 2, TTS_REQUESTS_RETENTION_DAYS),
+    "system_stats": ("day", 7, SYSTEM_STATS_RETENTION_DAYS)
+}
+
+# Advisory lock taken by the process running the maintenance
+MAINTENANCE_LOCK_KEY = 472001
+
+class PartitionMaintenance:
+    """Keeps the time-partitioned tables ready and within their retention
+
+    Every PARTITION_MAINTENANCE_INTERVAL_SECONDS the partitions of the coming
+    periods are created and the partitions past their table's retention are
+    dropped, using create_time_partitions() and drop_expired_partitions()
+    from database/init.sql. Dropping a partition frees its rows at once,
+    without the row deletes and vacuum a retention DELETE would need.
+    """
+
+    def __init__(self):
+        """Initialize the maintenance state"""
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the periodic maintenance on the running event loop"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic maintenance"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        """Run the maintenance every PARTITION_MAINTENANCE_INTERVAL_SECONDS"""
+        while True:
+            await asyncio.to_thread(self.run_once)
+            await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+    def run_once(self) -> Dict[str, Dict[str, int]]:
+        """Create upcoming partitions and drop expired ones
+
+        Only one API process maintains the partitions at a time; the others
+        return an empty result. Returns the partitions created and dropped per table.
+        """
+        db = SessionLocal()
+        results = {}
+
+        try:
+            if not db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar():
+                return results
+
+            for table, (unit, ahead, retention_days) in PARTITIONED_TABLES.items():
+                created = db.execute(
+                    text("SELECT create_time_partitions(:table, :unit, :ahead)"),
+                    {"table": table, "unit": unit, "ahead": ahead}
+                ).scalar()
+
+                dropped = 0
+                if retention_days > 0:
+                    dropped = db.execute(
+                        text("SELECT drop_expired_partitions(:table, make_interval(days => :days))"),
+                        {"table": table, "days": retention_days}
+                    ).scalar()
+
+                results[table] = {"created": created, "dropped": dropped}
+                if created or dropped:
+                    logger.info(f"Partitions of {table}: {created} created, {dropped} dropped")
+
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Partition maintenance failed: {str(e)}")
+            results = {}
+
+        finally:
+            db.close()
+
+        return results
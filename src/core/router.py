@@ -0,0 +1,169 @@
+import os
+import json
+import glob
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+# Local imports
+from src.core.catalog import catalog
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Import centralized configuration
+from src.config import (
+    MODEL_DIR, DEFAULT_MODELS, MODEL_QUALITY_TIERS, ROUTER_REFRESH_SECONDS, ROUTER_TIER_PENALTY
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Quality tier of models without a configured tier
+DEFAULT_QUALITY_TIER = 3
+
+class ModelRouter:
+    """Routes languages to TTS models
+
+    The routing table (language -> candidate models) is built from the
+    model languages in the reference catalog and the "languages" of every
+    model_info.json in MODEL_DIR. It is rebuilt every ROUTER_REFRESH_SECONDS and right after a
+    model is downloaded or deleted.
+
+    Candidates are ranked by expected completion time - observed median
+    latency (or the cost model's estimate) plus the estimated queue wait -
+    scaled up by ROUTER_TIER_PENALTY for every quality tier below the best.
+    Installed models are always preferred over models only known to the
+    database.
+    """
+
+    def __init__(self, latency, cost_model, admission):
+        """Initialize an empty router on top of the service's load signals"""
+        self.latency = latency
+        self.cost_model = cost_model
+        self.admission = admission
+
+        self._lock = threading.Lock()
+
+        # Candidate models per language (language -> {model_id: {"tier", "installed"}})
+        self.table: Dict[str, Dict[str, Dict]] = {}
+
+        # Every model known to the router (model_id -> {"tier", "installed"})
+        self.models: Dict[str, Dict] = {}
+        self.refreshed_at = 0.0
+
+    def invalidate(self) -> None:
+        """Rebuild the routing table on the next lookup"""
+        with self._lock:
+            self.refreshed_at = 0.0
+
+    def refresh(self, db: Session) -> None:
+        """Rebuild the routing table from the database and the model directory"""
+        catalog.ensure_fresh(db)
+        self._build(catalog.get_models())
+
+    async def refresh_async(self, db: AsyncSession) -> None:
+        """Rebuild the routing table on an async session"""
+        await catalog.ensure_fresh_async(db)
+        self._build(catalog.get_models())
+
+    def _build(self, db_models: List[Dict]) -> None:
+        """Build the routing table from the database models and the model directory"""
+        table: Dict[str, Dict[str, Dict]] = {}
+        models: Dict[str, Dict] = {}
+
+        def add(model_id: str, languages: List[str], installed: bool, tier: Optional[int] = None) -> None:
+            model = models.setdefault(model_id, {
+                "tier": MODEL_QUALITY_TIERS.get(model_id, DEFAULT_QUALITY_TIER),
+                "installed": False
+            })
+            model["installed"] = model["installed"] or installed
+            if tier is not None:
+                model["tier"] = tier
+
+            for language in languages:
+                table.setdefault(language, {})[model_id] = model
+
+        for model in db_models:
+            add(model["id"], model["languages"], installed=False)
+
+        for model_path in glob.glob(os.path.join(MODEL_DIR, "*")):
+            if not os.path.isdir(model_path):
+                continue
+
+            model_info = {}
+            info_path = os.path.join(model_path, "model_info.json")
+            if os.path.exists(info_path):
+                try:
+                    with open(info_path, 'r') as f:
+                        model_info = json.load(f)
+                except Exception:
+                    model_info = {}
+
+            model_id = os.path.basename(model_path).replace('--', '/')
+            add(model_id, model_info.get("languages", ["en"]), installed=True, tier=model_info.get("quality_tier"))
+
+        with self._lock:
+            self.table = table
+            self.models = models
+            self.refreshed_at = time.time()
+
+    def is_stale(self) -> bool:
+        """Whether the routing table is older than ROUTER_REFRESH_SECONDS"""
+        return time.time() - self.refreshed_at >= ROUTER_REFRESH_SECONDS
+
+    def route(self, db: Session, language: str, text: str = "", model_override: Optional[str] = None) -> str:
+        """Select the model for a request
+
+        Raises ValueError if the override is not a known model for the language.
+        """
+        if self.is_stale():
+            self.refresh(db)
+
+        return self.select(language, text, model_override)
+
+    async def route_async(self, db: AsyncSession, language: str, text: str = "",
+                          model_override: Optional[str] = None) -> str:
+        """Select the model for a request, refreshing the table on an async session"""
+        if self.is_stale():
+            await self.refresh_async(db)
+
+        return self.select(language, text, model_override)
+
+    def select(self, language: str, text: str = "", model_override: Optional[str] = None) -> str:
+        """Select the model for a request from the current routing table
+
+        Raises ValueError if the override is not a known model for the language.
+        """
+        with self._lock:
+            candidates = dict(self.table.get(language, {}))
+            known = model_override in self.models
+
+        if model_override:
+            if model_override in candidates:
+                return model_override
+            if known:
+                raise ValueError(f"Model {model_override} does not support language {language}")
+            raise ValueError(f"Model {model_override} is not available")
+
+        if not candidates:
+            # No model lists this language; multilingual default
+            return DEFAULT_MODELS[0]
+
+        best_tier = min(model["tier"] for model in candidates.values())
+        return min(
+            candidates,
+            key=lambda model_id: (
+                not candidates[model_id]["installed"],
+                self._score(model_id, language, text, candidates[model_id]["tier"] - best_tier)
+            )
+        )
+
+    def _score(self, model_id: str, language: str, text: str, tiers_below_best: int) -> float:
+        """Expected completion time of a request on a model, penalized by quality"""
+        service_time = self.latency.percentile(model_id, 50)
+        if service_time is None:
+            service_time = self.cost_model.predict(model_id, language, text)
+
+        expected = service_time + self.admission.estimated_wait(model_id, interactive=True)
+        return expected * (1 + ROUTER_TIER_PENALTY * tiers_below_best)
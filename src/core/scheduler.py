@@ -0,0 +1,152 @@
+import math
+import heapq
+import itertools
+import threading
+from typing import Dict, List
+
+# Local imports
+from src.core.models import Priority
+
+# Scheduling order of the priority classes (lower runs first)
+PRIORITY_RANK = {
+    Priority.INTERACTIVE: 0,
+    Priority.BATCH: 1,
+    Priority.BACKGROUND: 2
+}
+
+# Priority class of each rank
+RANK_PRIORITY = {rank: priority for priority, rank in PRIORITY_RANK.items()}
+
+def priority_rank(priority) -> int:
+    """Get the scheduling rank of a priority class (name or enum)"""
+    return PRIORITY_RANK[Priority(priority)]
+
+def batch_slots_per_replica(max_in_flight: int, interactive_share: float) -> int:
+    """Number of a replica's call slots that batch and background work may use
+
+    The remaining slots are held back so interactive calls never have to queue
+    behind a full replica. At least one slot is always left for batch work.
+    """
+    reserved = math.ceil(max_in_flight * interactive_share)
+    return max(1, max_in_flight - reserved)
+
+def batch_cost(batch: Dict) -> float:
+    """Scheduling cost of a queued micro-batch"""
+    cost = batch.get("cost")
+    return cost if cost is not None else max(len(batch.get("requests", [])), 1)
+
+class PriorityGate:
+    """Priority-aware mutual exclusion for the model inside a TTSWorker
+
+    Calls run concurrently on the actor's threads but only one holds the gate
+    (and the GPU) at a time. When the gate is released it goes to the waiter
+    with the best priority class, so an interactive call waits at most for the
+    micro-batch currently being synthesized. Within a class the cheapest
+    waiter goes first (shortest job first), FIFO between equal costs.
+    """
+
+    def __init__(self):
+        """Initialize an open gate"""
+        self._condition = threading.Condition()
+        self._waiters: List[tuple] = []
+        self._arrivals = itertools.count()
+        self._held = False
+
+    def acquire(self, priority=Priority.INTERACTIVE, cost: float = 0.0) -> None:
+        """Block until the gate is free and no better waiter is queued"""
+        with self._condition:
+            ticket = (priority_rank(priority), cost, next(self._arrivals))
+            heapq.heappush(self._waiters, ticket)
+
+            while self._held or self._waiters[0] != ticket:
+                self._condition.wait()
+
+            heapq.heappop(self._waiters)
+            self._held = True
+
+    def release(self) -> None:
+        """Release the gate and wake the waiters"""
+        with self._condition:
+            self._held = False
+            self._condition.notify_all()
+
+    def waiting(self) -> Dict[str, int]:
+        """Count the waiters per priority class"""
+        with self._condition:
+            counts = {priority.value: 0 for priority in Priority}
+            for rank, _, _ in self._waiters:
+                counts[RANK_PRIORITY[rank].value] += 1
+            return counts
+
+class FairShareQueue:
+    """Queue of micro-batches with priority classes and weighted fair sharing
+
+    Jobs in a better priority class always go first. Within a class, jobs share
+    capacity in proportion to their weight using stride scheduling: every job
+    has a virtual pass that advances by (estimated cost taken / weight), and
+    the job with the lowest pass is served next, the job with the cheapest
+    next micro-batch on ties. Each job's own micro-batches are served
+    shortest first.
+
+    A micro-batch's cost is its "cost" entry (estimated processing seconds),
+    or its number of requests if it has none.
+    """
+
+    def __init__(self):
+        """Initialize an empty queue"""
+        # Per-job state (job_id -> {"priority", "weight", "pass", "batches"})
+        # "batches" is a heap of (cost, arrival, micro-batch)
+        self.jobs: Dict[str, Dict] = {}
+        self._arrivals = itertools.count()
+
+        # Virtual time per priority class, so new jobs start level with active ones
+        self.virtual_time: Dict[int, float] = {}
+
+    def put(self, job_id: str, batches: List[Dict], priority=Priority.BATCH, weight: float = 1.0) -> int:
+        """Queue micro-batches for a job and return the job's backlog length"""
+        rank = priority_rank(priority)
+        job = self.jobs.get(job_id)
+
+        if job is None:
+            job = {
+                "priority": rank,
+                "weight": max(weight, 1e-6),
+                "pass": self.virtual_time.get(rank, 0.0),
+                "batches": []
+            }
+            self.jobs[job_id] = job
+
+        for batch in batches:
+            heapq.heappush(job["batches"], (batch_cost(batch), next(self._arrivals), batch))
+
+        return len(job["batches"])
+
+    def pull(self, max_batches: int = 1) -> List[Dict]:
+        """Take up to max_batches micro-batches in priority and fair-share order"""
+        batches = []
+
+        while len(batches) < max_batches and self.jobs:
+            job_id = min(self.jobs, key=lambda key: (
+                self.jobs[key]["priority"], self.jobs[key]["pass"], self.jobs[key]["batches"][0][0]
+            ))
+            job = self.jobs[job_id]
+
+            cost, _, batch = heapq.heappop(job["batches"])
+            batches.append(batch)
+
+            job["pass"] += cost / job["weight"]
+            self.virtual_time[job["priority"]] = job["pass"]
+
+            if not job["batches"]:
+                del self.jobs[job_id]
+
+        return batches
+
+    def cancel(self, job_id: str) -> int:
+        """Drop all queued micro-batches of a job and return how many were dropped"""
+        job = self.jobs.pop(job_id, None)
+        return len(job["batches"]) if job else 0
+
+    def backlogs(self) -> Dict[str, int]:
+        """Number of queued micro-batches per job"""
+        return {job_id: len(job["batches"]) for job_id, job in self.jobs.items()}
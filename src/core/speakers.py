@@ -0,0 +1,123 @@
+import os
+import glob
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import torch
+
+# Import centralized configuration
+from src.config import AVATAR_VOICE_DIR, SPEAKER_EMBEDDING_RETRY_SECONDS
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def avatar_key(avatar: Optional[Dict]) -> Optional[str]:
+    """Key of an avatar's voice, matching its reference recording's file name"""
+    if not avatar or not avatar.get("gender"):
+        return None
+
+    return f"{avatar['gender']}_{avatar.get('dialect') or 'default'}"
+
+class SpeakerCache:
+    """Speaker conditioning (embeddings or latents) per avatar for one model
+
+    Conditioning is computed once from the avatar's reference recording in
+    AVATAR_VOICE_DIR and persisted next to the model in
+    <model_path>/speaker_embeddings/<key>.pt. Everything persisted is loaded
+    at startup and recordings without a persisted entry are computed then, so
+    requests only do a dictionary lookup. A recording whose conditioning
+    cannot be computed gets the default voice and is only tried again after
+    SPEAKER_EMBEDDING_RETRY_SECONDS, instead of on every request.
+    """
+
+    def __init__(self, model_path: str, compute: Callable[[str], object], device: str = "cpu"):
+        """Load the persisted conditioning of a model and compute the missing ones"""
+        self.cache_dir = os.path.join(model_path, "speaker_embeddings")
+        self.compute = compute
+        self.device = device
+        self._lock = threading.Lock()
+
+        # Conditioning per avatar key (None: no reference recording)
+        self.speakers: Dict[str, object] = {}
+
+        # Monotonic time after which a failed avatar key is computed again
+        self.failures: Dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+        self._compute_missing()
+
+    def _load(self) -> None:
+        """Load the persisted conditioning"""
+        for path in glob.glob(os.path.join(self.cache_dir, "*.pt")):
+            key = os.path.splitext(os.path.basename(path))[0]
+            try:
+                self.speakers[key] = torch.load(path, map_location=self.device)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable speaker embedding {path}: {str(e)}")
+
+    def _compute_missing(self) -> None:
+        """Compute the conditioning of reference recordings that have none yet"""
+        for path in glob.glob(os.path.join(AVATAR_VOICE_DIR, "*.wav")):
+            key = os.path.splitext(os.path.basename(path))[0]
+            if key not in self.speakers:
+                self._compute(key)
+
+    def _compute(self, key: str):
+        """Compute, persist and cache the conditioning of an avatar"""
+        reference_path = os.path.join(AVATAR_VOICE_DIR, f"{key}.wav")
+        speaker = None
+
+        if os.path.exists(reference_path):
+            try:
+                speaker = self.compute(reference_path)
+                self._persist(key, speaker)
+                logger.info(f"Computed speaker embedding for {key}")
+            except Exception as e:
+                logger.warning(f"Failed to compute speaker embedding for {key}: {str(e)}")
+                self.failures[key] = time.monotonic() + SPEAKER_EMBEDDING_RETRY_SECONDS
+                return None
+
+        self.failures.pop(key, None)
+        self.speakers[key] = speaker
+        return speaker
+
+    def _persist(self, key: str, speaker) -> None:
+        """Write a conditioning to disk atomically"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f"{key}.pt")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        torch.save(speaker, tmp_path)
+        os.replace(tmp_path, path)
+
+    def get(self, avatar: Optional[Dict]):
+        """Get the conditioning of an avatar, or None for the model's default voice"""
+        key = avatar_key(avatar)
+        if key is None:
+            return None
+
+        with self._lock:
+            if key in self.speakers:
+                self.hits += 1
+                return self.speakers[key]
+
+            if self.failures.get(key, 0) > time.monotonic():
+                self.hits += 1
+                return None
+
+            self.misses += 1
+            return self._compute(key)
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        return {
+            "speakers": sum(1 for speaker in self.speakers.values() if speaker is not None),
+            "failed": len(self.failures),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,195 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Import centralized configuration
+from src.config import TEXT_FRONTEND_CACHE_SIZE
+
+# Abbreviations expanded before segmentation, so their periods don't end sentences.
+# Matched on word boundaries; the ambiguous ones only before what they qualify
+# ("No. 5", "St. Louis"), so a sentence-final "No." or "St." stays as it is
+BEFORE_NAME = r"(?=\s+[A-Z])"
+ABBREVIATIONS = {
+    "en": [
+        (re.compile(pattern), expansion) for pattern, expansion in (
+            (r"\bDr\." + BEFORE_NAME, "Doctor"), (r"\bMr\." + BEFORE_NAME, "Mister"),
+            (r"\bMrs\." + BEFORE_NAME, "Missus"), (r"\bMs\." + BEFORE_NAME, "Miss"),
+            (r"\bSt\." + BEFORE_NAME, "Saint"), (r"\bNo\.(?=\s*\d)", "number"),
+            (r"\bJr\.", "Junior"), (r"\bSr\.", "Senior"), (r"\bvs\.", "versus"),
+            (r"\betc\.", "et cetera"), (r"\be\.g\.", "for example"), (r"\bi\.e\.", "that is")
+        )
+    ]
+}
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"
+]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+SCALES = [(10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand"), (100, "hundred")]
+ORDINALS = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth", "eight": "eighth",
+    "nine": "ninth", "twelve": "twelfth"
+}
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+CURRENCY = re.compile(r"\$(\d+(?:,\d{3})*(?:\.\d+)?)")
+PERCENT = re.compile(r"(\d+(?:,\d{3})*(?:\.\d+)?)\s?%")
+ORDINAL = re.compile(r"\b(\d+)(st|nd|rd|th)\b")
+NUMBER = re.compile(r"\b\d+(?:,\d{3})*(?:\.\d+)?\b")
+SENTENCE_END = re.compile(r"(?<=[.!?。！？؟।])\s+")
+
+def number_to_words(number: int) -> str:
+    """Spell out a non-negative integer in English"""
+    if number < 20:
+        return ONES[number]
+    if number < 100:
+        tens, ones = divmod(number, 10)
+        return TENS[tens] + (f"-{ONES[ones]}" if ones else "")
+
+    for scale, name in SCALES:
+        if number >= scale:
+            head, rest = divmod(number, scale)
+            words = f"{number_to_words(head)} {name}"
+            return words + (f" {number_to_words(rest)}" if rest else "")
+
+    return str(number)
+
+def ordinal_to_words(number: int) -> str:
+    """Spell out an ordinal number in English"""
+    words = number_to_words(number)
+    head, sep, last = words.rpartition(" ") if " " in words else ("", "", words)
+    prefix, dash, last = last.rpartition("-") if "-" in last else ("", "", last)
+
+    if last in ORDINALS:
+        last = ORDINALS[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+
+    return head + sep + prefix + dash + last
+
+def _spell_number(match) -> str:
+    """Spell out a matched (possibly decimal or comma-grouped) number"""
+    whole, _, fraction = match.group(0).replace(",", "").partition(".")
+    words = number_to_words(int(whole))
+    if fraction:
+        words += " point " + " ".join(ONES[int(digit)] for digit in fraction)
+    return words
+
+def _spell_date(match) -> str:
+    """Spell out an ISO date as "Month day, year" """
+    year, month, day = (int(part) for part in match.groups())
+    if not 1 <= month <= 12 or not 1 <= day <= 31:
+        return match.group(0)
+    return f"{MONTHS[month - 1]} {ordinal_to_words(day)}, {year}"
+
+def normalize_text(text: str, language: str) -> str:
+    """Normalize text for synthesis and for use as a cache key
+
+    Unicode and whitespace are normalized for every language. English also
+    gets abbreviations, dates, currency, percentages and numbers spelled out.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = " ".join(text.split())
+
+    for abbreviation, expansion in ABBREVIATIONS.get(language, []):
+        text = abbreviation.sub(expansion, text)
+
+    if language == "en":
+        text = ISO_DATE.sub(_spell_date, text)
+        text = CURRENCY.sub(lambda match: f"{match.group(1)} dollars", text)
+        text = PERCENT.sub(lambda match: f"{match.group(1)} percent", text)
+        text = ORDINAL.sub(lambda match: ordinal_to_words(int(match.group(1))), text)
+        text = NUMBER.sub(_spell_number, text)
+
+    return text
+
+def normalized_text_hash(text: str, language: str) -> str:
+    """MD5 of the normalized text, matching texts that normalize the same"""
+    return hashlib.md5(normalize_text(text, language).encode("utf-8")).hexdigest()
+
+def split_sentences(text: str) -> List[str]:
+    """Split normalized text into sentences"""
+    return [sentence for sentence in SENTENCE_END.split(text) if sentence]
+
+class TextFrontend:
+    """Normalization, segmentation and cached tokenization for one model
+
+    Token ids are cached per sentence in a bounded LRU, so phrases repeated
+    across requests and batch items are only tokenized once.
+    """
+
+    def __init__(self, processor=None, cache_size: int = TEXT_FRONTEND_CACHE_SIZE):
+        """Initialize the front-end on top of a model's processor (or none)"""
+        self.processor = processor
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+
+        # Token ids per sentence, least recently used first
+        self.tokens: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self, text: str, language: str) -> Dict:
+        """Normalize, segment and tokenize a text
+
+        Returns the normalized text, its sentences and the token ids of every
+        sentence (None if the model has no processor).
+        """
+        normalized = normalize_text(text, language)
+        sentences = split_sentences(normalized)
+
+        return {
+            "text": normalized,
+            "sentences": sentences,
+            "token_ids": [self._tokenize(sentence, language) for sentence in sentences]
+        }
+
+    def _tokenize(self, sentence: str, language: str) -> Optional[List[int]]:
+        """Token ids of a sentence, from the cache if possible"""
+        if self.processor is None:
+            return None
+
+        key = (language, sentence)
+        with self._lock:
+            if key in self.tokens:
+                self.tokens.move_to_end(key)
+                self.hits += 1
+                return self.tokens[key]
+
+            self.misses += 1
+
+        try:
+            token_ids = self.processor(text=sentence, return_tensors="pt")["input_ids"][0].tolist()
+        except Exception:
+            # Some processors need more than text; let the model tokenize itself
+            return None
+
+        with self._lock:
+            self.tokens[key] = token_ids
+            if len(self.tokens) > self.cache_size:
+                self.tokens.popitem(last=False)
+
+        return token_ids
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cached_sentences": len(self.tokens),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None
+            }
@@ -4,42 +4,75 @@ import uuid
 import json
 import ray
 import librosa
+import soundfile as sf
 import numpy as np
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Dict, Optional, Any, Union, Tuple
 import asyncio
 from datetime import datetime
 import logging
 from fastapi import Depends
 import shutil
 import glob
+import itertools
+import hashlib
 import torch
 
 # Local imports
 from src.core.models import (
-    TTSRequest, TTSResponse, TTSResult, Avatar, 
+    TTSRequest, TTSResponse, TTSResult, Avatar, Priority,
     BatchTTSRequest, BatchTTSJobStatus, BatchTTSItemStatus,
     ModelInfo, LanguageInfo, AvatarInfo, SystemStats
 )
 
 # Database imports
-from src.core.db_models import SessionLocal, get_db
+from src.core.db_models import SessionLocal, AsyncSessionLocal, get_db
 from src.core.db_service import db_service
+from src.core.batch_engine import BatchJobEngine
+from src.core.scheduler import PriorityGate
+from src.core.speakers import SpeakerCache
+from src.core.text_frontend import TextFrontend, normalize_text
+from src.core.admission import AdmissionController
+from src.core.cost_model import CostModel
+from src.core.latency import LatencyTracker
+from src.core.router import ModelRouter
+from src.core.request_log import RequestLogger
+from src.core.retention import PartitionMaintenance
+from src.core.audio_lifecycle import AudioLifecycleManager
+from src.ray.inflight_registry import InflightRegistry
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import centralized configuration
-from src.config import MODEL_DIR, AUDIO_OUTPUT_DIR, RAY_ADDRESS, RAY_NAMESPACE, DEFAULT_MODELS, HUGGINGFACE_TOKEN
+from src.config import (
+    MODEL_DIR, AUDIO_OUTPUT_DIR, RAY_ADDRESS, RAY_NAMESPACE, DEFAULT_MODELS, HUGGINGFACE_TOKEN,
+    TTS_WORKER_REPLICAS, BATCH_MAX_IN_FLIGHT_PER_WORKER,
+    TTS_SINGLE_FLIGHT_SHARED, TTS_REQUEST_TIMEOUT_SECONDS, TTS_HEDGE_ENABLED,
+    TTS_HEDGE_PERCENTILE, TTS_HEDGE_MIN_DELAY_SECONDS, LEADERBOARD_CACHE_SECONDS
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Output sample rates of the models synthesized in the worker
+XTTS_SAMPLE_RATE = 24000
+SPEECHT5_SAMPLE_RATE = 16000
+
+# Model types synthesized from the front-end's cached token ids
+TOKENIZED_MODEL_TYPES = ("speecht5",)
+
 # Ray initialization - should be done once at the application level
 if not ray.is_initialized():
     ray.init(address=RAY_ADDRESS, namespace=RAY_NAMESPACE)
 
-@ray.remote(num_gpus=1)
+@ray.remote(num_gpus=1, max_concurrency=BATCH_MAX_IN_FLIGHT_PER_WORKER)
 class TTSWorker:
-    """Ray Actor for TTS generation"""
+    """Ray Actor for TTS generation
+    
+    Calls are accepted concurrently but synthesis is serialized through a
+    PriorityGate, so interactive requests overtake queued batch work at the
+    next micro-batch boundary.
+    """
     
     def __init__(self, model_id: str):
         """Initialize the TTS Worker with a specific model"""
@@ -63,6 +96,17 @@ class TTSWorker:
         # Load the appropriate model based on type
         self._load_model()
         
+        # Speaker conditioning per avatar, for models that condition on a reference voice
+        self.speakers = self._load_speaker_cache()
+        
+        # Text normalization, and cached tokenization for the models that synthesize from token ids
+        self.frontend = TextFrontend(
+            getattr(self, "processor", None) if self.model_type in TOKENIZED_MODEL_TYPES else None
+        )
+        
+        # Serializes use of the model, best priority class first
+        self.gate = PriorityGate()
+        
         # Track statistics
         self.tasks_processed = 0
         self.last_accessed = datetime.now()
@@ -126,6 +170,38 @@ class TTSWorker:
             logger.error(f"Error loading model {self.model_id}: {str(e)}")
             raise
     
+    def _load_speaker_cache(self) -> Optional[SpeakerCache]:
+        """Load the avatar speaker cache of models that use one"""
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        if self.model_type == "xtts":
+            return SpeakerCache(self.model_path, self._compute_xtts_conditioning, device)
+        elif self.model_type == "speecht5":
+            return SpeakerCache(self.model_path, self._compute_xvector, device)
+        
+        return None
+    
+    def _compute_xtts_conditioning(self, reference_path: str):
+        """Compute XTTS conditioning latents from a reference recording"""
+        gpt_cond_latent, speaker_embedding = self.model.get_conditioning_latents(audio_path=[reference_path])
+        return {"gpt_cond_latent": gpt_cond_latent, "speaker_embedding": speaker_embedding}
+    
+    def _compute_xvector(self, reference_path: str):
+        """Compute a SpeechT5 x-vector speaker embedding from a reference recording"""
+        if not hasattr(self, "speaker_encoder"):
+            from speechbrain.pretrained import EncoderClassifier
+            self.speaker_encoder = EncoderClassifier.from_hparams(
+                source="speechbrain/spkrec-xvect-voxceleb",
+                run_opts={"device": "cuda" if torch.cuda.is_available() else "cpu"}
+            )
+        
+        waveform, _ = librosa.load(reference_path, sr=16000)
+        with torch.no_grad():
+            embedding = self.speaker_encoder.encode_batch(torch.tensor(waveform).unsqueeze(0))
+            embedding = torch.nn.functional.normalize(embedding, dim=2)
+        
+        return embedding.squeeze(0)
+    
     def _load_xtts_model(self):
         """Load XTTS model"""
         try:
@@ -315,25 +391,43 @@ class TTSWorker:
             raise
     
     def generate_speech(self, text: str, language: str, avatar: Optional[Dict] = None, 
-                        output_path: str = None) -> Dict:
-        """Generate speech from text"""
+                        output_path: str = None, priority: str = Priority.INTERACTIVE.value,
+                        cost: float = 0.0) -> Dict:
+        """Generate speech from text
+        
+        ``cost`` is the estimated processing time, used to run cheaper
+        requests of the same priority class first.
+        """
+        self.gate.acquire(priority, cost)
+        try:
+            return self._synthesize(text, language, avatar, output_path)
+        finally:
+            self.gate.release()
+    
+    def _synthesize(self, text: str, language: str, avatar: Optional[Dict] = None, 
+                    output_path: str = None) -> Dict:
+        """Run the model for one request (the caller holds the gate)"""
         start_time = time.time()
         self.last_accessed = datetime.now()
         
         try:
+            # Normalize, segment and tokenize the text (token ids are cached per sentence)
+            prepared = self.frontend.prepare(text, language)
+            text, tokens = prepared["text"], prepared["token_ids"]
+            
             # Generate speech based on model type
             if self.model_type == "xtts":
-                result = self._generate_xtts_speech(text, language, avatar, output_path)
+                result = self._generate_xtts_speech(text, language, avatar, output_path, tokens)
             elif self.model_type == "bark":
-                result = self._generate_bark_speech(text, language, avatar, output_path)
+                result = self._generate_bark_speech(text, language, avatar, output_path, tokens)
             elif self.model_type == "speecht5":
-                result = self._generate_speecht5_speech(text, language, avatar, output_path)
+                result = self._generate_speecht5_speech(text, language, avatar, output_path, tokens)
             elif self.model_type == "vits":
-                result = self._generate_vits_speech(text, language, avatar, output_path)
+                result = self._generate_vits_speech(text, language, avatar, output_path, tokens)
             elif self.model_type == "mms":
-                result = self._generate_mms_speech(text, language, avatar, output_path)
+                result = self._generate_mms_speech(text, language, avatar, output_path, tokens)
             else:
-                result = self._generate_generic_speech(text, language, avatar, output_path)
+                result = self._generate_generic_speech(text, language, avatar, output_path, tokens)
             
             # Add processing metadata
             result.update({
@@ -350,56 +444,111 @@ class TTSWorker:
             logger.error(f"Error generating speech: {str(e)}")
             raise
     
-    def _generate_xtts_speech(self, text, language, avatar, output_path):
-        """Generate speech using XTTS model"""
-        # TODO: Replace with actual implementation
+    def generate_speech_batch(self, requests: List[Dict], 
+                              priority: str = Priority.BATCH.value, cost: float = 0.0) -> List[Dict]:
+        """Generate speech for a micro-batch of requests sharing language and avatar
+        
+        Each request is a dict with "text", "language", "avatar" and "output_path".
+        Failures are reported per request instead of failing the whole call.
+        The micro-batch holds the gate as a whole; better-priority calls run
+        before the next micro-batch starts.
+        """
+        results = []
+        
+        self.gate.acquire(priority, cost)
+        try:
+            for request in requests:
+                try:
+                    result = self._synthesize(
+                        text=request["text"],
+                        language=request["language"],
+                        avatar=request.get("avatar"),
+                        output_path=request["output_path"]
+                    )
+                    result["status"] = "completed"
+                    result["error"] = None
+                except Exception as e:
+                    result = {"status": "failed", "error": str(e)}
+                
+                results.append(result)
+        finally:
+            self.gate.release()
+        
+        return results
+    
+    def _generate_xtts_speech(self, text, language, avatar, output_path, tokens=None):
+        """Generate speech using XTTS model, conditioned on the avatar's cached latents"""
+        # Precomputed conditioning of the avatar's voice (None: default voice)
+        speaker = self.speakers.get(avatar) if self.speakers else None
+        
+        if speaker is not None and hasattr(self.model, "inference"):
+            output = self.model.inference(
+                text, language, speaker["gpt_cond_latent"], speaker["speaker_embedding"]
+            )
+            return self._write_audio(output_path, np.asarray(output["wav"]), XTTS_SAMPLE_RATE)
+        
+        # TODO: Replace with actual implementation for the default voice
         # This is a placeholder
         
         # Simulate audio generation
         audio_length = len(text.split()) * 0.3  # Rough estimate
         
-        # In production, this would be:
-        # inputs = self.processor(text=text, return_tensors="pt")
-        # if torch.cuda.is_available():
-        #     inputs = {k: v.to("cuda") for k, v in inputs.items()}
-        # speech = self.model.generate_speech(**inputs)
-        # Save audio to output_path...
-        
         return {
             "file_path": output_path,
             "duration_seconds": audio_length
         }
     
-    def _generate_bark_speech(self, text, language, avatar, output_path):
+    def _generate_bark_speech(self, text, language, avatar, output_path, tokens=None):
         """Generate speech using Bark model"""
         # Placeholder for actual Bark implementation
         audio_length = len(text.split()) * 0.3
         return {"file_path": output_path, "duration_seconds": audio_length}
     
-    def _generate_speecht5_speech(self, text, language, avatar, output_path):
-        """Generate speech using SpeechT5 model"""
-        # Placeholder for actual SpeechT5 implementation
-        audio_length = len(text.split()) * 0.3
-        return {"file_path": output_path, "duration_seconds": audio_length}
+    def _generate_speecht5_speech(self, text, language, avatar, output_path, tokens=None):
+        """Generate speech using SpeechT5 model, in the voice of the avatar's cached x-vector"""
+        # Precomputed x-vector of the avatar's voice (a neutral embedding for the default voice)
+        speaker_embeddings = self.speakers.get(avatar) if self.speakers else None
+        if speaker_embeddings is None:
+            speaker_embeddings = torch.zeros((1, 512))
+        
+        # Token ids per sentence from the front-end's cache; tokenize the whole text if it has none
+        if not tokens or any(token_ids is None for token_ids in tokens):
+            tokens = [self.processor(text=text, return_tensors="pt")["input_ids"][0].tolist()]
+        
+        device = self.model.device
+        with torch.no_grad():
+            speech = [
+                self.model.generate_speech(
+                    torch.tensor([token_ids], device=device), speaker_embeddings.to(device), vocoder=self.vocoder
+                ).cpu().numpy()
+                for token_ids in tokens
+            ]
+        
+        return self._write_audio(output_path, np.concatenate(speech), SPEECHT5_SAMPLE_RATE)
     
-    def _generate_vits_speech(self, text, language, avatar, output_path):
+    def _generate_vits_speech(self, text, language, avatar, output_path, tokens=None):
         """Generate speech using VITS model"""
         # Placeholder for actual VITS implementation
         audio_length = len(text.split()) * 0.3
         return {"file_path": output_path, "duration_seconds": audio_length}
     
-    def _generate_mms_speech(self, text, language, avatar, output_path):
+    def _generate_mms_speech(self, text, language, avatar, output_path, tokens=None):
         """Generate speech using MMS model"""
         # Placeholder for actual MMS implementation
         audio_length = len(text.split()) * 0.3
         return {"file_path": output_path, "duration_seconds": audio_length}
     
-    def _generate_generic_speech(self, text, language, avatar, output_path):
+    def _generate_generic_speech(self, text, language, avatar, output_path, tokens=None):
         """Generate speech using generic model"""
         # Placeholder for generic implementation
         audio_length = len(text.split()) * 0.3
         return {"file_path": output_path, "duration_seconds": audio_length}
     
+    def _write_audio(self, output_path: str, waveform: np.ndarray, sample_rate: int) -> Dict:
+        """Write a synthesized waveform to the output file"""
+        sf.write(output_path, waveform, sample_rate)
+        return {"file_path": output_path, "duration_seconds": len(waveform) / sample_rate}
+    
     def get_stats(self) -> Dict:
         """Get worker statistics"""
         return {
@@ -407,48 +556,12 @@ class TTSWorker:
             "model_type": self.model_type,
             "tasks_processed": self.tasks_processed,
             "last_accessed": self.last_accessed.isoformat(),
+            "waiting": self.gate.waiting(),
+            "speaker_cache": self.speakers.get_stats() if self.speakers else None,
+            "text_frontend": self.frontend.get_stats(),
             "optimized": self.model_info.get("optimized", False)
         }
 
-# Batch processing task using Ray
-@ray.remote
-def process_batch_item(worker_handle, item_id, text, language, avatar, output_dir):
-    """Process a single batch item using a worker"""
-    try:
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        gender = avatar["gender"] if avatar else "default"
-        dialect = avatar["dialect"] if avatar and "dialect" in avatar else language
-        filename = f"{item_id}_{gender}_{dialect}_{timestamp}.mp3"
-        output_path = os.path.join(output_dir, filename)
-        
-        # Call worker to generate speech
-        result = ray.get(worker_handle.generate_speech.remote(
-            text=text,
-            language=language,
-            avatar=avatar,
-            output_path=output_path
-        ))
-        
-        # Return status
-        return {
-            "id": item_id,
-            "status": "completed",
-            "file_url": f"/audio-output/{filename}",
-            "duration": result["duration_seconds"],
-            "error": None
-        }
-        
-    except Exception as e:
-        logger.error(f"Error processing batch item {item_id}: {str(e)}")
-        return {
-            "id": item_id,
-            "status": "failed",
-            "file_url": None,
-            "duration": 0,
-            "error": str(e)
-        }
-
 class TextToSpeechService:
     """Service for text-to-speech generation"""
     
@@ -457,16 +570,53 @@ class TextToSpeechService:
         # Ensure model directory exists
         os.makedirs(MODEL_DIR, exist_ok=True)
         
-        # Worker references (model_id -> Ray actor handle)
+        # Worker references (model_id -> list of Ray actor handles, one per replica)
         self.workers = {}
         
-        # Batch jobs (job_id -> status)
-        self.batch_jobs = {}
+        # Round-robin position over each model's replicas
+        self._replica_cursors = {}
+        
+        # Queue accounting and load shedding per model
+        self.admission = AdmissionController()
+        
+        # Processing time estimates learned from the request history
+        self.cost_model = CostModel()
+        
+        # Syntheses in flight in this process (request key -> future of the worker result)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Registry shared by all API processes, created on first use
+        self._inflight_registry = None
+        
+        # Recent worker call latencies, used to decide when to hedge
+        self.latency = LatencyTracker()
+        
+        # Language -> model routing based on the model registry and current load
+        self.router = ModelRouter(self.latency, self.cost_model, self.admission)
+        
+        # Write-behind logging of /tts requests
+        self.request_log = RequestLogger()
+        
+        # Creation and retention of the tts_requests and system_stats partitions
+        self.partition_maintenance = PartitionMaintenance()
+        
+        # Cold-tier recompression and expiry of the generated audio files
+        self.audio_lifecycle = AudioLifecycleManager()
+        
+        # Installed models as of the last MODEL_DIR scan ((registry version, ETag, models))
+        self._model_registry = None
+        self._model_registry_revision = 0
+        
+        # Hugging Face leaderboards by limit (limit -> (fetched at, models))
+        self._leaderboard_cache: Dict[int, tuple] = {}
         
         # Output directory
         self.output_dir = AUDIO_OUTPUT_DIR
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # Durable batch job execution
+        self.batch_engine = BatchJobEngine(self)
+        
         logger.info("Text-to-Speech service initialized")
     
     def _initialize_models(self, db: Session):
@@ -486,51 +636,37 @@ class TextToSpeechService:
         for model_id in models:
             if model_id not in self.workers:
                 try:
-                # Create a Ray actor for this model
-                    worker = TTSWorker.remote(model_id)
-                    self.workers[model_id] = worker
-                    logger.info(f"Initialized TTS worker for model: {model_id}")
+                    # Create the Ray actors for this model
+                    self._create_replicas(model_id)
+                    logger.info(f"Initialized TTS workers for model: {model_id}")
                 except Exception as e:
                     logger.error(f"Failed to initialize worker for model {model_id}: {str(e)}")
     
-    def _select_model_for_language(self, db: Session, language: str) -> str:
+    def _create_replicas(self, model_id: str) -> List:
+        """Create TTS_WORKER_REPLICAS Ray actors for a model"""
+        replicas = [TTSWorker.remote(model_id) for _ in range(TTS_WORKER_REPLICAS)]
+        self.workers[model_id] = replicas
+        self._replica_cursors[model_id] = itertools.cycle(range(len(replicas)))
+        self.admission.set_replicas(model_id, len(replicas))
+        return replicas
+    
+    def _remove_replicas(self, model_id: str) -> None:
+        """Drop the Ray actors of a model"""
+        self.workers.pop(model_id, None)
+        self._replica_cursors.pop(model_id, None)
+    
+    def _select_model_for_language(self, db: Session, language: str, text: str = "", 
+                                   model_override: Optional[str] = None) -> str:
         """Select the most appropriate model for a given language"""
-        # This is a placeholder implementation
-        # In a production system, you would have a mapping of languages to preferred models
-        
-        # If we have language-specific models, we would select them here
-        language_model_map = {
-            "en": "coqui/XTTS-v2",
-            "es": "facebook/mms-tts",
-            "ar": "microsoft/speecht5_tts",
-            "hi": "facebook/mms-tts",
-            "zh": "facebook/mms-tts"
-        }
-        
-        # Return the model ID for this language, or fall back to a default
-        return language_model_map.get(language, "coqui/XTTS-v2")
+        return self.router.route(db, language, text=text, model_override=model_override)
     
-    async def generate_speech(self, text: str, language: str, avatar: Optional[Dict] = None, 
-                              output_path: str = None, db: Session = None) -> TTSResult:
-        """Generate speech from text"""
-        start_time = time.time()
-        
-        if db is None:
-            db = next(get_db())
-        
-        # Initialize models if needed
-        if not self.workers:
-            self._initialize_models(db)
-        
-        # Select model for language
-        model_id = self._select_model_for_language(db, language)
-        
-        # Check if we have a worker for this model
+    def _get_replicas(self, model_id: str):
+        """Get (or create) the workers for a model, falling back to any available model"""
         if model_id not in self.workers:
             try:
-                # Create a worker for this model
-                self.workers[model_id] = TTSWorker.remote(model_id)
-                logger.info(f"Created new worker for model: {model_id}")
+                # Create workers for this model
+                self._create_replicas(model_id)
+                logger.info(f"Created new workers for model: {model_id}")
             except Exception as e:
                 logger.error(f"Failed to create worker for model {model_id}: {str(e)}")
                 # Fall back to a different model
@@ -541,6 +677,63 @@ class TextToSpeechService:
                 else:
                     raise ValueError("No TTS models available")
         
+        return model_id, self.workers[model_id]
+    
+    def _get_worker(self, model_id: str, exclude=()):
+        """Get the index of the least loaded replica of a model, rotating over equally loaded replicas
+        
+        Replicas in ``exclude`` are skipped; the index is None if no other replica is left.
+        """
+        model_id, replicas = self._get_replicas(model_id)
+        
+        start = next(self._replica_cursors[model_id])
+        order = [(start + offset) % len(replicas) for offset in range(len(replicas))]
+        order = [i for i in order if i not in exclude]
+        if not order:
+            return model_id, None
+        
+        index = min(order, key=lambda i: self.batch_engine.replica_load(model_id, i))
+        return model_id, index
+    
+    def _replace_replica(self, model_id: str, index: int, dead_worker) -> None:
+        """Start a new actor in place of a replica that died"""
+        replicas = self.workers.get(model_id)
+        
+        # Another request may have replaced it already
+        if replicas and index < len(replicas) and replicas[index] is dead_worker:
+            replicas[index] = TTSWorker.remote(model_id)
+            logger.warning(f"Replaced dead worker {model_id}[{index}]")
+    
+    async def generate_speech(self, text: str, language: str, avatar: Optional[Dict] = None, 
+                              output_path: str = None, db: AsyncSession = None, 
+                              model: Optional[str] = None) -> TTSResult:
+        """Generate speech from text"""
+        if db is None:
+            async with AsyncSessionLocal() as db:
+                return await self.generate_speech(text, language, avatar, output_path, db=db, model=model)
+        
+        start_time = time.time()
+        
+        # Initialize models if needed
+        if not self.workers:
+            self._initialize_models(db)
+        
+        # Select model for language, unless the request asks for a specific one
+        model_id = await self.router.route_async(db, language, text=text, model_override=model)
+        
+        # Get (or create) the workers for this model
+        model_id, _ = self._get_replicas(model_id)
+        
+        # Estimate the processing time so the worker can run short requests first
+        cost = self.cost_model.predict(model_id, language, text)
+        
+        # Identical requests already in flight here are shared, so they cost no capacity
+        key = self._request_key(model_id, text, language, avatar)
+        coalesced = key in self._inflight
+        
+        # Reject the request early if the model's queue is too long
+        audio_seconds = 0.0 if coalesced else self.admission.admit_interactive(model_id, text)
+        
         # Generate a default output path if none provided
         if not output_path:
             timestamp = int(time.time())
@@ -548,61 +741,33 @@ class TextToSpeechService:
             output_path = os.path.join(self.output_dir, filename)
         
         try:
-            # Get the worker for this model
-            worker = self.workers[model_id]
-            
-            # Generate speech using the worker
-            result = await asyncio.to_thread(
-                ray.get,
-                worker.generate_speech.remote(
-                    text=text,
-                    language=language,
-                    avatar=avatar.dict() if avatar else None,
-                    output_path=output_path
+            # Generate speech using the workers, or share an identical synthesis in flight
+            result, shared = await self._single_flight(
+                key,
+                lambda: self._call_worker(
+                    model_id,
+                    output_path,
+                    lambda worker, path: worker.generate_speech.remote(
+                        text=text,
+                        language=language,
+                        avatar=avatar.dict() if avatar else None,
+                        output_path=path,
+                        cost=cost
+                    )
                 )
             )
             
             # Calculate processing time
             processing_time = time.time() - start_time
+            if not shared:
+                self.admission.observe(model_id, result["processing_time"], result["duration_seconds"])
             
-            # Log the TTS request to the database
-            from src.core.db_service import db_service
-            
-            # Get model ID and avatar ID if provided
-            db_model = db.query(TTSModel).filter(TTSModel.model_id == model_id).first()
-            db_model_id = db_model.id if db_model else None
-            
-            avatar_id = None
-            if avatar:
-                # Find avatar by gender and dialect
-                dialect = avatar.dialect if avatar and hasattr(avatar, 'dialect') else None
-                gender = avatar.gender if avatar and hasattr(avatar, 'gender') else None
-                
-                if gender:
-                    # Find matching avatar
-                    avatar_query = db.query(Avatar).filter(Avatar.gender == gender)
-                    if dialect:
-                        # First try to find avatar with matching dialect
-                        dialect_avatar = avatar_query.join(Avatar.dialect_rel).filter(
-                            LanguageDialect.code == dialect
-                        ).first()
-                        
-                        if dialect_avatar:
-                            avatar_id = dialect_avatar.id
-                    
-                    # If no match with dialect or no dialect specified, just match gender
-                    if not avatar_id:
-                        gender_avatar = avatar_query.first()
-                        if gender_avatar:
-                            avatar_id = gender_avatar.id
-            
-            # Log the request
-            db_service.log_tts_request(
-                db=db,
+            # Log the request; it is written to the database in the background
+            self.request_log.log(
                 text=text,
                 language_code=language,
-                avatar_id=avatar_id,
-                model_id=db_model_id,
+                model=model_id,
+                avatar={"gender": avatar.gender, "dialect": avatar.dialect} if avatar else None,
                 file_path=result["file_path"],
                 duration_seconds=result["duration_seconds"],
                 processing_time=processing_time
@@ -619,137 +784,284 @@ class TextToSpeechService:
         except Exception as e:
             logger.error(f"Error generating speech: {str(e)}")
             raise
+        
+        finally:
+            if not coalesced:
+                self.admission.release(model_id, audio_seconds, interactive=True)
     
-    def submit_batch_job(self, request: BatchTTSRequest, db: Session = None) -> str:
-        """Submit a batch TTS job"""
-        if db is None:
-            db = next(get_db())
+    def _request_key(self, model_id: str, text: str, language: str, avatar: Optional[Avatar]) -> str:
+        """Key identifying requests that produce identical audio"""
+        gender = avatar.gender if avatar else None
+        dialect = avatar.dialect if avatar else None
         
-        # Initialize models if needed
-        if not self.workers:
-            self._initialize_models(db)
+        # Texts that normalize to the same words produce the same audio
+        text = normalize_text(text, language)
+        return hashlib.sha256(json.dumps([model_id, language, gender, dialect, text]).encode("utf-8")).hexdigest()
+    
+    async def _single_flight(self, key: str, call):
+        """Run a synthesis once for all concurrent identical requests
         
-        # Generate a job ID
-        job_id = f"job_{uuid.uuid4().hex}"
+        ``call`` is a coroutine function running the synthesis. Returns the
+        worker result and whether it was shared with another request.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leading request was cancelled, not this one; synthesize without it
+                return await self._single_flight(key, call)
         
-        # Select the model for this language
-        model_id = self._select_model_for_language(db, request.language)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
         
-        # Check if we have a worker for this model
-        if model_id not in self.workers:
-            try:
-                # Create a worker for this model
-                self.workers[model_id] = TTSWorker.remote(model_id)
-            except Exception as e:
-                logger.error(f"Failed to create worker for model {model_id}: {str(e)}")
-                # Fall back to a different model
-                available_models = list(self.workers.keys())
-                if available_models:
-                    model_id = available_models[0]
-                else:
-                    raise ValueError("No TTS models available")
+        try:
+            result, shared = await self._shared_flight(key, call)
+            future.set_result(result)
+            return result, shared
+        
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no other request is waiting
+            future.exception()
+            raise
+        
+        finally:
+            # Cancelled (client disconnect, shutdown): don't leave the waiting requests hanging
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+    
+    async def _shared_flight(self, key: str, call):
+        """Run a synthesis unless another API process is running the identical one"""
+        registry = self._get_inflight_registry()
+        if registry is None:
+            return await call(), False
         
-        # Get the worker
-        worker = self.workers[model_id]
-        
-        # Process each item in the batch
-        refs = []
-        for item in request.items:
-            # Submit task to Ray
-            ref = process_batch_item.remote(
-                worker,
-                item.id,
-                item.text,
-                request.language,
-                request.avatar.dict() if request.avatar else None,
-                self.output_dir
+        try:
+            leader = await asyncio.to_thread(
+                ray.get, registry.acquire.remote(key, TTS_REQUEST_TIMEOUT_SECONDS)
             )
-            refs.append(ref)
-        
-        # Create job status
-        self.batch_jobs[job_id] = {
-            "job_id": job_id,
-            "status": "processing",
-            "total_items": len(request.items),
-            "completed_items": 0,
-            "failed_items": 0,
-            "start_time": datetime.now().isoformat(),
-            "refs": refs,  # Store Ray object refs
-            "items": []
-        }
+        except ray.exceptions.RayError as e:
+            # Don't let the registry take synthesis down with it; recreate it next time
+            logger.warning(f"Shared request coalescing failed: {str(e)}")
+            self._inflight_registry = None
+            return await call(), False
         
-        # Start a background task to handle completion
-        asyncio.create_task(self._handle_batch_completion(refs))
+        if leader:
+            result = None
+            try:
+                result = await call()
+                return result, False
+            finally:
+                registry.finish.remote(key, result)
+        
+        result = await asyncio.to_thread(
+            ray.get, registry.wait.remote(key, TTS_REQUEST_TIMEOUT_SECONDS)
+        )
+        if result is not None:
+            return result, True
         
-        return job_id
+        # The leader failed or timed out; synthesize on our own
+        return await call(), False
     
-    async def _handle_batch_completion(self, refs):
-        """Handle batch job completion"""
-        
-        async def process_results():
-            """Process the results of a batch job"""
-            # Wait for all items to complete
-            results = await asyncio.to_thread(ray.get, refs)
-            
-            # Update job status
-            for job_id, job in self.batch_jobs.items():
-                if "refs" in job and job["refs"] == refs:
-                    job["items"] = results
-                    job["completed_items"] = sum(1 for r in results if r["status"] == "completed")
-                    job["failed_items"] = sum(1 for r in results if r["status"] == "failed")
-                    job["status"] = "completed"
-                    job["end_time"] = datetime.now().isoformat()
-                    
-                    # Calculate stats
-                    completed = job["completed_items"]
-                    total = job["total_items"]
-                    job["success_rate"] = (completed / total * 100) if total > 0 else 0
+    async def _call_worker(self, model_id: str, output_path: str, submit) -> Dict:
+        """Run a worker call with failover to other replicas and optional hedging
+        
+        ``submit(worker, output_path)`` starts the call and returns its object ref.
+        A call to a dead actor is retried right away on another replica (and the
+        actor replaced). With TTS_HEDGE_ENABLED, a call slower than the model's
+        p95 latency is duplicated on another replica writing to its own file;
+        the first result wins and the other call is cancelled.
+        """
+        start_time = time.time()
+        deadline = start_time + TTS_REQUEST_TIMEOUT_SECONDS
+        
+        model_id, index = self._get_worker(model_id)
+        tried = [index]
+        
+        # Outstanding calls (object ref -> (replica index, worker, submit time))
+        pending = {}
+        worker = self.workers[model_id][index]
+        pending[submit(worker, output_path)] = (index, worker, start_time)
+        
+        hedge_at = start_time + self._hedge_delay(model_id) if TTS_HEDGE_ENABLED else None
+        failures = 0
+        
+        while True:
+            now = time.time()
+            if now >= deadline:
+                for ref in pending:
+                    self._cancel_call(ref, None)
+                raise TimeoutError(f"Speech generation with {model_id} timed out after {TTS_REQUEST_TIMEOUT_SECONDS:.0f}s")
+            
+            timeout = deadline - now
+            if hedge_at is not None:
+                timeout = min(timeout, max(hedge_at - now, 0))
+            
+            ready, _ = await asyncio.to_thread(ray.wait, list(pending), num_returns=1, timeout=timeout)
+            
+            if not ready:
+                if hedge_at is not None and time.time() >= hedge_at:
+                    hedge_at = None
+                    _, index = self._get_worker(model_id, exclude=tried)
+                    if index is not None:
+                        logger.info(f"Hedging slow call to {model_id} on replica {index}")
+                        tried.append(index)
+                        worker = self.workers[model_id][index]
+                        root, ext = os.path.splitext(output_path)
+                        pending[submit(worker, f"{root}_hedge{ext}")] = (index, worker, time.time())
+                continue
+            
+            ref = ready[0]
+            index, worker, submitted_at = pending.pop(ref)
+            
+            try:
+                # The ref is ready, so this does not block
+                result = ray.get(ref)
+            
+            except ray.exceptions.RayActorError as e:
+                logger.warning(f"Worker {model_id}[{index}] died: {str(e)}")
+                self._replace_replica(model_id, index, worker)
+                
+                failures += 1
+                if failures > len(self.workers[model_id]):
+                    raise
+                
+                # A hedged call may still be running; otherwise fail over right away
+                if not pending:
+                    _, retry = self._get_worker(model_id, exclude=tried)
                     
-                    # Clean up refs
-                    job.pop("refs", None)
+                    # Every replica has been tried; use the replacement of this one
+                    retry = index if retry is None else retry
                     
-                    logger.info(f"Batch job {job_id} completed. Success rate: {job['success_rate']}%")
-                    break
+                    tried.append(retry)
+                    worker = self.workers[model_id][retry]
+                    pending[submit(worker, output_path)] = (retry, worker, time.time())
+                continue
+            
+            except Exception:
+                for other in pending:
+                    self._cancel_call(other, None)
+                raise
+            
+            # Cancel the losing call and drop whatever it still writes
+            for other in pending:
+                self._cancel_call(other, result.get("file_path"))
+            
+            self.latency.record(model_id, time.time() - submitted_at)
+            return result
+    
+    def _hedge_delay(self, model_id: str) -> float:
+        """Time after which a call to a model is hedged"""
+        p95 = self.latency.percentile(model_id, TTS_HEDGE_PERCENTILE, min_samples=20)
+        return max(p95 or 0.0, TTS_HEDGE_MIN_DELAY_SECONDS)
+    
+    def _cancel_call(self, ref, keep_path: Optional[str]) -> None:
+        """Cancel a worker call and delete its output unless it is the kept file"""
+        try:
+            ray.cancel(ref)
+        except Exception:
+            # Calls that already run on a threaded actor can't always be cancelled
+            pass
+        
+        def discard(future):
+            try:
+                path = future.result().get("file_path")
+            except Exception:
+                return
+            if path and path != keep_path and os.path.exists(path):
+                os.remove(path)
         
-        # Start the processing task
-        await process_results()
+        ref.future().add_done_callback(discard)
     
-    def get_batch_job_status(self, job_id: str, db: Session = None) -> BatchTTSJobStatus:
-        """Get the status of a batch job"""
-        if job_id not in self.batch_jobs:
-            raise ValueError(f"Batch job {job_id} not found")
-        
-        job = self.batch_jobs[job_id]
-        
-        # Convert to API model
-        items = [
-            BatchTTSItemStatus(
-                id=item["id"],
-                status=item["status"],
-                file_url=item["file_url"],
-                error=item["error"]
-            )
-            for item in job.get("items", [])
-        ]
+    def _get_inflight_registry(self):
+        """Get (or create) the registry shared by all API processes, or None if disabled"""
+        if not TTS_SINGLE_FLIGHT_SHARED:
+            return None
         
-        return BatchTTSJobStatus(
-            job_id=job_id,
-            status=job["status"],
-            total_items=job["total_items"],
-            completed_items=job["completed_items"],
-            failed_items=job["failed_items"],
-            items=items
-        )
+        if self._inflight_registry is None:
+            try:
+                self._inflight_registry = InflightRegistry.options(
+                    name="tts_inflight_registry", lifetime="detached", get_if_exists=True
+                ).remote()
+            except Exception as e:
+                logger.warning(f"Shared request coalescing unavailable: {str(e)}")
+                return None
+        
+        return self._inflight_registry
+    
+    async def submit_batch_job(self, request: BatchTTSRequest, db: AsyncSession = None) -> str:
+        """Submit a batch TTS job"""
+        if db is None:
+            async with AsyncSessionLocal() as db:
+                return await self.submit_batch_job(request, db=db)
+        
+        # Initialize models if needed
+        if not self.workers:
+            self._initialize_models(db)
+        
+        return await self.batch_engine.submit(request, db)
+    
+    def get_queue_status(self) -> List[Dict]:
+        """Get the queued work and estimated wait of every model"""
+        return self.admission.get_status()
+    
+    async def get_batch_job_status(
+        self, 
+        job_id: str, 
+        db: AsyncSession = None, 
+        after: Optional[str] = None, 
+        limit: Optional[int] = None, 
+        summary: bool = False
+    ) -> BatchTTSJobStatus:
+        """Get the status of a batch job with a page of its items"""
+        if db is None:
+            async with AsyncSessionLocal() as db:
+                return await self.get_batch_job_status(job_id, db=db, after=after, limit=limit, summary=summary)
+        
+        return await self.batch_engine.get_status(job_id, db, after=after, limit=limit, summary=summary)
     
     def list_available_models(self, db: Session = None) -> List[ModelInfo]:
         """List available TTS models"""
-        if db is None:
-            db = next(get_db())
+        return self.get_model_registry(db)[1]
+    
+    def model_registry_version(self) -> str:
+        """Version of the installed models
+        
+        Adding or removing a model directory changes the mtime of MODEL_DIR, so
+        one stat() tells whether the models need to be scanned again; downloads
+        and deletions through this service also bump the revision.
+        """
+        try:
+            mtime = os.stat(MODEL_DIR).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
         
+        return f"{self._model_registry_revision}-{mtime:x}"
+    
+    def get_model_registry(self, db: Session = None) -> Tuple[str, List[ModelInfo]]:
+        """Get the ETag and the list of available TTS models, scanning MODEL_DIR only when it changed"""
         # Initialize models if needed
         if not self.workers:
             self._initialize_models(db)
         
+        version = self.model_registry_version()
+        registry = self._model_registry
+        if registry is None or registry[0] != version:
+            models = self._scan_models()
+            digest = hashlib.sha256(
+                json.dumps([model.dict() for model in models], sort_keys=True).encode("utf-8")
+            ).hexdigest()
+            registry = (version, f'"{digest[:32]}"', models)
+            self._model_registry = registry
+        
+        return registry[1], registry[2]
+    
+    def _scan_models(self) -> List[ModelInfo]:
+        """Read the info of every model in MODEL_DIR"""
         models = []
         
         # Check the models directory for available models
@@ -847,16 +1159,18 @@ class TextToSpeechService:
             
             # Get worker stats
             worker_stats = []
-            for model_id, worker in self.workers.items():
-                try:
-                    stats = ray.get(worker.get_stats.remote())
-                    worker_stats.append({
-                        "model_id": model_id,
-                        "tasks_processed": stats["tasks_processed"],
-                        "last_accessed": stats["last_accessed"]
-                    })
-                except Exception as e:
-                    logger.error(f"Error getting stats for worker {model_id}: {str(e)}")
+            for model_id, replicas in self.workers.items():
+                for replica_index, worker in enumerate(replicas):
+                    try:
+                        stats = ray.get(worker.get_stats.remote())
+                        worker_stats.append({
+                            "model_id": model_id,
+                            "replica": replica_index,
+                            "tasks_processed": stats["tasks_processed"],
+                            "last_accessed": stats["last_accessed"]
+                        })
+                    except Exception as e:
+                        logger.error(f"Error getting stats for worker {model_id}[{replica_index}]: {str(e)}")
             
             # Get detailed node metrics
             node_metrics = []
@@ -957,7 +1271,8 @@ class TextToSpeechService:
                 jobs_pending=job_stats["pending"],
                 jobs_running=job_stats["running"],
                 jobs_completed=job_stats["completed"],
-                jobs_failed=job_stats["failed"]
+                jobs_failed=job_stats["failed"],
+                request_log=self.request_log.get_stats()
             )
             
         except Exception as e:
@@ -1008,11 +1323,15 @@ class TextToSpeechService:
             
             # Reload the model in the service
             if model_id in self.workers:
-                # Remove existing worker
-                del self.workers[model_id]
+                # Remove existing workers
+                self._remove_replicas(model_id)
             
-            # Create a new worker for this model
-            self.workers[model_id] = TTSWorker.remote(model_id)
+            # Create new workers for this model
+            self._create_replicas(model_id)
+            
+            # Route languages to the new model from now on
+            self.router.invalidate()
+            self._model_registry_revision += 1
             
             return {
                 "success": True,
@@ -1031,9 +1350,10 @@ class TextToSpeechService:
             }
     
     async def get_huggingface_leaderboard(self, limit: int = 10, db: Session = None) -> List[Dict]:
-        """Get the Hugging Face TTS model leaderboard"""
-        if db is None:
-            db = next(get_db())
+        """Get the Hugging Face TTS model leaderboard, cached for LEADERBOARD_CACHE_SECONDS"""
+        cached = self._leaderboard_cache.get(limit)
+        if cached and time.time() - cached[0] < LEADERBOARD_CACHE_SECONDS:
+            return cached[1]
         
         # Import the model download script
         import sys
@@ -1061,7 +1381,8 @@ class TextToSpeechService:
             if not models:
                 logger.warning("No models returned from Hugging Face API, using fallback list")
                 return self._get_fallback_models()
-                
+            
+            self._leaderboard_cache[limit] = (time.time(), models)
             return models
             
         except Exception as e:
@@ -1150,13 +1471,17 @@ class TextToSpeechService:
                     "message": f"Model {model_id} not found"
                 }
             
-            # Remove the worker if it exists
+            # Remove the workers if they exist
             if model_id in self.workers:
-                del self.workers[model_id]
+                self._remove_replicas(model_id)
             
             # Delete the model directory
             shutil.rmtree(model_dir)
             
+            # Stop routing languages to the deleted model
+            self.router.invalidate()
+            self._model_registry_revision += 1
+            
             return {
                 "success": True,
                 "model_id": model_id,
@@ -0,0 +1,53 @@
+import ray
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+@ray.remote(num_cpus=0)
+class InflightRegistry:
+    """Ray Actor tracking the TTS syntheses in flight across all API processes
+
+    The first process to acquire a request key becomes its leader and
+    publishes the worker result when it is done; other processes asking for
+    the same key wait for that result instead of starting a second synthesis.
+    Entries whose leader never finished (e.g. its process died) expire after
+    the given time-to-live and can then be acquired again.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        # In-flight syntheses (key -> {"done": asyncio.Event, "result": dict or None, "expires": timestamp})
+        self.entries: Dict[str, Dict] = {}
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        """Register a synthesis, returning False if one is already in flight"""
+        entry = self.entries.get(key)
+        if entry is not None and entry["expires"] > time.time():
+            return False
+
+        self.entries[key] = {"done": asyncio.Event(), "result": None, "expires": time.time() + ttl}
+        return True
+
+    async def finish(self, key: str, result: Optional[Dict]) -> None:
+        """Publish the leader's result (None if it failed) and remove the entry"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            entry["result"] = result
+            entry["done"].set()
+
+    async def wait(self, key: str, timeout: float) -> Optional[Dict]:
+        """Wait for the leader's result, or None if there is no leader or it failed"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        try:
+            await asyncio.wait_for(entry["done"].wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        return entry["result"]
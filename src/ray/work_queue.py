@@ -0,0 +1,57 @@
+import ray
+import logging
+from typing import Dict, List
+
+# Local imports
+from src.core.models import Priority
+from src.core.scheduler import FairShareQueue
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+@ray.remote(num_cpus=0)
+class WorkQueue:
+    """Ray Actor holding the queued micro-batches of one model
+
+    Replicas of the model pull work when they have free capacity instead of
+    having it pushed to them at submit time, so fast replicas automatically
+    take over the backlog of slow ones. Pulls are served in priority order
+    (batch before background) and with weighted fair sharing between the
+    jobs of a class.
+    """
+
+    def __init__(self, model_id: str):
+        """Initialize an empty queue for a model"""
+        self.model_id = model_id
+        self.queue = FairShareQueue()
+
+        # Track statistics
+        self.batches_queued = 0
+        self.batches_pulled = 0
+
+    def put(self, job_id: str, batches: List[Dict], priority: str = Priority.BATCH.value,
+            weight: float = 1.0) -> int:
+        """Queue micro-batches for a job and return the job's backlog length"""
+        self.batches_queued += len(batches)
+        return self.queue.put(job_id, batches, priority=priority, weight=weight)
+
+    def pull(self, max_batches: int = 1) -> List[Dict]:
+        """Take up to max_batches micro-batches in priority and fair-share order"""
+        batches = self.queue.pull(max_batches)
+        self.batches_pulled += len(batches)
+        return batches
+
+    def cancel_job(self, job_id: str) -> int:
+        """Drop all queued micro-batches of a job and return how many were dropped"""
+        return self.queue.cancel(job_id)
+
+    def get_stats(self) -> Dict:
+        """Get queue statistics"""
+        backlogs = self.queue.backlogs()
+        return {
+            "model_id": self.model_id,
+            "queued_batches": sum(backlogs.values()),
+            "backlogs": backlogs,
+            "batches_queued": self.batches_queued,
+            "batches_pulled": self.batches_pulled
+        }
@@ -6,6 +6,7 @@ import time
 import json
 import unittest
 import sys
+from datetime import datetime, timedelta, timezone
 
 # The base URL for API requests (use the host where Docker containers are running)
 API_BASE_URL = os.environ.get('API_BASE_URL', 'http://localhost/api')
@@ -13,6 +14,38 @@ API_BASE_URL = os.environ.get('API_BASE_URL', 'http://localhost/api')
 # Set to True to print more debug information
 DEBUG = os.environ.get('DEBUG', 'false').lower() == 'true'
 
+# The in-process service tests need the application code, its dependencies and
+# the database (DATABASE_URL), as in the api-test container; elsewhere they are skipped
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+try:
+    from src.core.db_models import SessionLocal
+    SERVICES_AVAILABLE = True
+except Exception:
+    SERVICES_AVAILABLE = False
+
+def init_local_ray():
+    """Start a local Ray instance whose workers can import the application code
+
+    The service modules only join the cluster (RAY_ADDRESS) if Ray is not initialized yet.
+    """
+    import ray
+    if not ray.is_initialized():
+        ray.init(num_cpus=4, include_dashboard=False, runtime_env={"env_vars": {"PYTHONPATH": REPO_ROOT}})
+
+def wait_for_batch_job(test_case, job_id, timeout=120):
+    """Poll a batch job's summary until it finishes and return the final summary"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = requests.get(f"{API_BASE_URL}/batch-tts/{job_id}/status", params={'summary': 'true'})
+        test_case.assertEqual(response.status_code, 200)
+        status = response.json()
+        if status['status'] in ['completed', 'failed']:
+            return status
+        time.sleep(2)
+    
+    test_case.fail(f"Batch job {job_id} did not finish within {timeout}s")
+
 class TestTTSAPI(unittest.TestCase):
     """Test suite for Text-to-Speech API endpoints"""
     
@@ -144,6 +177,50 @@ class TestTTSAPI(unittest.TestCase):
         except Exception as e:
             self.fail(f"Unexpected error: {str(e)}")
     
+    def test_generate_speech_unknown_model(self):
+        """Test that an unknown model override is rejected"""
+        payload = {
+            "text": "This is a test of the text-to-speech API.",
+            "language": "en",
+            "model": "unknown/model"
+        }
+        
+        try:
+            response = requests.post(f"{API_BASE_URL}/tts", json=payload)
+            self.assertEqual(response.status_code, 400)
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_concurrent_identical_requests_are_coalesced(self):
+        """Test that identical requests in flight at the same time share one synthesis"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        payload = {
+            "text": f"Coalesced request {time.time()}.",
+            "language": "en",
+            "avatar": {
+                "gender": "female",
+                "dialect": "en-US"
+            }
+        }
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            responses = list(executor.map(lambda _: requests.post(f"{API_BASE_URL}/tts", json=payload), range(3)))
+        
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+        
+        # One synthesis, one file
+        audio_urls = {response.json()['audio_url'] for response in responses}
+        self.assertEqual(len(audio_urls), 1)
+        
+        # Every request still gets its own history entry (logged in the background)
+        time.sleep(2)
+        response = requests.get(f"{API_BASE_URL}/tts/history/search", params={'q': payload['text']})
+        self.assertEqual(response.status_code, 200)
+        matches = [item for item in response.json()['items'] if item['text'] == payload['text']]
+        self.assertEqual(len(matches), 3)
+    
     def test_batch_processing(self):
         """Test batch processing of TTS requests"""
         if DEBUG:
@@ -229,6 +306,234 @@ class TestTTSAPI(unittest.TestCase):
         except Exception as e:
             self.fail(f"Unexpected error: {str(e)}")
     
+    def test_batch_job_spanning_micro_batches(self):
+        """Test that a job split over several micro-batches and replicas runs to completion"""
+        # More items than fit in one micro-batch (BATCH_MICRO_BATCH_SIZE, 8 by default)
+        payload = {
+            "items": [
+                {"id": f"span-item-{i}", "text": f"Micro-batch item number {i} of twenty.", "language": "en"}
+                for i in range(20)
+            ]
+        }
+        
+        try:
+            response = requests.post(f"{API_BASE_URL}/batch-tts", json=payload)
+            self.assertEqual(response.status_code, 200)
+            job_id = response.json()['job_id']
+            
+            summary = wait_for_batch_job(self, job_id)
+            self.assertEqual(summary['status'], 'completed')
+            self.assertEqual(summary['completed_items'], 20)
+            
+            items = requests.get(f"{API_BASE_URL}/batch-tts/{job_id}/status").json()['items']
+            self.assertEqual(len({item['file_url'] for item in items}), 20)
+            
+            # Nothing stays reserved once the job is done
+            for queue in requests.get(f"{API_BASE_URL}/queue-status").json():
+                self.assertEqual(queue['batch_requests'], 0)
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_batch_progress_is_reported_incrementally(self):
+        """Test that finished items are visible while the rest of the job is still running"""
+        payload = {
+            "items": [
+                {"id": f"progress-item-{i}", "text": f"Progress report item {i}, one at a time.", "language": "en"}
+                for i in range(16)
+            ]
+        }
+        
+        try:
+            response = requests.post(f"{API_BASE_URL}/batch-tts", json=payload)
+            self.assertEqual(response.status_code, 200)
+            job_id = response.json()['job_id']
+            
+            # Progress only moves forward, and finished items come with their output
+            progress = []
+            deadline = time.time() + 120
+            while time.time() < deadline:
+                status = requests.get(f"{API_BASE_URL}/batch-tts/{job_id}/status").json()
+                done = [item for item in status['items'] if item['status'] in ['completed', 'failed']]
+                # The items are read after the counters, so they may be ahead of them
+                self.assertGreaterEqual(len(done), status['completed_items'] + status['failed_items'])
+                for item in done:
+                    if item['status'] == 'completed':
+                        self.assertIsNotNone(item['file_url'])
+                
+                progress.append(len(done))
+                if status['status'] in ['completed', 'failed']:
+                    break
+                time.sleep(0.5)
+            
+            self.assertEqual(progress, sorted(progress))
+            self.assertEqual(progress[-1], 16)
+            self.assertEqual(status['status'], 'completed')
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_batch_status_pages_and_deltas(self):
+        """Test paginated, delta and summary-only batch job status"""
+        payload = {
+            "items": [
+                {"id": "page-item-1", "text": "First item of the paged job.", "language": "en"},
+                {"id": "page-item-2", "text": "Second item of the paged job.", "language": "en"}
+            ]
+        }
+        
+        try:
+            response = requests.post(f"{API_BASE_URL}/batch-tts", json=payload)
+            self.assertEqual(response.status_code, 200)
+            status_url = f"{API_BASE_URL}/batch-tts/{response.json()['job_id']}/status"
+            
+            # One item per page
+            first_page = requests.get(status_url, params={'limit': 1}).json()
+            self.assertEqual(len(first_page['items']), 1)
+            self.assertIsNotNone(first_page['next_cursor'])
+            self.assertIsNone(first_page['delta_cursor'])
+            
+            second_page = requests.get(status_url, params={'limit': 1, 'cursor': first_page['next_cursor']}).json()
+            self.assertEqual(len(second_page['items']), 1)
+            self.assertNotEqual(first_page['items'][0]['id'], second_page['items'][0]['id'])
+            
+            # Summaries carry the counters only
+            summary = requests.get(status_url, params={'summary': 'true'}).json()
+            self.assertEqual(summary['items'], [])
+            self.assertEqual(summary['total_items'], 2)
+            
+            # Items only come back once they change
+            full = requests.get(status_url).json()
+            self.assertIsNotNone(full['delta_cursor'])
+            delta = requests.get(status_url, params={'since': full['delta_cursor']}).json()
+            for item in delta['items']:
+                self.assertIn(item['status'], ['completed', 'failed'])
+            
+            # Malformed cursors are rejected
+            response = requests.get(status_url, params={'since': 'not-a-cursor'})
+            self.assertEqual(response.status_code, 400)
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_audio_range_and_etag(self):
+        """Test byte-range and conditional requests for generated audio"""
+        payload = {
+            "text": "Checking range requests for audio scrubbing.",
+            "language": "en"
+        }
+        
+        try:
+            response = requests.post(f"{API_BASE_URL}/tts", json=payload)
+            self.assertEqual(response.status_code, 200)
+            audio_url = response.json()['audio_url']
+            
+            # Full download exposes an ETag
+            full_response = requests.get(f"http://localhost{audio_url}")
+            self.assertEqual(full_response.status_code, 200)
+            etag = full_response.headers.get('ETag')
+            self.assertIsNotNone(etag)
+            
+            # Conditional request is answered without a body
+            cached_response = requests.get(
+                f"http://localhost{audio_url}",
+                headers={'If-None-Match': etag}
+            )
+            self.assertEqual(cached_response.status_code, 304)
+            
+            # Range request returns a partial response
+            if len(full_response.content) > 1:
+                range_response = requests.get(
+                    f"http://localhost{audio_url}",
+                    headers={'Range': 'bytes=0-0'}
+                )
+                self.assertEqual(range_response.status_code, 206)
+                self.assertEqual(len(range_response.content), 1)
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_catalog_etags(self):
+        """Test conditional requests for the catalog and model-list endpoints"""
+        try:
+            for path in ("languages", "avatars", "models"):
+                response = requests.get(f"{API_BASE_URL}/{path}")
+                self.assertEqual(response.status_code, 200)
+                etag = response.headers.get('ETag')
+                self.assertIsNotNone(etag)
+                self.assertIn('max-age', response.headers.get('Cache-Control', ''))
+                
+                # Unchanged data is revalidated without a body
+                cached_response = requests.get(
+                    f"{API_BASE_URL}/{path}",
+                    headers={'If-None-Match': etag}
+                )
+                self.assertEqual(cached_response.status_code, 304)
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_history_cursor_pagination(self):
+        """Test keyset pagination of the TTS history"""
+        try:
+            response = requests.get(f"{API_BASE_URL}/tts/history", params={'limit': 1})
+            self.assertEqual(response.status_code, 200)
+            first_page = response.json()
+            self.assertIn('next_cursor', first_page)
+            
+            if first_page['next_cursor']:
+                response = requests.get(
+                    f"{API_BASE_URL}/tts/history",
+                    params={'limit': 1, 'cursor': first_page['next_cursor']}
+                )
+                self.assertEqual(response.status_code, 200)
+                second_page = response.json()
+                self.assertNotEqual(first_page['items'][0]['id'], second_page['items'][0]['id'])
+            
+            # Malformed cursors are rejected
+            response = requests.get(f"{API_BASE_URL}/tts/history", params={'cursor': 'not-a-cursor'})
+            self.assertEqual(response.status_code, 400)
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_history_search(self):
+        """Test finding a generated clip by its text"""
+        payload = {
+            "text": "The quartermaster inventoried seventeen lanterns.",
+            "language": "en"
+        }
+        
+        try:
+            response = requests.post(f"{API_BASE_URL}/tts", json=payload)
+            self.assertEqual(response.status_code, 200)
+            
+            # Requests are logged in the background
+            time.sleep(2)
+            
+            # Partial words ('lantern' for 'lanterns') still match through trigram similarity
+            response = requests.get(f"{API_BASE_URL}/tts/history/search", params={'q': 'quartermaster lantern'})
+            self.assertEqual(response.status_code, 200)
+            results = response.json()
+            self.assertGreater(len(results['items']), 0)
+            self.assertIn('score', results['items'][0])
+            self.assertTrue(any(item['text'] == payload['text'] for item in results['items']))
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
+    def test_queue_status(self):
+        """Test getting the per-model queue state"""
+        if DEBUG:
+            print(f"Testing API endpoint: {API_BASE_URL}/queue-status")
+        
+        try:
+            response = requests.get(f"{API_BASE_URL}/queue-status")
+            self.assertEqual(response.status_code, 200)
+            queues = response.json()
+            self.assertIsInstance(queues, list)
+            
+            for queue in queues:
+                self.assertIn('model_id', queue)
+                self.assertIn('queued_audio_seconds', queue)
+                self.assertIn('estimated_wait_seconds', queue)
+        
+        except requests.RequestException as e:
+            self.fail(f"API request failed: {str(e)}")
+    
     def test_system_stats(self):
         """Test getting system statistics"""
         if DEBUG:
@@ -260,6 +565,880 @@ class TestTTSAPI(unittest.TestCase):
         except Exception as e:
             self.fail(f"Unexpected error: {str(e)}")
 
+@unittest.skipUnless(SERVICES_AVAILABLE, "application dependencies are not installed")
+class TestTTSServices(unittest.TestCase):
+    """In-process tests of the background services against the test database"""
+    
+    def setUp(self):
+        """Open a database session for the test"""
+        self.db = SessionLocal()
+    
+    def tearDown(self):
+        """Close the test's database session"""
+        self.db.rollback()
+        self.db.close()
+    
+    def test_cost_model_refresh_and_predict(self):
+        """Test that the cost model refits off the request path and predicts from its fits"""
+        from src.core.cost_model import CostModel, MIN_COST_SECONDS
+        
+        cost_model = CostModel()
+        
+        # Without fits, estimates fall back to the default real-time factor
+        short = cost_model.predict("some-model", "en", "Short.")
+        long = cost_model.predict("some-model", "en", "A much longer text " * 20)
+        self.assertGreaterEqual(short, MIN_COST_SECONDS)
+        self.assertGreater(long, short)
+        
+        # Language fits take precedence over the model's fit across languages
+        cost_model.fits = {("some-model", "en"): (0.5, 0.01, 50), ("some-model", None): (1.0, 0.02, 80)}
+        self.assertAlmostEqual(cost_model.predict("some-model", "en", "x" * 100), 1.5)
+        self.assertAlmostEqual(cost_model.predict("some-model", "de", "x" * 100), 3.0)
+        
+        # A refresh reads the history through its own session
+        self.assertIsInstance(cost_model.refresh(), int)
+        self.assertGreater(cost_model.refreshed_at, 0)
+    
+    def test_orphaned_batch_job_is_resumed(self):
+        """Test that a job whose owner stopped heartbeating is resumed by a running API"""
+        from src.core.db_models import BatchJob
+        from src.core.db_service import db_service
+        from src.core.models import BatchTTSRequest, BatchTTSItem
+        
+        request = BatchTTSRequest(items=[
+            BatchTTSItem(id="orphan-item-1", text="Resumed after its owner went away.", language="en")
+        ])
+        job_id = db_service.create_batch_job(self.db, request)
+        
+        # As if the owning process had died mid-job an hour ago
+        self.db.query(BatchJob).filter(BatchJob.id == job_id).update(
+            {BatchJob.status: "processing", BatchJob.updated_at: datetime.now(timezone.utc) - timedelta(hours=1)},
+            synchronize_session=False
+        )
+        self.db.commit()
+        self.assertIn(job_id, db_service.get_resumable_batch_jobs(self.db, 120))
+        
+        # The API's periodic scan (BATCH_JOB_RESUME_INTERVAL_SECONDS) claims and finishes it
+        summary = wait_for_batch_job(self, job_id, timeout=240)
+        self.assertEqual(summary['status'], 'completed')
+        self.assertEqual(summary['completed_items'], 1)
+    
+    def test_request_log_flush_and_spill_replay(self):
+        """Test that buffered rows are flushed on stop and spilled rows replayed, minus rejected ones"""
+        import asyncio
+        import tempfile
+        from unittest import mock
+        from src.core import request_log
+        from src.core.db_models import TTSRequest
+        
+        marker = f"write-behind {time.time()}"
+        
+        def row(text, language_code):
+            return {
+                "text": text, "language_code": language_code, "model": None, "avatar": None,
+                "file_path": None, "duration_seconds": 1.0, "processing_time": 0.5,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+        
+        with tempfile.TemporaryDirectory() as spill_dir:
+            spill_path = os.path.join(spill_dir, "spill.jsonl")
+            with mock.patch.object(request_log, "REQUEST_LOG_SPILL_PATH", spill_path):
+                logger = request_log.RequestLogger()
+                
+                # Spilled while the database was away: a valid row and one it will never accept
+                logger._spill([row(f"{marker} spilled", "en"), row(f"{marker} rejected", "not-a-language-code")])
+                
+                async def log_and_stop():
+                    logger.log(f"{marker} buffered", "en", None, None, None, 1.0, 0.5)
+                    await logger.stop()
+                
+                asyncio.run(log_and_stop())
+                
+                texts = {
+                    text for (text,) in self.db.query(TTSRequest.text).filter(TTSRequest.text.like(f"{marker}%"))
+                }
+                self.assertEqual(texts, {f"{marker} buffered", f"{marker} spilled"})
+                self.assertFalse(logger._spill_pending())
+                
+                # The rejected row is set aside instead of blocking later replays
+                with open(f"{spill_path}.dead") as f:
+                    dead = [json.loads(line) for line in f]
+                self.assertEqual([entry["row"]["text"] for entry in dead], [f"{marker} rejected"])
+                self.assertEqual(logger.get_stats()["rows_dead_lettered"], 1)
+    
+    def test_batch_dedup_within_and_across_jobs(self):
+        """Test that identical items share one output, across jobs only for the same model"""
+        from src.core.db_models import BatchJobItem, TTSModel
+        
+        text = f"Deduplicated batch text {time.time()}."
+        job_ids = []
+        
+        def run_job(item_ids, item_text=text):
+            response = requests.post(f"{API_BASE_URL}/batch-tts", json={
+                "items": [{"id": item_id, "text": item_text, "language": "en"} for item_id in item_ids]
+            })
+            self.assertEqual(response.status_code, 200)
+            job_id = response.json()['job_id']
+            job_ids.append(job_id)
+            summary = wait_for_batch_job(self, job_id)
+            self.assertEqual(summary['status'], 'completed')
+            
+            self.db.expire_all()
+            items = self.db.query(BatchJobItem).filter(BatchJobItem.job_id == job_id).all()
+            return summary, {item.id: item for item in items}
+        
+        # Within a job: synthesized once, fanned out to both items
+        summary, first = run_job(["dedup-1", "dedup-2"])
+        self.assertEqual(summary['deduplicated_items'], 1)
+        self.assertEqual(first["dedup-1"].file_url, first["dedup-2"].file_url)
+        self.assertIsNotNone(first["dedup-1"].model_id)
+        
+        # Across jobs: the recent output of the same model is reused for text that normalizes the same
+        summary, second = run_job(["dedup-3"], item_text=f"  {text.replace(' ', '   ')} ")
+        self.assertEqual(summary['deduplicated_items'], 1)
+        self.assertEqual(second["dedup-3"].file_url, first["dedup-1"].file_url)
+        self.assertEqual(second["dedup-3"].model_id, first["dedup-1"].model_id)
+        
+        # Outputs of another model are never handed out
+        model_id = first["dedup-1"].model_id
+        other_model = self.db.query(TTSModel.id).filter(TTSModel.id != model_id).first()
+        if other_model is None:
+            self.skipTest("needs a second model in tts_models")
+        
+        # Attribute this test's outputs to the other model, and give them back afterwards
+        own_items = self.db.query(BatchJobItem).filter(BatchJobItem.job_id.in_(job_ids))
+        own_items.update({BatchJobItem.model_id: other_model.id}, synchronize_session=False)
+        self.db.commit()
+        try:
+            summary, third = run_job(["dedup-4"])
+            self.assertEqual(summary['deduplicated_items'], 0)
+            self.assertNotEqual(third["dedup-4"].file_url, first["dedup-1"].file_url)
+        finally:
+            self.db.rollback()
+            self.db.query(BatchJobItem).filter(
+                BatchJobItem.job_id.in_(job_ids[:2])
+            ).update({BatchJobItem.model_id: model_id}, synchronize_session=False)
+            self.db.commit()
+    
+    def test_batch_admission_reserves_capacity(self):
+        """Test that an admitted job holds its audio-seconds until released"""
+        from src.core.admission import AdmissionController, AdmissionRejected
+        from src.config import ADMISSION_MAX_QUEUED_AUDIO_SECONDS, BATCH_MAX_AUDIO_SECONDS_PER_JOB
+        
+        admission = AdmissionController()
+        share = min(ADMISSION_MAX_QUEUED_AUDIO_SECONDS / 2, BATCH_MAX_AUDIO_SECONDS_PER_JOB)
+        
+        # Leave room for one and a half jobs
+        queued = ADMISSION_MAX_QUEUED_AUDIO_SECONDS - 1.5 * share
+        admission.reserve("some-model", queued, requests=0)
+        
+        admission.admit_batch({"some-model": share})
+        self.assertAlmostEqual(admission.get_status()[0]['queued_audio_seconds'], round(queued + share, 2))
+        
+        # A second job of the same size no longer fits while the first one holds its share
+        with self.assertRaises(AdmissionRejected) as rejected:
+            admission.admit_batch({"some-model": share})
+        self.assertIsNotNone(rejected.exception.retry_after)
+        
+        admission.release("some-model", share, requests=0)
+        admission.admit_batch({"some-model": share})
+    
+    def test_audio_lifecycle_retries_protected_files(self):
+        """Test that a file skipped while pinned is expired once unpinned, although the cursor moved on"""
+        import tempfile
+        from unittest import mock
+        from sqlalchemy import text as sql_text
+        from src.core.audio_lifecycle import AudioLifecycleManager, LIFECYCLE_LOCK_KEY
+        from src.core.db_models import BatchJob, BatchJobItem
+        from src.core.db_service import db_service
+        from src.core.models import BatchTTSRequest, BatchTTSItem
+        
+        # Keep the API's lifecycle out of the way while the cursor is moved around
+        deadline = time.time() + 60
+        while not self.db.execute(sql_text("SELECT pg_try_advisory_lock(:key)"), {"key": LIFECYCLE_LOCK_KEY}).scalar():
+            self.assertLess(time.time(), deadline, "lifecycle lock not released")
+            time.sleep(1)
+        
+        db = SessionLocal()
+        cursor_name = "expire:batch_job_items"
+        saved_cursor = db_service.get_audio_lifecycle_cursor(db, cursor_name)
+        try:
+            with tempfile.TemporaryDirectory() as output_dir:
+                filename = f"lifecycle-{time.time_ns()}.mp3"
+                path = os.path.join(output_dir, filename)
+                with open(path, "wb") as f:
+                    f.write(b"audio")
+                
+                # A finished item referencing the file, created long before anything else
+                created_at = datetime(2000, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=time.time() % 86400)
+                job_id = db_service.create_batch_job(db, BatchTTSRequest(items=[
+                    BatchTTSItem(id="lifecycle-item", text="Old output.", language="en")
+                ]))
+                db.query(BatchJob).filter(BatchJob.id == job_id).update(
+                    {BatchJob.status: "completed"}, synchronize_session=False
+                )
+                db.query(BatchJobItem).filter(BatchJobItem.job_id == job_id).update(
+                    {
+                        BatchJobItem.status: "completed",
+                        BatchJobItem.file_url: f"/audio-output/{filename}",
+                        BatchJobItem.created_at: created_at
+                    },
+                    synchronize_session=False
+                )
+                db_service.set_audio_lifecycle_cursor(
+                    db, cursor_name, {"created_at": (created_at - timedelta(seconds=1)).isoformat(), "key": ["", ""]}
+                )
+                db.commit()
+                db_service.pin_audio_file(db, filename)
+                
+                manager = AudioLifecycleManager(output_dir)
+                cutoff = created_at + timedelta(seconds=1)
+                
+                # Files deferred by the API live in its own output directory
+                get_deferred = db_service.get_deferred_audio_files
+                own_deferred = mock.patch.object(
+                    db_service, "get_deferred_audio_files",
+                    lambda db, stage: [row for row in get_deferred(db, stage) if row["filename"] == filename]
+                )
+                
+                # Pinned: skipped and deferred, while the cursor moves past the row
+                counts = {}
+                with own_deferred:
+                    manager._run_stage(db, "expire", cutoff, counts)
+                self.assertEqual(counts.get("protected"), 1)
+                self.assertTrue(os.path.exists(path))
+                position = db_service.get_audio_lifecycle_cursor(db, cursor_name)
+                self.assertEqual(datetime.fromisoformat(position["created_at"]), created_at)
+                self.assertIn(filename, [row["filename"] for row in get_deferred(db, "expire")])
+                
+                # Unpinned: the next run expires it from the deferred files
+                db_service.unpin_audio_file(db, filename)
+                counts = {}
+                with own_deferred:
+                    manager._run_stage(db, "expire", cutoff, counts)
+                self.assertEqual(counts.get("deleted"), 1)
+                self.assertFalse(os.path.exists(path))
+                self.assertNotIn(filename, [row["filename"] for row in get_deferred(db, "expire")])
+                
+                db.expire_all()
+                item = db.query(BatchJobItem).filter(BatchJobItem.job_id == job_id).one()
+                self.assertIsNone(item.file_url)
+        
+        finally:
+            db.rollback()
+            if saved_cursor:
+                db_service.set_audio_lifecycle_cursor(db, cursor_name, saved_cursor)
+                db.commit()
+            db.close()
+            self.db.execute(sql_text("SELECT pg_advisory_unlock(:key)"), {"key": LIFECYCLE_LOCK_KEY})
+    
+    def test_normalize_text_abbreviations(self):
+        """Test that abbreviations are only expanded as whole words and in context"""
+        from src.core.text_frontend import normalize_text
+        
+        self.assertEqual(normalize_text("Dr. Smith vs. Mr. Jones", "en"), "Doctor Smith versus Mister Jones")
+        self.assertEqual(normalize_text("Flight No. 5 to St. Louis", "en"), "Flight number five to Saint Louis")
+        
+        # Ambiguous abbreviations are left alone out of context
+        self.assertEqual(normalize_text("I said No.", "en"), "I said No.")
+        self.assertEqual(normalize_text("We met on Main St.", "en"), "We met on Main St.")
+        
+        # Only whole words
+        self.assertEqual(normalize_text("Ask the devs. They know", "en"), "Ask the devs. They know")
+        self.assertEqual(normalize_text("Dr. Smith", "de"), "Dr. Smith")
+    
+    def test_speaker_cache_backs_off_failed_recordings(self):
+        """Test that a recording that fails to compute is not recomputed on every request"""
+        import tempfile
+        from unittest import mock
+        from src.core import speakers
+        
+        calls = []
+        
+        def compute(reference_path):
+            calls.append(reference_path)
+            if len(calls) == 1:
+                raise RuntimeError("unreadable recording")
+            return [0.5, 0.25]
+        
+        with tempfile.TemporaryDirectory() as voice_dir, tempfile.TemporaryDirectory() as model_path:
+            with mock.patch.object(speakers, "AVATAR_VOICE_DIR", voice_dir):
+                cache = speakers.SpeakerCache(model_path, compute)
+                with open(os.path.join(voice_dir, "female_default.wav"), "wb") as f:
+                    f.write(b"RIFF")
+                
+                # The failure is remembered: the default voice until the backoff expires
+                self.assertIsNone(cache.get({"gender": "female"}))
+                self.assertIsNone(cache.get({"gender": "female"}))
+                self.assertEqual(len(calls), 1)
+                self.assertEqual(cache.get_stats()["failed"], 1)
+                
+                cache.failures["female_default"] = 0
+                self.assertEqual(cache.get({"gender": "female"}), [0.5, 0.25])
+                self.assertEqual(len(calls), 2)
+                self.assertEqual(cache.get_stats()["failed"], 0)
+    
+    def test_fair_share_queue_ordering(self):
+        """Test that micro-batches are served by priority class, then in proportion to job weights"""
+        from src.core.models import Priority
+        from src.core.scheduler import FairShareQueue
+        
+        queue = FairShareQueue()
+        queue.put("heavy", [{"job": "heavy", "cost": 1.0} for _ in range(8)], weight=1.0)
+        queue.put("light", [{"job": "light", "cost": 1.0} for _ in range(8)], weight=3.0)
+        
+        # Weights 3:1 share the capacity 3:1
+        served = [batch["job"] for batch in queue.pull(8)]
+        self.assertEqual(served.count("light"), 6)
+        self.assertEqual(served.count("heavy"), 2)
+        
+        # A better priority class overtakes both, cheapest micro-batch of a job first
+        queue.put("urgent", [{"job": "urgent", "cost": 5.0}, {"job": "urgent", "cost": 0.5}],
+                  priority=Priority.INTERACTIVE)
+        self.assertEqual([batch["cost"] for batch in queue.pull(2)], [0.5, 5.0])
+        
+        # A new job starts level with the active ones instead of catching up on them
+        queue.put("late", [{"job": "late", "cost": 1.0} for _ in range(4)], weight=1.0)
+        served = [batch["job"] for batch in queue.pull(4)]
+        self.assertLessEqual(served.count("late"), 2)
+        
+        backlog = queue.backlogs()["late"]
+        self.assertEqual(queue.cancel("late"), backlog)
+        self.assertNotIn("late", queue.backlogs())
+    
+    def test_slow_calls_are_hedged_and_dead_workers_failed_over(self):
+        """Test that a call slower than the hedge delay is duplicated, and a dead replica skipped"""
+        import asyncio
+        import itertools
+        import tempfile
+        from types import SimpleNamespace
+        from unittest import mock
+        import ray
+        
+        init_local_ray()
+        from src.core import tts_service
+        from src.core.latency import LatencyTracker
+        
+        @ray.remote(max_concurrency=4)
+        class FakeWorker:
+            def __init__(self, model_id, delay=0.0):
+                self.delay = delay
+            
+            def generate_speech(self, output_path):
+                time.sleep(self.delay)
+                with open(output_path, "wb") as f:
+                    f.write(b"audio")
+                return {"file_path": output_path, "duration_seconds": 1.0, "processing_time": self.delay}
+        
+        def make_service(replicas):
+            service = tts_service.TextToSpeechService.__new__(tts_service.TextToSpeechService)
+            service.workers = {"fake-model": replicas}
+            service._replica_cursors = {"fake-model": itertools.repeat(0)}
+            service.latency = LatencyTracker()
+            service.batch_engine = SimpleNamespace(replica_load=lambda model_id, index: 0)
+            return service
+        
+        def submit(worker, path):
+            return worker.generate_speech.remote(output_path=path)
+        
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.object(tts_service, "TTS_HEDGE_ENABLED", True), \
+                mock.patch.object(tts_service, "TTS_HEDGE_MIN_DELAY_SECONDS", 0.5), \
+                mock.patch.object(tts_service, "TTSWorker", FakeWorker):
+            output_path = os.path.join(output_dir, "hedged.mp3")
+            
+            # The first replica stalls: the hedge on the second one answers
+            service = make_service([FakeWorker.remote("fake-model", 10.0), FakeWorker.remote("fake-model")])
+            start = time.time()
+            result = asyncio.run(service._call_worker("fake-model", output_path, submit))
+            self.assertLess(time.time() - start, 5.0)
+            self.assertEqual(result["file_path"], os.path.join(output_dir, "hedged_hedge.mp3"))
+            
+            # The first replica is dead: replaced, and the call fails over to the second one
+            dead = FakeWorker.remote("fake-model")
+            ray.kill(dead)
+            service = make_service([dead, FakeWorker.remote("fake-model")])
+            result = asyncio.run(service._call_worker("fake-model", output_path, submit))
+            self.assertEqual(result["file_path"], output_path)
+            self.assertIsNot(service.workers["fake-model"][0], dead)
+    
+    def test_partition_creation_and_retention(self):
+        """Test that upcoming partitions are created and expired ones dropped with their rows"""
+        from sqlalchemy import text as sql_text
+        from src.core.retention import PartitionMaintenance
+        
+        # The maintenance keeps the coming periods of the real tables ready
+        for _ in range(10):
+            if PartitionMaintenance().run_once():
+                break
+            time.sleep(1)
+        self.assertIsNotNone(self.db.execute(sql_text(
+            "SELECT to_regclass('system_stats_p' || to_char(date_trunc('day', NOW()) + INTERVAL '7 days', 'YYYY_MM_DD'))"
+        )).scalar())
+        
+        # On a scratch table, dropped again when the test's transaction rolls back
+        self.db.execute(sql_text(
+            "CREATE TABLE retention_probe (id BIGSERIAL, created_at TIMESTAMPTZ NOT NULL) PARTITION BY RANGE (created_at)"
+        ))
+        create = sql_text("SELECT create_time_partitions('retention_probe', 'day', 3)")
+        self.assertEqual(self.db.execute(create).scalar(), 4)
+        self.assertEqual(self.db.execute(create).scalar(), 0)
+        
+        self.db.execute(sql_text(
+            "CREATE TABLE retention_probe_p2001_01_01 PARTITION OF retention_probe "
+            "FOR VALUES FROM ('2001-01-01') TO ('2001-01-02')"
+        ))
+        self.db.execute(sql_text(
+            "INSERT INTO retention_probe (created_at) VALUES ('2001-01-01 12:00+00'), (NOW())"
+        ))
+        
+        dropped = self.db.execute(sql_text(
+            "SELECT drop_expired_partitions('retention_probe', make_interval(days => 30))"
+        )).scalar()
+        self.assertEqual(dropped, 1)
+        self.assertIsNone(self.db.execute(sql_text("SELECT to_regclass('retention_probe_p2001_01_01')")).scalar())
+        self.assertEqual(self.db.execute(sql_text("SELECT COUNT(*) FROM retention_probe")).scalar(), 1)
+    
+    def test_batch_item_results_are_applied_in_bulk(self):
+        """Test that bulk item updates keep the job counters, status and versions exact and are idempotent"""
+        from src.core.db_models import BatchJob, BatchJobItem
+        from src.core.db_service import db_service
+        from src.core.models import BatchTTSRequest, BatchTTSItem
+        
+        request = BatchTTSRequest(items=[
+            BatchTTSItem(id=f"bulk-{i}", text=f"Bulk update item {i}.", language="en") for i in range(5)
+        ])
+        job_id = db_service.create_batch_job(self.db, request)
+        
+        def result(item_id, status, deduplicated=False):
+            return {
+                "id": item_id,
+                "status": status,
+                "file_url": f"/audio-output/{item_id}.mp3" if status == "completed" else None,
+                "error": "synthesis failed" if status == "failed" else None,
+                "deduplicated": deduplicated
+            }
+        
+        def job():
+            self.db.expire_all()
+            return self.db.get(BatchJob, job_id)
+        
+        first = [result("bulk-0", "completed"), result("bulk-1", "failed"), result("bulk-2", "completed", True)]
+        version = job().version
+        
+        # Two chunks, each one UPDATE of the items and one of the job
+        self.assertEqual(db_service.update_batch_job_items(self.db, job_id, first, chunk_size=2), 3)
+        state = job()
+        self.assertEqual((state.completed_items, state.failed_items, state.deduplicated_items), (2, 1, 1))
+        self.assertEqual(state.status, "processing")
+        self.assertEqual(state.version, version + 2)
+        
+        items = {item.id: item for item in self.db.query(BatchJobItem).filter(BatchJobItem.job_id == job_id)}
+        self.assertEqual(items["bulk-0"].version, version + 1)
+        self.assertEqual(items["bulk-2"].version, version + 2)
+        self.assertEqual(items["bulk-1"].error, "synthesis failed")
+        
+        # Finished items are not counted twice
+        self.assertEqual(db_service.update_batch_job_items(self.db, job_id, first), 0)
+        self.assertEqual(job().completed_items, 2)
+        
+        rest = [result("bulk-3", "completed"), result("bulk-4", "completed")]
+        self.assertEqual(db_service.update_batch_job_items(self.db, job_id, rest), 2)
+        state = job()
+        self.assertEqual((state.completed_items, state.failed_items), (4, 1))
+        self.assertEqual(state.status, "completed")
+    
+    def test_reference_catalog_reloads_on_version_change(self):
+        """Test that the catalog serves lookups from memory and reloads when reference data changes"""
+        from sqlalchemy import text as sql_text
+        from src.core.catalog import ReferenceCatalog
+        from src.core.db_models import Avatar, TTSModel
+        
+        catalog = ReferenceCatalog()
+        catalog.ensure_fresh(self.db)
+        self.assertIn("en", catalog.language_codes())
+        self.assertIsNotNone(catalog.etag)
+        
+        model = self.db.query(TTSModel).first()
+        if model is not None:
+            self.assertEqual(catalog.model_id(model.model_id), model.id)
+        avatar = self.db.query(Avatar).first()
+        if avatar is not None:
+            self.assertIsNotNone(catalog.avatar_id(avatar.gender))
+        
+        # Changes bump catalog_version; rolled back with the test's transaction
+        version, etag = catalog.version, catalog.etag
+        self.db.execute(sql_text("INSERT INTO languages (code, name) VALUES ('zx', 'Catalog test')"))
+        
+        # Not checked again before CATALOG_CHECK_SECONDS...
+        catalog.ensure_fresh(self.db)
+        self.assertNotIn("zx", catalog.language_codes())
+        
+        # ...unless invalidated
+        catalog.invalidate()
+        catalog.ensure_fresh(self.db)
+        self.assertIn("zx", catalog.language_codes())
+        self.assertNotEqual(catalog.version, version)
+        self.assertNotEqual(catalog.etag, etag)
+    
+    def test_async_batch_job_creation_claim_and_paging(self):
+        """Test the async database path used by the batch endpoints"""
+        import asyncio
+        from src.core.async_db_service import async_db_service
+        from src.core.db_models import AsyncSessionLocal, BatchJob, async_engine
+        from src.core.models import BatchTTSRequest, BatchTTSItem
+        
+        request = BatchTTSRequest(items=[
+            BatchTTSItem(id=f"async-{i}", text=f"Async path item {i}.", language="en") for i in range(3)
+        ])
+        
+        async def run():
+            try:
+                async with AsyncSessionLocal() as db:
+                    job_id = await async_db_service.create_batch_job(db, request)
+                    
+                    # Only one owner can claim a job
+                    claimed = [
+                        await async_db_service.claim_batch_job(db, job_id, 120),
+                        await async_db_service.claim_batch_job(db, job_id, 120)
+                    ]
+                    
+                    first = await async_db_service.get_batch_job_status(db, job_id, limit=2)
+                    second = await async_db_service.get_batch_job_status(db, job_id, after=first.next_cursor, limit=2)
+                    summary = await async_db_service.get_batch_job_status(db, job_id, summary=True)
+                    return job_id, claimed, first, second, summary
+            finally:
+                await async_engine.dispose()
+        
+        job_id, claimed, first, second, summary = asyncio.run(run())
+        
+        # Nobody runs it; don't leave it for the orphan scan
+        self.db.query(BatchJob).filter(BatchJob.id == job_id).update(
+            {BatchJob.status: "failed"}, synchronize_session=False
+        )
+        self.db.commit()
+        
+        self.assertEqual(claimed, [True, False])
+        self.assertEqual(len(first.items), 2)
+        self.assertIsNotNone(first.next_cursor)
+        self.assertIsNone(first.delta_cursor)
+        self.assertEqual(len(second.items), 1)
+        self.assertIsNone(second.next_cursor)
+        self.assertIsNotNone(second.delta_cursor)
+        self.assertEqual({item.id for item in first.items + second.items}, {"async-0", "async-1", "async-2"})
+        self.assertEqual(summary.items, [])
+        self.assertEqual(summary.status, "processing")
+    
+    def test_mixed_language_batch_is_routed_per_language(self):
+        """Test that the items of a mixed-language job are synthesized by the model of their language"""
+        from src.core.db_models import BatchJobItem
+        
+        languages = ["en", "es", "en", "es"]
+        payload = {
+            "items": [
+                {"id": f"mixed-{i}", "text": f"Mixed language item {i} {time.time()}.", "language": language}
+                for i, language in enumerate(languages)
+            ]
+        }
+        response = requests.post(f"{API_BASE_URL}/batch-tts", json=payload)
+        self.assertEqual(response.status_code, 200)
+        job_id = response.json()['job_id']
+        
+        summary = wait_for_batch_job(self, job_id)
+        self.assertEqual(summary['status'], 'completed')
+        self.assertEqual(summary['completed_items'], len(languages))
+        
+        # One routing decision per language
+        models = {}
+        for item in self.db.query(BatchJobItem).filter(BatchJobItem.job_id == job_id):
+            self.assertIsNotNone(item.model_id)
+            models.setdefault(item.language_code, set()).add(item.model_id)
+        self.assertEqual(set(models), {"en", "es"})
+        for model_ids in models.values():
+            self.assertEqual(len(model_ids), 1)
+    
+    def test_followers_survive_a_cancelled_leader(self):
+        """Test that requests coalesced onto a cancelled request synthesize on their own"""
+        import asyncio
+        from unittest import mock
+        
+        init_local_ray()
+        from src.core import tts_service
+        
+        service = tts_service.TextToSpeechService.__new__(tts_service.TextToSpeechService)
+        service._inflight = {}
+        calls = []
+        
+        async def synthesize():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                # The leader's synthesis, until its request goes away
+                await asyncio.sleep(60)
+            return {"file_path": f"call-{len(calls)}.mp3"}
+        
+        async def run():
+            leader = asyncio.create_task(service._single_flight("same-request", synthesize))
+            await asyncio.sleep(0.1)
+            follower = asyncio.create_task(service._single_flight("same-request", synthesize))
+            await asyncio.sleep(0.1)
+            
+            leader.cancel()
+            result = await asyncio.wait_for(follower, timeout=5)
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return result
+        
+        with mock.patch.object(tts_service, "TTS_SINGLE_FLIGHT_SHARED", False):
+            result, shared = asyncio.run(run())
+        
+        self.assertEqual(result, {"file_path": "call-2.mp3"})
+        self.assertFalse(shared)
+        self.assertEqual(service._inflight, {})
+    
+    def test_removing_a_model_fails_its_outstanding_batches(self):
+        """Test that micro-batches running or queued for a removed model are reported, not dropped"""
+        import asyncio
+        from types import SimpleNamespace
+        import ray
+        
+        init_local_ray()
+        from src.core.batch_engine import BatchJobEngine
+        
+        @ray.remote(max_concurrency=8)
+        class SlowWorker:
+            def generate_speech_batch(self, requests, priority=None, cost=0.0):
+                time.sleep(3)
+                return [
+                    {"status": "completed", "error": None, "processing_time": 3.0, "duration_seconds": 1.0}
+                    for _ in requests
+                ]
+        
+        service = SimpleNamespace(workers={"fake-model": [SlowWorker.remote()]}, _replace_replica=lambda *args: None)
+        engine = BatchJobEngine(service)
+        
+        async def run():
+            job = {"job_id": "removed-model-job", "weight": 1.0, "results": asyncio.Queue()}
+            engine.jobs[job["job_id"]] = job
+            
+            # More micro-batches than the replica takes at once, so some stay queued
+            batches = [
+                {"job_id": job["job_id"], "batch_id": i, "priority": "batch", "cost": 1.0, "requests": [{"text": "x"}]}
+                for i in range(engine.batch_slots + 3)
+            ]
+            queue = engine._get_queue("fake-model")
+            await asyncio.to_thread(ray.get, queue.put.remote(job["job_id"], batches))
+            engine._ensure_feeders("fake-model")
+            await asyncio.sleep(1)
+            
+            service.workers.pop("fake-model")
+            
+            delivered = {}
+            while len(delivered) < len(batches):
+                batch_id, outputs = await asyncio.wait_for(job["results"].get(), timeout=15)
+                delivered[batch_id] = outputs[0]["status"]
+            
+            stats = await asyncio.to_thread(ray.get, queue.get_stats.remote())
+            return batches, delivered, stats
+        
+        batches, delivered, stats = asyncio.run(run())
+        
+        self.assertEqual(set(delivered), {batch["batch_id"] for batch in batches})
+        self.assertIn("failed", delivered.values())
+        self.assertEqual(stats["queued_batches"], 0)
+        self.assertNotIn("fake-model", engine.queues)
+        self.assertEqual(engine.feeders, {})
+    
+    def test_cached_speaker_conditioning_reaches_synthesis(self):
+        """Test that the worker synthesizes with the avatar's conditioning from the speaker cache"""
+        import tempfile
+        from types import SimpleNamespace
+        from unittest import mock
+        import numpy as np
+        import torch
+        
+        init_local_ray()
+        from src.core import speakers, tts_service
+        
+        used = []
+        
+        class FakeXTTS:
+            def inference(self, text, language, gpt_cond_latent, speaker_embedding):
+                used.append((gpt_cond_latent, speaker_embedding))
+                return {"wav": np.zeros(tts_service.XTTS_SAMPLE_RATE, dtype=np.float32)}
+        
+        class FakeSpeechT5:
+            device = "cpu"
+            
+            def generate_speech(self, input_ids, speaker_embeddings, vocoder=None):
+                used.append(speaker_embeddings)
+                return torch.zeros(tts_service.SPEECHT5_SAMPLE_RATE // 2)
+        
+        worker_class = tts_service.TTSWorker.__ray_actor_class__
+        avatar = {"gender": "female", "dialect": "en-US"}
+        
+        with tempfile.TemporaryDirectory() as voice_dir, tempfile.TemporaryDirectory() as output_dir:
+            with open(os.path.join(voice_dir, "female_en-US.wav"), "wb") as f:
+                f.write(b"RIFF")
+            
+            with mock.patch.object(speakers, "AVATAR_VOICE_DIR", voice_dir):
+                xtts = worker_class.__new__(worker_class)
+                xtts.model = FakeXTTS()
+                xtts.speakers = speakers.SpeakerCache(
+                    os.path.join(output_dir, "xtts"),
+                    lambda path: {"gpt_cond_latent": "latent", "speaker_embedding": "embedding"}
+                )
+                result = xtts._generate_xtts_speech("Hello.", "en", avatar, os.path.join(output_dir, "xtts.mp3"))
+                self.assertEqual(used.pop(), ("latent", "embedding"))
+                self.assertAlmostEqual(result["duration_seconds"], 1.0)
+                self.assertTrue(os.path.exists(result["file_path"]))
+                
+                xvector = torch.ones((1, 512))
+                speecht5 = worker_class.__new__(worker_class)
+                speecht5.model = FakeSpeechT5()
+                speecht5.vocoder = None
+                speecht5.processor = lambda text, return_tensors: {"input_ids": torch.tensor([[4, 5, 6, 2]])}
+                speecht5.speakers = speakers.SpeakerCache(os.path.join(output_dir, "speecht5"), lambda path: xvector)
+                result = speecht5._generate_speecht5_speech(
+                    "Hello.", "en", avatar, os.path.join(output_dir, "speecht5.mp3")
+                )
+                self.assertTrue(torch.equal(used.pop(), xvector))
+                self.assertAlmostEqual(result["duration_seconds"], 0.5)
+    
+    def test_cached_token_ids_reach_synthesis(self):
+        """Test that SpeechT5 synthesizes every sentence from the front-end's cached token ids"""
+        import tempfile
+        import torch
+        
+        init_local_ray()
+        from src.core import tts_service
+        from src.core.text_frontend import TextFrontend
+        
+        tokenized = []
+        synthesized = []
+        
+        def processor(text, return_tensors):
+            tokenized.append(text)
+            return {"input_ids": torch.tensor([[len(text), 2]])}
+        
+        class FakeSpeechT5:
+            device = "cpu"
+            
+            def generate_speech(self, input_ids, speaker_embeddings, vocoder=None):
+                synthesized.append(input_ids.tolist())
+                return torch.zeros(tts_service.SPEECHT5_SAMPLE_RATE // 4)
+        
+        worker_class = tts_service.TTSWorker.__ray_actor_class__
+        worker = worker_class.__new__(worker_class)
+        worker.model_id = "fake/speecht5"
+        worker.model_type = "speecht5"
+        worker.model = FakeSpeechT5()
+        worker.vocoder = None
+        worker.processor = processor
+        worker.speakers = None
+        worker.frontend = TextFrontend(processor)
+        worker.tasks_processed = 0
+        
+        with tempfile.TemporaryDirectory() as output_dir:
+            for name in ("first.mp3", "second.mp3"):
+                result = worker._synthesize("One sentence. And another one.", "en", None, os.path.join(output_dir, name))
+                self.assertAlmostEqual(result["duration_seconds"], 0.5)
+        
+        # Tokenized once per sentence, synthesized per sentence from the cached ids
+        self.assertEqual(tokenized, ["One sentence.", "And another one."])
+        self.assertEqual(synthesized, [[[13, 2]], [[16, 2]]] * 2)
+        self.assertEqual(worker.frontend.get_stats()["hits"], 2)
+    
+    def test_resumed_batch_job_is_admitted(self):
+        """Test that resuming a job reserves its pending audio-seconds, and waits while they don't fit"""
+        import asyncio
+        from types import SimpleNamespace
+        from unittest import mock
+        from src.config import ADMISSION_MAX_QUEUED_AUDIO_SECONDS
+        from src.core.admission import AdmissionController, estimate_audio_seconds
+        from src.core.batch_engine import BatchJobEngine
+        from src.core.db_models import BatchJob
+        from src.core.db_service import db_service
+        from src.core.models import BatchTTSRequest, BatchTTSItem
+        
+        text = "Resumed once there is room for it."
+        job_id = db_service.create_batch_job(self.db, BatchTTSRequest(items=[
+            BatchTTSItem(id="admitted-item-1", text=text, language="en")
+        ]))
+        
+        def delete_job():
+            self.db.rollback()
+            self.db.query(BatchJob).filter(BatchJob.id == job_id).delete(synchronize_session=False)
+            self.db.commit()
+        self.addCleanup(delete_job)
+        
+        # As if the owning process had died mid-job an hour ago
+        self.db.query(BatchJob).filter(BatchJob.id == job_id).update(
+            {BatchJob.status: "processing", BatchJob.updated_at: datetime.now(timezone.utc) - timedelta(hours=1)},
+            synchronize_session=False
+        )
+        self.db.commit()
+        
+        admission = AdmissionController()
+        service = SimpleNamespace(admission=admission, router=SimpleNamespace(route=lambda db, language: "fake-model"))
+        engine = BatchJobEngine(service)
+        
+        # The model's queue is full: the job is left for a later scan, unclaimed
+        admission.reserve("fake-model", ADMISSION_MAX_QUEUED_AUDIO_SECONDS, requests=0)
+        with mock.patch.object(db_service, "get_resumable_batch_jobs", return_value=[job_id]), \
+                mock.patch.object(engine, "_start") as start:
+            self.assertEqual(asyncio.run(engine.resume_unfinished_jobs()), 0)
+            start.assert_not_called()
+            self.assertNotIn(job_id, engine.admitted)
+            self.db.expire_all()
+            job = self.db.query(BatchJob).filter(BatchJob.id == job_id).one()
+            self.assertLess(job.updated_at, datetime.now(timezone.utc) - timedelta(minutes=30))
+            
+            # Once it drained, the job is claimed holding its pending audio-seconds
+            admission.release("fake-model", ADMISSION_MAX_QUEUED_AUDIO_SECONDS, requests=0)
+            self.assertEqual(asyncio.run(engine.resume_unfinished_jobs()), 1)
+            start.assert_called_once_with(job_id)
+        
+        self.assertEqual(engine.admitted[job_id], {"fake-model": estimate_audio_seconds(text)})
+        self.assertAlmostEqual(
+            admission.get_status()[0]['queued_audio_seconds'], round(estimate_audio_seconds(text), 2)
+        )
+    
+    def test_catalog_endpoints_unavailable_until_loaded(self):
+        """Test that languages and avatars answer 503, not a cacheable empty list, before the catalog loads"""
+        import asyncio
+        from types import SimpleNamespace
+        from unittest import mock
+        from fastapi import HTTPException
+        
+        init_local_ray()
+        from src.api import main as api
+        from src.core.catalog import ReferenceCatalog
+        from src.core.db_models import AsyncSessionLocal, async_engine
+        
+        request = SimpleNamespace(headers={})
+        unreachable = mock.AsyncMock()
+        unreachable.execute.side_effect = ConnectionError("database is unreachable")
+        
+        async def run():
+            try:
+                for endpoint in (api.get_supported_languages, api.get_available_avatars):
+                    with mock.patch.object(api, "catalog", ReferenceCatalog()):
+                        with self.assertRaises(HTTPException) as unavailable:
+                            await endpoint(request, unreachable)
+                        self.assertEqual(unavailable.exception.status_code, 503)
+                        self.assertIn("Retry-After", unavailable.exception.headers)
+                        
+                        # Served and cacheable once loaded
+                        async with AsyncSessionLocal() as db:
+                            api.catalog.checked_at = 0.0
+                            response = await endpoint(request, db)
+                        self.assertEqual(response.status_code, 200)
+                        self.assertEqual(response.headers["ETag"], api.catalog.etag)
+            finally:
+                await async_engine.dispose()
+        
+        asyncio.run(run())
+
 if __name__ == '__main__':
     print(f"Testing API at {API_BASE_URL}")
     unittest.main(argv=['first-arg-is-ignored'], exit=False) 
\ No newline at end of file